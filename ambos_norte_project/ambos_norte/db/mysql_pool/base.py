@@ -0,0 +1,53 @@
+"""
+Backend MySQL con pool de conexiones por proceso.
+
+Se usa con ENGINE = 'ambos_norte.db.mysql_pool' y las opciones del pool en
+OPTIONS['POOL'] (tamanio, espera_maxima, vida_maxima, ping_inactiva).
+Pensado para servidores con hilos o ASGI, donde CONN_MAX_AGE no reutiliza
+conexiones entre requests: Django "cierra" la conexión al terminar la
+request y acá eso la devuelve al pool en lugar de cortarla.
+"""
+from functools import partial
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+from .pool import obtener_pool
+
+
+class DatabaseWrapper(MySQLDatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('POOL', None)
+        return params
+
+    def _pool(self, conn_params):
+        opciones = self.settings_dict['OPTIONS'].get('POOL') or {}
+        return obtener_pool(
+            self.alias,
+            partial(MySQLDatabaseWrapper.get_new_connection, self, conn_params),
+            **opciones
+        )
+
+    def get_new_connection(self, conn_params):
+        conexion, self._reutilizada = self._pool(conn_params).tomar()
+        return conexion
+
+    def init_connection_state(self):
+        # El estado de la sesión (sql_mode, aislamiento) ya quedó aplicado
+        # la primera vez que se abrió la conexión
+        if not getattr(self, '_reutilizada', False):
+            super().init_connection_state()
+
+    def _set_autocommit(self, autocommit):
+        # get_autocommit() lee el flag del protocolo, sin ir al servidor
+        if self.connection.get_autocommit() != autocommit:
+            super()._set_autocommit(autocommit)
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = self._pool(None)
+        if self.in_atomic_block or not self.autocommit or (self.errors_occurred and not self.is_usable()):
+            # Transacción abierta o conexión rota: no se devuelve al pool
+            pool.descartar(self.connection)
+        else:
+            pool.devolver(self.connection)
@@ -0,0 +1,186 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolAgotado(Exception):
+    pass
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones MySQLdb compartido por todos los hilos de un proceso.
+
+    - tamanio: conexiones abiertas como máximo (en uso + libres)
+    - espera_maxima: segundos que se espera una conexión libre antes de fallar
+    - vida_maxima: segundos tras los cuales una conexión se cierra al devolverla
+    - ping_inactiva: si una conexión estuvo libre más de esto, se verifica
+      con ping() antes de entregarla
+    Al reciclar() se incrementa la generación: las conexiones anteriores se
+    cierran a medida que se devuelven, sin cortar las que están en uso.
+    """
+
+    def __init__(self, crear, tamanio=10, espera_maxima=10, vida_maxima=3600, ping_inactiva=30):
+        self._crear = crear
+        self.tamanio = tamanio
+        self.espera_maxima = espera_maxima
+        self.vida_maxima = vida_maxima
+        self.ping_inactiva = ping_inactiva
+
+        self._libres = deque()  # (conexion, creada, devuelta, generacion)
+        self._datos = {}  # id(conexion) -> (creada, generacion)
+        self._condicion = threading.Condition()
+        self._abiertas = 0
+        self._generacion = 0
+        self._metricas = {
+            'creadas': 0,
+            'reutilizadas': 0,
+            'cerradas': 0,
+            'descartadas': 0,
+            'esperas': 0,
+            'espera_total_ms': 0.0,
+            'espera_maxima_ms': 0.0,
+            'agotado': 0,
+        }
+
+    # ==================== TOMAR / DEVOLVER ====================
+
+    def tomar(self):
+        """Devuelve (conexion, reutilizada)"""
+        inicio = time.monotonic()
+        limite = inicio + self.espera_maxima
+        espero = False
+
+        with self._condicion:
+            while True:
+                if self._libres:
+                    conexion, creada, devuelta, generacion = self._libres.pop()
+                    break
+                if self._abiertas < self.tamanio:
+                    self._abiertas += 1
+                    conexion = None
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._metricas['agotado'] += 1
+                    raise PoolAgotado(
+                        f'No hay conexiones libres después de {self.espera_maxima}s '
+                        f'(tamaño del pool: {self.tamanio})'
+                    )
+                espero = True
+                self._condicion.wait(restante)
+
+            if espero:
+                esperado = (time.monotonic() - inicio) * 1000
+                self._metricas['esperas'] += 1
+                self._metricas['espera_total_ms'] += esperado
+                self._metricas['espera_maxima_ms'] = max(self._metricas['espera_maxima_ms'], esperado)
+
+        if conexion is None:
+            return self._nueva(), False
+
+        if time.monotonic() - devuelta > self.ping_inactiva and not self._responde(conexion):
+            self._cerrar(conexion, contar='descartadas')
+            with self._condicion:
+                self._abiertas += 1
+            return self._nueva(), False
+
+        with self._condicion:
+            self._metricas['reutilizadas'] += 1
+        return conexion, True
+
+    def devolver(self, conexion):
+        """Devuelve una conexión sana al pool (o la cierra si es vieja)"""
+        creada, generacion = self._datos.get(id(conexion), (0, -1))
+        ahora = time.monotonic()
+        if generacion != self._generacion or ahora - creada > self.vida_maxima:
+            self._cerrar(conexion)
+            return
+        with self._condicion:
+            self._libres.append((conexion, creada, ahora, generacion))
+            self._condicion.notify()
+
+    def descartar(self, conexion):
+        """Cierra una conexión en estado dudoso (transacción abierta, error)"""
+        self._cerrar(conexion, contar='descartadas')
+
+    def reciclar(self):
+        """Cierra las libres y marca las que están en uso para cerrarlas al volver"""
+        with self._condicion:
+            self._generacion += 1
+            libres = list(self._libres)
+            self._libres.clear()
+        for conexion, _, _, _ in libres:
+            self._cerrar(conexion)
+        return len(libres)
+
+    # ==================== INTERNOS ====================
+
+    def _nueva(self):
+        try:
+            conexion = self._crear()
+        except Exception:
+            with self._condicion:
+                self._abiertas -= 1
+                self._condicion.notify()
+            raise
+        with self._condicion:
+            self._datos[id(conexion)] = (time.monotonic(), self._generacion)
+            self._metricas['creadas'] += 1
+        return conexion
+
+    def _responde(self, conexion):
+        try:
+            conexion.ping()
+            return True
+        except Exception:
+            return False
+
+    def _cerrar(self, conexion, contar='cerradas'):
+        try:
+            conexion.close()
+        except Exception:
+            pass
+        with self._condicion:
+            self._datos.pop(id(conexion), None)
+            self._abiertas -= 1
+            self._metricas[contar] += 1
+            self._condicion.notify()
+
+    def estadisticas(self):
+        with self._condicion:
+            libres = len(self._libres)
+            return {
+                'tamanio': self.tamanio,
+                'abiertas': self._abiertas,
+                'en_uso': self._abiertas - libres,
+                'libres': libres,
+                'generacion': self._generacion,
+                **self._metricas,
+                'espera_promedio_ms': (
+                    round(self._metricas['espera_total_ms'] / self._metricas['esperas'], 2)
+                    if self._metricas['esperas'] else 0
+                ),
+            }
+
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def obtener_pool(alias, crear, **opciones):
+    """Un pool por alias de base de datos y por proceso"""
+    with _lock:
+        if alias not in _pools:
+            _pools[alias] = PoolConexiones(crear, **opciones)
+        return _pools[alias]
+
+
+def estadisticas_pools():
+    """{alias: métricas} de todos los pools del proceso"""
+    return {alias: pool.estadisticas() for alias, pool in list(_pools.items())}
+
+
+def reciclar_pools():
+    """Recicla todos los pools (p. ej. después de un failover de MySQL)"""
+    return {alias: pool.reciclar() for alias, pool in list(_pools.items())}
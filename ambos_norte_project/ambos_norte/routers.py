@@ -0,0 +1,161 @@
+"""
+Ruteo de lecturas pesadas (reportes, dashboard, comandos de métricas)
+a la réplica de lectura.
+
+Solo van a la réplica las lecturas hechas dentro de `en_replica()` o de
+una request GET a REPLICA_RUTAS; todo lo demás (checkout, carrito, admin)
+sigue en `default`. Se vuelve a la primaria cuando:
+- la réplica no está configurada o su lag supera REPLICA_LAG_MAXIMO
+- hubo una escritura en el mismo contexto (leer lo que se acaba de escribir)
+- el cliente escribió hace menos de REPLICA_STICKY_SEGUNDOS (cookie)
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections, DatabaseError
+
+
+ALIAS_REPLICA = 'replica'
+LAG_MAXIMO = getattr(settings, 'REPLICA_LAG_MAXIMO', 30)
+INTERVALO_CHEQUEO = getattr(settings, 'REPLICA_INTERVALO_CHEQUEO', 10)
+STICKY_SEGUNDOS = getattr(settings, 'REPLICA_STICKY_SEGUNDOS', 10)
+COOKIE_STICKY = 'leer_primaria'
+RUTAS = getattr(settings, 'REPLICA_RUTAS', ('/dashboard/', '/api/analytics/'))
+# Escrituras que no obligan a leer de la primaria (eventos, sesiones)
+APPS_SIN_STICKY = {'analytics', 'sessions'}
+# Sesión y usuario siempre de la primaria: un login recién hecho puede no
+# haber llegado todavía a la réplica
+APPS_SOLO_PRIMARIA = {'sessions', 'auth', 'usuarios', 'contenttypes', 'admin'}
+
+_usar_replica = ContextVar('usar_replica', default=False)
+_leer_lo_escrito = ContextVar('leer_lo_escrito', default=True)
+_forzar_primaria = ContextVar('forzar_primaria', default=False)
+# {'escribio': bool} compartido por la request o el bloque en_replica más externo
+_escrituras = ContextVar('escrituras', default=None)
+
+_estado_replica = {'hasta': 0.0, 'disponible': False}
+
+
+def replica_configurada():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+def _medir_lag():
+    """Segundos de atraso de la réplica; None si la replicación está cortada"""
+    conexion = connections[ALIAS_REPLICA]
+    if conexion.vendor != 'mysql':
+        return 0
+    with conexion.cursor() as cursor:
+        try:
+            cursor.execute('SHOW REPLICA STATUS')  # MySQL 8.0.22+
+        except DatabaseError:
+            cursor.execute('SHOW SLAVE STATUS')
+        fila = cursor.fetchone()
+        if fila is None:
+            # No replica de nadie (p. ej. endpoint de lectura administrado)
+            return 0
+        columnas = [columna[0] for columna in cursor.description]
+        estado = dict(zip(columnas, fila))
+    return estado.get('Seconds_Behind_Source', estado.get('Seconds_Behind_Master'))
+
+
+def replica_disponible():
+    """Estado de la réplica, re-chequeado cada INTERVALO_CHEQUEO segundos"""
+    if not replica_configurada():
+        return False
+    ahora = time.monotonic()
+    if ahora < _estado_replica['hasta']:
+        return _estado_replica['disponible']
+
+    try:
+        lag = _medir_lag()
+        disponible = lag is not None and lag <= LAG_MAXIMO
+        if not disponible:
+            print(f"Réplica no disponible (lag: {lag}), se lee de la primaria")
+    except Exception as e:
+        print(f"Error chequeando la réplica: {e}")
+        disponible = False
+
+    _estado_replica.update(hasta=ahora + INTERVALO_CHEQUEO, disponible=disponible)
+    return disponible
+
+
+@contextmanager
+def en_replica(leer_lo_escrito=True):
+    """
+    Las lecturas dentro del bloque van a la réplica. Sirve como context
+    manager o decorador (vistas, handle() de comandos).
+    Con leer_lo_escrito=False las lecturas siguen en la réplica aunque el
+    bloque escriba (comandos batch que leen ventas y guardan resultados).
+    """
+    tokens = [
+        (_usar_replica, _usar_replica.set(True)),
+        (_leer_lo_escrito, _leer_lo_escrito.set(leer_lo_escrito)),
+    ]
+    if _escrituras.get() is None:
+        tokens.append((_escrituras, _escrituras.set({'escribio': False})))
+    try:
+        yield
+    finally:
+        for variable, token in reversed(tokens):
+            variable.reset(token)
+
+
+class RouterReplica:
+    """Router de DATABASE_ROUTERS: escrituras siempre a default"""
+
+    def db_for_read(self, model, **hints):
+        if not _usar_replica.get() or _forzar_primaria.get():
+            return None
+        if model._meta.app_label in APPS_SOLO_PRIMARIA:
+            return 'default'
+        escrituras = _escrituras.get()
+        if escrituras and escrituras['escribio'] and _leer_lo_escrito.get():
+            return 'default'
+        return ALIAS_REPLICA if replica_disponible() else 'default'
+
+    def db_for_write(self, model, **hints):
+        escrituras = _escrituras.get()
+        if escrituras is not None and model._meta.app_label not in APPS_SIN_STICKY:
+            escrituras['escribio'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica y primaria tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != ALIAS_REPLICA
+
+
+class ReplicaMiddleware:
+    """
+    - GET a REPLICA_RUTAS: lecturas a la réplica (incluye el render del template)
+    - Si la request escribe, deja una cookie corta para que las siguientes
+      requests del mismo cliente lean de la primaria
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_configurada():
+            return self.get_response(request)
+
+        escrituras = {'escribio': False}
+        token_primaria = _forzar_primaria.set(COOKIE_STICKY in request.COOKIES)
+        token_escrituras = _escrituras.set(escrituras)
+        try:
+            if request.method in ('GET', 'HEAD') and request.path.startswith(tuple(RUTAS)):
+                with en_replica():
+                    response = self.get_response(request)
+            else:
+                response = self.get_response(request)
+        finally:
+            _escrituras.reset(token_escrituras)
+            _forzar_primaria.reset(token_primaria)
+
+        if escrituras['escribio']:
+            response.set_cookie(COOKIE_STICKY, '1', max_age=STICKY_SEGUNDOS, httponly=True, samesite='Lax')
+        return response
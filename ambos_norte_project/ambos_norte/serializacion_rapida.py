@@ -0,0 +1,169 @@
+"""
+Serialización rápida para listados de solo lectura.
+
+Un ModelSerializer instancia un modelo por fila y resuelve cada campo con
+get_attribute / to_representation; en listados largos eso domina el tiempo
+de CPU. Un Esquema describe la salida de un serializer como columnas de
+values() con su conversión precalculada y arma los mismos dicts (mismas
+claves, orden y formato) sin pasar por los modelos.
+
+Cada esquema se define junto al serializer al que replica; el comando
+benchmark_serializacion compara ambas salidas y mide la diferencia.
+"""
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils.encoding import filepath_to_uri
+from rest_framework import serializers
+
+
+class Contexto:
+    """
+    Datos compartidos por todas las filas de una respuesta: la request, el
+    prefijo absoluto de media (se calcula una sola vez) y datos cargados
+    aparte (p. ej. relaciones muchos-a-muchos).
+    """
+
+    def __init__(self, request=None, **datos):
+        self.request = request
+        self.datos = datos
+        self._prefijo_media = None
+
+    def url_media(self, nombre):
+        """Igual que request.build_absolute_uri(storage.url(nombre))"""
+        if self._prefijo_media is None:
+            if isinstance(default_storage, FileSystemStorage):
+                base = default_storage.base_url
+                self._prefijo_media = self.request.build_absolute_uri(base) if self.request else base
+            else:
+                self._prefijo_media = False
+        if self._prefijo_media is False:
+            url = default_storage.url(nombre)
+            return self.request.build_absolute_uri(url) if self.request else url
+        return self._prefijo_media + filepath_to_uri(nombre).lstrip('/')
+
+
+class Esquema:
+    """
+    Campos de salida como tuplas (clave, columna, convertir):
+    - columna: nombre en values() ('categoria__nombre'). Si el valor es None
+      la salida es None, como en DRF. Sin convertir se copia tal cual.
+    - columna None: convertir es un Anidado (serializer anidado) o un
+      Calculado (SerializerMethodField que usa varias columnas).
+    """
+
+    def __init__(self, *campos):
+        self.campos = campos
+
+    def columnas(self):
+        columnas = []
+        for _, columna, convertir in self.campos:
+            if columna is not None:
+                columnas.append(columna)
+            else:
+                columnas.extend(convertir.columnas())
+        return list(dict.fromkeys(columnas))
+
+    def prefijado(self, prefijo):
+        """El mismo esquema leyendo las columnas de una relación (prefijo 'producto__')"""
+        return Esquema(*[
+            (clave, prefijo + columna, convertir) if columna is not None
+            else (clave, None, convertir.prefijado(prefijo))
+            for clave, columna, convertir in self.campos
+        ])
+
+    def subconjunto(self, claves):
+        claves = set(claves)
+        return Esquema(*[campo for campo in self.campos if campo[0] in claves])
+
+    def fila(self, fila, contexto):
+        resultado = {}
+        for clave, columna, convertir in self.campos:
+            if columna is None:
+                resultado[clave] = convertir(fila, contexto)
+                continue
+            valor = fila[columna]
+            resultado[clave] = valor if valor is None or convertir is None else convertir(valor, contexto)
+        return resultado
+
+    def serializar(self, filas, contexto=None):
+        contexto = contexto or Contexto()
+        return [self.fila(fila, contexto) for fila in filas]
+
+    def valores(self, queryset):
+        """Filas de values() con las columnas del esquema (sin prefetch)"""
+        return queryset.prefetch_related(None).values(*self.columnas())
+
+
+class Anidado:
+    """Serializer anidado (read_only): None si la clave foránea es nula"""
+
+    def __init__(self, esquema, columna_pk):
+        self.esquema = esquema
+        self.columna_pk = columna_pk
+
+    def columnas(self):
+        return [self.columna_pk] + self.esquema.columnas()
+
+    def prefijado(self, prefijo):
+        return Anidado(self.esquema.prefijado(prefijo), prefijo + self.columna_pk)
+
+    def __call__(self, fila, contexto):
+        if fila[self.columna_pk] is None:
+            return None
+        return self.esquema.fila(fila, contexto)
+
+
+class Calculado:
+    """Valor calculado a partir de varias columnas: funcion(*valores)"""
+
+    def __init__(self, columnas, funcion):
+        self._columnas = list(columnas)
+        self.funcion = funcion
+
+    def columnas(self):
+        return self._columnas
+
+    def prefijado(self, prefijo):
+        return Calculado([prefijo + columna for columna in self._columnas], self.funcion)
+
+    def __call__(self, fila, contexto):
+        return self.funcion(*[fila[columna] for columna in self._columnas])
+
+
+# ==================== CONVERSIONES ====================
+# Reusan los campos de DRF donde el formato tiene detalles (redondeo,
+# zona horaria); el resto de los tipos sale de la base tal cual.
+
+def decimal(max_digits, decimal_places):
+    campo = serializers.DecimalField(max_digits=max_digits, decimal_places=decimal_places)
+    return lambda valor, contexto: campo.to_representation(valor)
+
+
+_fecha_hora = serializers.DateTimeField()
+_fecha = serializers.DateField()
+
+
+def fecha_hora(valor, contexto):
+    return _fecha_hora.to_representation(valor)
+
+
+def fecha(valor, contexto):
+    return _fecha.to_representation(valor)
+
+
+def texto(valor, contexto):
+    return str(valor)
+
+
+def flotante(valor, contexto):
+    return float(valor)
+
+
+def archivo(valor, contexto):
+    """FileField / ImageField: URL absoluta o None si está vacío"""
+    return contexto.url_media(valor) if valor else None
+
+
+def opciones(choices):
+    """Equivalente a get_<campo>_display()"""
+    etiquetas = {valor: str(etiqueta) for valor, etiqueta in choices}
+    return lambda valor, contexto: etiquetas.get(valor, str(valor))
@@ -55,12 +55,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.panel_admin.instrumentacion.InstrumentacionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'ambos_norte.routers.ReplicaMiddleware',
+    'apps.analytics.middleware.AnalyticsMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -101,9 +104,41 @@ DATABASES = {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
             'charset': 'utf8mb4',
         },
+        # Conexiones persistentes: se reutilizan durante DB_CONN_MAX_AGE segundos
+        # y se verifican antes de usarlas en cada request
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
     }
 }
 
+# Pool de conexiones (servidores con hilos / ASGI), ver ambos_norte/db/mysql_pool
+if config('DB_POOL', default=False, cast=bool):
+    DATABASES['default']['ENGINE'] = 'ambos_norte.db.mysql_pool'
+    # Con pool cada request toma y devuelve su conexión
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['POOL'] = {
+        'tamanio': config('DB_POOL_TAMANIO', default=10, cast=int),
+        'espera_maxima': config('DB_POOL_ESPERA_MAXIMA', default=10, cast=int),  # segundos
+        'vida_maxima': config('DB_POOL_VIDA_MAXIMA', default=3600, cast=int),  # segundos
+        'ping_inactiva': config('DB_POOL_PING_INACTIVA', default=30, cast=int),  # segundos
+    }
+
+# Réplica de lectura para reportes, dashboard y comandos de métricas
+# (ver ambos_norte/routers.py). Sin DB_REPLICA_HOST todo va a default.
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+if DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': DB_REPLICA_HOST,
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['ambos_norte.routers.RouterReplica']
+REPLICA_LAG_MAXIMO = config('DB_REPLICA_LAG_MAXIMO', default=30, cast=int)  # segundos
+REPLICA_STICKY_SEGUNDOS = 10
+
 # Modelo de usuario personalizado
 AUTH_USER_MODEL = 'usuarios.Usuario'
 
@@ -156,4 +191,64 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # JSON con orjson (mismo formato que el de DRF, ver ambos_norte/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'ambos_norte.renderers.RenderizadorJSONRapido',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'ambos_norte.renderers.ParserJSONRapido',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
+
+# Carrito anónimo en cookie firmada (ver apps/carrito/sesion.py)
+CARRITO_SESION_COOKIE = 'carrito_anonimo'
+CARRITO_SESION_MAX_AGE = 60 * 60 * 24 * 14  # 14 días
+CARRITO_SESION_MAX_ITEMS = 50
+
+# Política de captura de eventos de analytics (ver apps/analytics/captura.py):
+# 1 de cada N eventos de cada tipo se guarda con peso N
+ANALYTICS_MUESTREO = {
+    'vista_producto': config('ANALYTICS_MUESTREO_VISTAS', default=1, cast=int),
+    'busqueda': config('ANALYTICS_MUESTREO_BUSQUEDAS', default=1, cast=int),
+}
+# Vistas y búsquedas repetidas por el mismo visitante cuentan una vez por ventana
+ANALYTICS_VENTANA_DUPLICADOS = config('ANALYTICS_VENTANA_DUPLICADOS', default=30 * 60, cast=int)  # segundos
+
+# Procesamiento de imágenes del catálogo (miniaturas WebP/JPEG)
+CATALOGO_TAREAS_EN_SEGUNDO_PLANO = config('CATALOGO_TAREAS_EN_SEGUNDO_PLANO', default=True, cast=bool)
+CATALOGO_TAREAS_WORKERS = config('CATALOGO_TAREAS_WORKERS', default=2, cast=int)
+IMAGENES_TAMANIOS = {
+    'thumb': 200,
+    'medium': 600,
+    'large': 1200,
+}
+
+# Instrumentación de requests (ver apps/panel_admin/instrumentacion.py)
+INSTRUMENTACION_ACTIVA = config('INSTRUMENTACION_ACTIVA', default=True, cast=bool)
+# En los tests, exceder el presupuesto de consultas hace fallar la request
+INSTRUMENTACION_ESTRICTA = 'test' in sys.argv
+# Archivo donde guardar las sentencias SQL distintas (para analizar_indices)
+INSTRUMENTACION_CAPTURA_SQL = config('INSTRUMENTACION_CAPTURA_SQL', default='')
+PRESUPUESTO_CONSULTAS_DEFECTO = 30
+# Claves '<basename>.<acción>' de DRF (o '<nombre de URL>.<método>' fuera de los ViewSets).
+# Las vistas de detalle y las que agregan al carrito o crean pedidos incluyen las
+# escrituras de analytics (evento, actividad reciente, tendencias) y, para un
+# visitante nuevo, el alta de su sesión y su agente de usuario.
+PRESUPUESTO_CONSULTAS = {
+    'producto.list': 6,
+    'producto.retrieve': 18,
+    'producto.buscar': 6,
+    'producto.facetas': 4,
+    'categoria.list': 4,
+    'pedido.list': 8,
+    'pedido.retrieve': 8,
+    'pedido.create': 18,
+    'carrito.list': 8,
+    'carrito.retrieve': 8,
+    'carrito.agregar_item': 18,
+    'carrito.operaciones': 24,
+    'usuario.list': 8,
 }
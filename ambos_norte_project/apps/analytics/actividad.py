@@ -0,0 +1,131 @@
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from apps.catalogo.models import Producto
+from .models import ActividadReciente, RecomendacionProducto
+
+
+# Productos que se guardan por usuario/sesión
+MAXIMO_PRODUCTOS = getattr(settings, 'ACTIVIDAD_RECIENTE_MAXIMO', 20)
+# Cada cuántas horas el interés por un producto visto se reduce a la mitad
+VIDA_MEDIA_HORAS = getattr(settings, 'ACTIVIDAD_VIDA_MEDIA_HORAS', 72)
+
+TIPOS = {'vista_producto': 'v', 'agregar_carrito': 'c'}
+PESOS = {'v': 1.0, 'c': 3.0}
+
+
+def clave_actividad(usuario_id=None, session_id=None):
+    if usuario_id:
+        return f'u:{usuario_id}'
+    if session_id:
+        return f's:{session_id}'
+    return None
+
+
+def _agregar(buffer, nuevas):
+    """
+    Agrega entradas al frente del buffer: un producto aparece una sola vez
+    (un agregado al carrito no se pisa con una vista posterior) y se
+    descartan las más viejas.
+    """
+    for producto_id, tipo, instante in sorted(nuevas, key=lambda entrada: entrada[2]):
+        anterior = next((entrada for entrada in buffer if entrada[0] == producto_id), None)
+        if anterior:
+            buffer.remove(anterior)
+            if anterior[1] == 'c':
+                tipo = 'c'
+        buffer.insert(0, [producto_id, tipo, instante])
+    return buffer[:MAXIMO_PRODUCTOS]
+
+
+def registrar_actividades(eventos):
+    """
+    Actualiza los buffers de actividad con un lote de eventos
+    [(usuario_id, session_id, producto_id, tipo_evento, fecha)].
+    Un solo SELECT ... FOR UPDATE y un UPDATE por lote, sin importar
+    cuántos usuarios/sesiones incluya.
+    """
+    por_clave = defaultdict(list)
+    for usuario_id, session_id, producto_id, tipo_evento, fecha in eventos:
+        clave = clave_actividad(usuario_id, session_id)
+        tipo = TIPOS.get(tipo_evento)
+        if clave and tipo and producto_id:
+            por_clave[clave].append([int(producto_id), tipo, int(fecha.timestamp())])
+    if not por_clave:
+        return 0
+
+    ahora = timezone.now()
+    with transaction.atomic():
+        ActividadReciente.objects.bulk_create(
+            [ActividadReciente(clave=clave) for clave in por_clave],
+            ignore_conflicts=True
+        )
+        actividades = list(ActividadReciente.objects.select_for_update().filter(clave__in=por_clave))
+        for actividad in actividades:
+            actividad.productos = _agregar(actividad.productos, por_clave[actividad.clave])
+            actividad.ultima_actividad = ahora
+        ActividadReciente.objects.bulk_update(actividades, ['productos', 'ultima_actividad'])
+    return len(actividades)
+
+
+def cargar_actividad(usuario=None, session_id=None):
+    """
+    Buffer combinado del usuario y de su sesión actual (lo navegado antes de
+    iniciar sesión también cuenta), del más reciente al más antiguo.
+    """
+    usuario_id = usuario.id if usuario is not None and usuario.is_authenticated else None
+    claves = [clave for clave in (clave_actividad(usuario_id), clave_actividad(session_id=session_id)) if clave]
+    if not claves:
+        return []
+
+    entradas = []
+    for productos in ActividadReciente.objects.filter(clave__in=claves).values_list('productos', flat=True):
+        # Del más antiguo al más reciente, para que _agregar respete el orden
+        entradas.extend(reversed(productos))
+    return _agregar([], entradas)
+
+
+def productos_recientes(usuario=None, session_id=None, limite=MAXIMO_PRODUCTOS):
+    """Ids de los últimos productos vistos o agregados al carrito"""
+    return [producto_id for producto_id, _, _ in cargar_actividad(usuario, session_id)[:limite]]
+
+
+def productos_para_ti(usuario=None, session_id=None, limite=12):
+    """
+    Ranking personalizado: los vecinos precalculados (RecomendacionProducto)
+    de lo que el usuario miró, ponderados por el tipo de interacción y su
+    antigüedad. Si no alcanza, se completa con productos de las mismas
+    categorías. Devuelve ids ordenados.
+    """
+    actividad = cargar_actividad(usuario, session_id)
+    if not actividad:
+        return []
+
+    ahora = time.time()
+    interes = {
+        producto_id: PESOS[tipo] * 0.5 ** ((ahora - instante) / 3600 / VIDA_MEDIA_HORAS)
+        for producto_id, tipo, instante in actividad
+    }
+
+    puntajes = defaultdict(float)
+    vecinos = RecomendacionProducto.objects.filter(
+        producto_id__in=interes
+    ).values_list('producto_id', 'recomendado_id', 'puntaje')
+    for producto_id, recomendado_id, puntaje in vecinos:
+        if recomendado_id not in interes:
+            puntajes[recomendado_id] += interes[producto_id] * puntaje
+
+    ranking = sorted(puntajes, key=lambda producto_id: -puntajes[producto_id])[:limite]
+
+    faltan = limite - len(ranking)
+    if faltan > 0:
+        excluir = set(interes) | set(ranking)
+        ranking += list(Producto.objects.filter(
+            categoria_id__in=Producto.objects.filter(id__in=interes).values('categoria_id'),
+            activo=True
+        ).exclude(
+            id__in=excluir
+        ).order_by('-destacado', '-fecha_creacion').values_list('id', flat=True)[:faltan])
+    return ranking
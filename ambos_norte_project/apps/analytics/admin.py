@@ -1,8 +1,15 @@
 from django.contrib import admin
 from .models import (
     EventoUsuario,
+    AgenteUsuario,
+    SesionVisitante,
     MetricaProducto,
     MetricaDiaria,
+    SnapshotStock,
+    PronosticoProducto,
+    RecomendacionProducto,
+    ActividadReciente,
+    TendenciaProducto,
     ConfiguracionGoogleAnalytics,
     DatosGoogleAnalytics
 )
@@ -11,16 +18,18 @@ from .models import (
 class EventoUsuarioAdmin(admin.ModelAdmin):
     list_display = ['id', 'tipo_evento', 'usuario', 'producto', 'valor_monetario', 'timestamp']
     list_filter = ['tipo_evento', 'timestamp']
-    search_fields = ['usuario__username', 'session_id', 'producto__nombre']
+    search_fields = ['usuario__username', 'sesion__clave', 'producto__nombre']
     readonly_fields = ['timestamp']
+    raw_id_fields = ['sesion', 'agente']
+    list_select_related = ['usuario', 'producto']
     date_hierarchy = 'timestamp'
     
     fieldsets = (
         ('Información del Evento', {
-            'fields': ('tipo_evento', 'timestamp')
+            'fields': ('tipo_evento', 'timestamp', 'peso')
         }),
         ('Usuario', {
-            'fields': ('usuario', 'session_id', 'ip_address', 'user_agent')
+            'fields': ('usuario', 'sesion', 'ip_address', 'agente')
         }),
         ('Referencias', {
             'fields': ('producto', 'categoria', 'pedido')
@@ -31,6 +40,21 @@ class EventoUsuarioAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(AgenteUsuario)
+class AgenteUsuarioAdmin(admin.ModelAdmin):
+    list_display = ['id', 'navegador', 'sistema', 'dispositivo', 'primera_vez']
+    list_filter = ['dispositivo', 'navegador', 'sistema']
+    search_fields = ['user_agent']
+    readonly_fields = ['hash', 'primera_vez']
+
+
+@admin.register(SesionVisitante)
+class SesionVisitanteAdmin(admin.ModelAdmin):
+    list_display = ['id', 'clave', 'creada']
+    search_fields = ['clave']
+    readonly_fields = ['creada']
+
+
 @admin.register(MetricaProducto)
 class MetricaProductoAdmin(admin.ModelAdmin):
     list_display = [
@@ -178,3 +202,47 @@ class DatosGoogleAnalyticsAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(SnapshotStock)
+class SnapshotStockAdmin(admin.ModelAdmin):
+    list_display = ['fecha', 'producto', 'stock']
+    list_filter = ['fecha']
+    search_fields = ['producto__nombre']
+    date_hierarchy = 'fecha'
+
+
+@admin.register(PronosticoProducto)
+class PronosticoProductoAdmin(admin.ModelAdmin):
+    list_display = [
+        'producto', 'metodo', 'demanda_diaria', 'demanda_30d',
+        'stock_seguridad', 'punto_reorden', 'fecha_quiebre', 'ultima_actualizacion'
+    ]
+    list_filter = ['metodo']
+    search_fields = ['producto__nombre']
+    list_select_related = ['producto']
+    readonly_fields = ['ultima_actualizacion']
+
+
+@admin.register(RecomendacionProducto)
+class RecomendacionProductoAdmin(admin.ModelAdmin):
+    list_display = ['producto', 'posicion', 'recomendado', 'puntaje']
+    search_fields = ['producto__nombre', 'recomendado__nombre']
+    list_select_related = ['producto', 'recomendado']
+    raw_id_fields = ['producto', 'recomendado']
+
+
+@admin.register(ActividadReciente)
+class ActividadRecienteAdmin(admin.ModelAdmin):
+    list_display = ['clave', 'ultima_actividad']
+    search_fields = ['clave']
+    date_hierarchy = 'ultima_actividad'
+    readonly_fields = ['ultima_actividad']
+
+
+@admin.register(TendenciaProducto)
+class TendenciaProductoAdmin(admin.ModelAdmin):
+    list_display = ['producto', 'puntaje', 'periodo', 'actualizado']
+    search_fields = ['producto__nombre']
+    list_select_related = ['producto']
+    ordering = ['-periodo', '-puntaje']
@@ -0,0 +1,51 @@
+"""
+Clasificación de User-Agents en navegador / sistema / dispositivo.
+
+Se ejecuta una sola vez por User-Agent distinto, al internarlo en
+AgenteUsuario; los eventos guardan solo la referencia.
+"""
+import hashlib
+import re
+from .captura import es_bot
+
+
+# El orden importa: Edge y Opera también dicen "Chrome", Chrome también dice "Safari"
+NAVEGADORES = (
+    ('Edge', re.compile(r'Edg(?:e|A|iOS)?/', re.I)),
+    ('Opera', re.compile(r'OPR/|Opera', re.I)),
+    ('Samsung Internet', re.compile(r'SamsungBrowser/', re.I)),
+    ('Firefox', re.compile(r'Firefox/|FxiOS/', re.I)),
+    ('Chrome', re.compile(r'Chrome/|CriOS/', re.I)),
+    ('Safari', re.compile(r'Safari/', re.I)),
+)
+SISTEMAS = (
+    ('Windows', re.compile(r'Windows', re.I)),
+    ('Android', re.compile(r'Android', re.I)),
+    ('iOS', re.compile(r'iPhone|iPad|iPod', re.I)),
+    ('macOS', re.compile(r'Mac OS X|Macintosh', re.I)),
+    ('Linux', re.compile(r'Linux|X11', re.I)),
+)
+_TABLET = re.compile(r'iPad|Tablet|Android(?!.*Mobile)', re.I)
+_MOVIL = re.compile(r'Mobile|iPhone|iPod|Android', re.I)
+
+
+def hash_agente(user_agent):
+    """Clave única de largo fijo (un TEXT no se puede indexar completo en MySQL)"""
+    return hashlib.md5((user_agent or '').encode()).hexdigest()
+
+
+def clasificar_agente(user_agent):
+    """(navegador, sistema, dispositivo) de un User-Agent"""
+    user_agent = user_agent or ''
+    if es_bot(user_agent):
+        return 'Bot', 'Otro', 'bot'
+
+    navegador = next((nombre for nombre, patron in NAVEGADORES if patron.search(user_agent)), 'Otro')
+    sistema = next((nombre for nombre, patron in SISTEMAS if patron.search(user_agent)), 'Otro')
+    if _TABLET.search(user_agent):
+        dispositivo = 'tablet'
+    elif _MOVIL.search(user_agent):
+        dispositivo = 'movil'
+    else:
+        dispositivo = 'escritorio'
+    return navegador, sistema, dispositivo
@@ -0,0 +1,45 @@
+from django.db import models
+from django.utils.functional import cached_property
+
+
+class CodigoField(models.PositiveSmallIntegerField):
+    """
+    Guarda un valor de texto como un entero chico según `codigos`
+    ({'vista_producto': 1, ...}). En Python el campo sigue siendo texto:
+    filtros, values(), choices y get_FOO_display() usan los nombres; solo
+    la columna (y sus índices) guarda el código.
+
+    Los códigos no se pueden reasignar una vez que hay datos guardados.
+    """
+
+    def __init__(self, *args, codigos=None, **kwargs):
+        self.codigos = dict(codigos or {})
+        self.nombres = {codigo: nombre for nombre, codigo in self.codigos.items()}
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['codigos'] = self.codigos
+        return name, path, args, kwargs
+
+    @cached_property
+    def validators(self):
+        # Sin los validadores de rango de IntegerField: el valor es el nombre
+        return [*self.default_validators, *self._validators]
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self.nombres.get(value, value)
+
+    def to_python(self, value):
+        if value is None or value in self.codigos:
+            return value
+        if isinstance(value, int) and value in self.nombres:
+            return self.nombres[value]
+        return value
+
+    def get_prep_value(self, value):
+        if isinstance(value, str) and value in self.codigos:
+            return self.codigos[value]
+        return super().get_prep_value(value)
@@ -0,0 +1,114 @@
+"""
+Política de captura de eventos de analytics.
+
+Antes de guardar un EventoUsuario se decide si vale la pena:
+- Bots, crawlers, monitores y clientes HTTP sin navegador no se registran.
+- Las vistas y búsquedas repetidas por el mismo visitante dentro de
+  ANALYTICS_VENTANA_DUPLICADOS cuentan una sola vez.
+- Cada tipo de evento puede muestrearse 1 de cada N (ANALYTICS_MUESTREO).
+  El evento guardado lleva peso N, así que las métricas suman el peso
+  (Sum('peso')) en lugar de contar filas y siguen sin sesgo. La muestra es
+  por visitante: un visitante elegido conserva todos sus eventos y los
+  embudos por sesión no se cortan.
+"""
+import hashlib
+import random
+import re
+from functools import lru_cache
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min, Sum
+
+
+# {tipo_evento: N} -> se guarda 1 de cada N eventos con peso N
+MUESTREO = getattr(settings, 'ANALYTICS_MUESTREO', {})
+# Eventos que alimentan ingresos, pedidos y usuarios: nunca se muestrean
+SIN_MUESTREO = {'inicio_checkout', 'compra_completada', 'registro', 'login'}
+VENTANA_DUPLICADOS = getattr(settings, 'ANALYTICS_VENTANA_DUPLICADOS', 30 * 60)  # segundos
+TIPOS_DEDUPLICADOS = {'vista_producto', 'busqueda'}
+
+_BOTS = re.compile(
+    r'bot\b|bot/|crawl|spider|slurp|scrap|archiver|'
+    r'facebookexternalhit|whatsapp|telegram|preview|lighthouse|pagespeed|'
+    r'headless|phantomjs|selenium|puppeteer|playwright|'
+    r'curl|wget|httpie|python|aiohttp|httpx|go-http-client|java/|okhttp|axios|node-fetch|'
+    r'libwww|guzzle|postman|insomnia|'
+    r'monitor|uptime|pingdom|statuscake|health|kube-probe|elb-healthchecker',
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=4096)
+def es_bot(user_agent):
+    """True para crawlers, monitores y clientes HTTP (un navegador siempre envía User-Agent)"""
+    if not user_agent:
+        return True
+    return _BOTS.search(user_agent) is not None
+
+
+def tasa_muestreo(tipo_evento):
+    if tipo_evento in SIN_MUESTREO:
+        return 1
+    return max(int(MUESTREO.get(tipo_evento, 1)), 1)
+
+
+def _en_muestra(visitante, tasa):
+    if not visitante:
+        return random.randrange(tasa) == 0
+    resumen = hashlib.blake2b(str(visitante).encode(), digest_size=8).digest()
+    return int.from_bytes(resumen, 'big') % tasa == 0
+
+
+def peso_evento(tipo_evento, visitante=None, user_agent=None, objeto=None):
+    """
+    Peso con el que se guarda el evento, o 0 si no se registra.
+
+    user_agent None significa que no hay request (señales, comandos): no se
+    clasifica. objeto identifica lo visto (producto, texto buscado) para
+    descartar repeticiones del mismo visitante.
+    """
+    if user_agent is not None and es_bot(user_agent):
+        return 0
+
+    tasa = tasa_muestreo(tipo_evento)
+    if tasa > 1 and not _en_muestra(visitante, tasa):
+        return 0
+
+    if tipo_evento in TIPOS_DEDUPLICADOS and visitante and objeto is not None and VENTANA_DUPLICADOS:
+        clave = hashlib.md5(f'{tipo_evento}:{visitante}:{objeto}'.encode()).hexdigest()
+        if not cache.add(f'analytics:visto:{clave}', 1, VENTANA_DUPLICADOS):
+            return 0
+    return tasa
+
+
+def peso_request(tipo_evento, request, visitante=None, objeto=None):
+    """peso_evento() con el User-Agent de la request (sin request no filtra bots)"""
+    user_agent = request.META.get('HTTP_USER_AGENT', '') if request is not None else None
+    return peso_evento(tipo_evento, visitante, user_agent, objeto)
+
+
+def contar_por_tipo(eventos, tipos):
+    """{tipo_evento: eventos representados} con una sola consulta agrupada"""
+    conteo = dict.fromkeys(tipos, 0)
+    filas = eventos.filter(tipo_evento__in=tipos).order_by().values('tipo_evento').annotate(
+        total=Sum('peso')
+    ).values_list('tipo_evento', 'total')
+    for tipo_evento, total in filas:
+        conteo[tipo_evento] = total or 0
+    return conteo
+
+
+def contar(eventos):
+    """Cantidad de eventos representados por un queryset (suma de pesos)"""
+    return eventos.order_by().aggregate(total=Sum('peso'))['total'] or 0
+
+
+def contar_distintos(eventos, campo):
+    """
+    Cantidad estimada de valores distintos de `campo` (sesiones, usuarios).
+    Contar filas distintas subestima con muestreo: cada valor guardado
+    representa a tantos como el menor peso de sus eventos.
+    """
+    return eventos.exclude(**{f'{campo}__isnull': True}).order_by().values(campo).annotate(
+        peso_minimo=Min('peso')
+    ).aggregate(total=Sum('peso_minimo'))['total'] or 0
@@ -0,0 +1,179 @@
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from apps.catalogo.models import Producto, MovimientoStock
+from apps.pedidos.models import ItemPedido
+from .models import SnapshotStock
+
+
+DIAS_ANALISIS = getattr(settings, 'INVENTARIO_DIAS_ANALISIS', 30)
+
+# Estados de pedido que cuentan como venta
+ESTADOS_VENTA = ('pagado', 'en_preparacion', 'enviado', 'entregado')
+
+
+def registrar_snapshot(fecha=None):
+    """
+    Copia el stock actual de todos los productos a SnapshotStock con un solo
+    INSERT ... SELECT (si ya hay snapshot de esa fecha se sobrescribe).
+    Devuelve la cantidad de filas afectadas.
+    """
+    fecha = fecha or timezone.localdate()
+    qn = connection.ops.quote_name
+    tabla = qn(SnapshotStock._meta.db_table)
+    productos = qn(Producto._meta.db_table)
+
+    sql = (
+        f"INSERT INTO {tabla} ({qn('fecha')}, {qn('producto_id')}, {qn('stock')}) "
+        f"SELECT %s, {qn('id')}, {qn('stock')} FROM {productos} WHERE 1 = 1 "
+    )
+    if connection.vendor == 'mysql':
+        sql += f"ON DUPLICATE KEY UPDATE {qn('stock')} = VALUES({qn('stock')})"
+    else:
+        sql += (
+            f"ON CONFLICT ({qn('producto_id')}, {qn('fecha')}) "
+            f"DO UPDATE SET {qn('stock')} = excluded.{qn('stock')}"
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [fecha])
+        return cursor.rowcount
+
+
+def reconstruir_desde_movimientos(dias):
+    """
+    Completa los snapshots de los últimos `dias` días a partir del ledger de
+    MovimientoStock: stock al cierre del día d = stock actual - movimientos
+    posteriores a d. No pisa snapshots existentes.
+    """
+    hoy = timezone.localdate()
+    inicio = hoy - timedelta(days=dias - 1)
+    fechas = [inicio + timedelta(days=i) for i in range(dias)]
+    posicion_fecha = {fecha: i for i, fecha in enumerate(fechas)}
+
+    productos = list(Producto.objects.values_list('id', 'stock', 'fecha_creacion'))
+    if not productos:
+        return 0
+    posicion_producto = {producto_id: i for i, (producto_id, _, _) in enumerate(productos)}
+
+    deltas = np.zeros((len(productos), dias), dtype=np.int64)
+    movimientos = MovimientoStock.objects.filter(
+        fecha__date__gte=inicio
+    ).annotate(dia=TruncDate('fecha')).values('producto_id', 'dia').annotate(total=Sum('cantidad'))
+    for fila in movimientos:
+        i = posicion_producto.get(fila['producto_id'])
+        j = posicion_fecha.get(fila['dia'])
+        if i is not None and j is not None:
+            deltas[i, j] = fila['total']
+
+    # Suma de los movimientos posteriores a cada día
+    posteriores = np.cumsum(deltas[:, ::-1], axis=1)[:, ::-1] - deltas
+    actuales = np.array([stock for _, stock, _ in productos], dtype=np.int64)
+    historico = actuales[:, None] - posteriores
+
+    # No hay stock antes de que el producto exista
+    creacion = np.array([
+        (timezone.localdate(fecha_creacion) - inicio).days
+        for _, _, fecha_creacion in productos
+    ])
+    existe = np.arange(dias)[None, :] >= creacion[:, None]
+
+    filas, columnas = np.nonzero(existe)
+    snapshots = [
+        SnapshotStock(
+            producto_id=productos[i][0],
+            fecha=fechas[j],
+            stock=max(int(historico[i, j]), 0),
+        )
+        for i, j in zip(filas.tolist(), columnas.tolist())
+    ]
+    SnapshotStock.objects.bulk_create(snapshots, batch_size=2000, ignore_conflicts=True)
+    return len(snapshots)
+
+
+def cargar_historial(producto_ids, dias=DIAS_ANALISIS):
+    """
+    Matriz [producto x día] con el stock de los últimos `dias` días.
+    Los días sin snapshot repiten el último valor conocido; antes del
+    primer snapshot quedan en NaN.
+    """
+    hoy = timezone.localdate()
+    inicio = hoy - timedelta(days=dias - 1)
+    posicion_producto = {producto_id: i for i, producto_id in enumerate(producto_ids)}
+
+    matriz = np.full((len(producto_ids), dias), np.nan)
+    filas = SnapshotStock.objects.filter(
+        fecha__gte=inicio, fecha__lte=hoy
+    ).values_list('producto_id', 'fecha', 'stock')
+    for producto_id, fecha, stock in filas.iterator(chunk_size=5000):
+        i = posicion_producto.get(producto_id)
+        if i is not None:
+            matriz[i, (fecha - inicio).days] = stock
+
+    # Forward fill vectorizado
+    conocidos = ~np.isnan(matriz)
+    indices = np.where(conocidos, np.arange(dias)[None, :], 0)
+    np.maximum.accumulate(indices, axis=1, out=indices)
+    return matriz[np.arange(len(producto_ids))[:, None], indices]
+
+
+def ventas_por_producto(dias=DIAS_ANALISIS):
+    """Unidades vendidas por producto en los últimos `dias` días"""
+    desde = timezone.now() - timedelta(days=dias)
+    return dict(
+        ItemPedido.objects.filter(
+            pedido__fecha_pedido__gte=desde,
+            pedido__estado__in=ESTADOS_VENTA
+        ).values('producto_id').annotate(
+            unidades=Sum('cantidad')
+        ).values_list('producto_id', 'unidades')
+    )
+
+
+def analizar_inventario(dias=DIAS_ANALISIS, producto_ids=None):
+    """
+    Indicadores de inventario por producto para los últimos `dias` días:
+    - stock_promedio: promedio ponderado en el tiempo (un valor por día)
+    - dias_sin_stock: días que cerraron con stock 0
+    - ventas_diarias y dias_cobertura (stock actual / ventas diarias)
+    Devuelve {producto_id: {...}}.
+    """
+    productos = Producto.objects.all()
+    if producto_ids is not None:
+        productos = productos.filter(id__in=producto_ids)
+    else:
+        productos = productos.filter(activo=True)
+    filas = list(productos.values_list('id', 'stock'))
+    if not filas:
+        return {}
+
+    ids = [producto_id for producto_id, _ in filas]
+    actuales = np.array([stock for _, stock in filas], dtype=float)
+    matriz = cargar_historial(ids, dias)
+
+    observados = (~np.isnan(matriz)).sum(axis=1)
+    suma = np.nansum(matriz, axis=1)
+    promedio = np.divide(suma, observados, out=np.full(len(ids), np.nan), where=observados > 0)
+    sin_stock = (np.nan_to_num(matriz, nan=1.0) <= 0).sum(axis=1)
+
+    ventas = ventas_por_producto(dias)
+    ventas_diarias = np.array([ventas.get(producto_id, 0) for producto_id in ids], dtype=float) / dias
+    cobertura = np.divide(
+        actuales, ventas_diarias, out=np.full(len(ids), np.inf), where=ventas_diarias > 0
+    )
+
+    return {
+        producto_id: {
+            'stock_actual': int(actuales[i]),
+            'stock_promedio': round(float(promedio[i]), 2) if observados[i] else None,
+            'dias_observados': int(observados[i]),
+            'dias_sin_stock': int(sin_stock[i]),
+            'ventas_diarias': round(float(ventas_diarias[i]), 2),
+            'dias_cobertura': round(float(cobertura[i]), 1) if np.isfinite(cobertura[i]) else None,
+        }
+        for i, producto_id in enumerate(ids)
+    }
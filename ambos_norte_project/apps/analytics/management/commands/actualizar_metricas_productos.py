@@ -1,8 +1,12 @@
 from django.core.management.base import BaseCommand
+from ambos_norte.routers import en_replica
 from django.utils import timezone
 from django.db.models import Sum, Count, Avg
 from datetime import timedelta
+from decimal import Decimal
 from apps.analytics.models import MetricaProducto, EventoUsuario
+from apps.analytics.inventario import analizar_inventario
+from apps.analytics.captura import contar
 from apps.catalogo.models import Producto
 from apps.pedidos.models import ItemPedido
 
@@ -17,6 +21,7 @@ class Command(BaseCommand):
             help='ID de un producto específico a actualizar'
         )
 
+    @en_replica(leer_lo_escrito=False)
     def handle(self, *args, **options):
         producto_id = options.get('producto_id')
         
@@ -31,6 +36,9 @@ class Command(BaseCommand):
         total = productos.count()
         self.stdout.write(f'Actualizando métricas para {total} producto(s)...\n')
         
+        # Indicadores de inventario de todos los productos en un solo cálculo
+        inventario = analizar_inventario(producto_ids=[producto_id] if producto_id else None)
+        
         ahora = timezone.now()
         hace_7_dias = ahora - timedelta(days=7)
         hace_30_dias = ahora - timedelta(days=30)
@@ -45,36 +53,36 @@ class Command(BaseCommand):
             
             # ==================== VISTAS ====================
             # Vistas totales
-            metrica.vistas_totales = EventoUsuario.objects.filter(
+            metrica.vistas_totales = contar(EventoUsuario.objects.filter(
                 tipo_evento='vista_producto',
                 producto=producto
-            ).count()
+            ))
             
             # Vistas últimos 7 días
-            metrica.vistas_ultimos_7d = EventoUsuario.objects.filter(
+            metrica.vistas_ultimos_7d = contar(EventoUsuario.objects.filter(
                 tipo_evento='vista_producto',
                 producto=producto,
                 timestamp__gte=hace_7_dias
-            ).count()
+            ))
             
             # Vistas últimos 30 días
-            metrica.vistas_ultimos_30d = EventoUsuario.objects.filter(
+            metrica.vistas_ultimos_30d = contar(EventoUsuario.objects.filter(
                 tipo_evento='vista_producto',
                 producto=producto,
                 timestamp__gte=hace_30_dias
-            ).count()
+            ))
             
             # ==================== CARRITO ====================
-            metrica.agregados_carrito = EventoUsuario.objects.filter(
+            metrica.agregados_carrito = contar(EventoUsuario.objects.filter(
                 tipo_evento='agregar_carrito',
                 producto=producto
-            ).count()
+            ))
             
             # ==================== COMPRAS ====================
             # Total de unidades vendidas
             ventas = ItemPedido.objects.filter(
                 producto=producto,
-                pedido__estado_pedido__in=['pagado', 'entregado']
+                pedido__estado__in=['pagado', 'entregado']
             ).aggregate(
                 total_unidades=Sum('cantidad'),
                 total_ingresos=Sum('subtotal')
@@ -90,8 +98,13 @@ class Command(BaseCommand):
                 metrica.tasa_conversion = 0
             
             # ==================== STOCK PROMEDIO ====================
-            # Simplificación: usar stock actual
-            metrica.stock_promedio = producto.stock
+            # Promedio ponderado en el tiempo de los snapshots diarios
+            # (sin historial todavía se usa el stock actual)
+            datos_inventario = inventario.get(producto.id)
+            if datos_inventario and datos_inventario['stock_promedio'] is not None:
+                metrica.stock_promedio = Decimal(str(datos_inventario['stock_promedio']))
+            else:
+                metrica.stock_promedio = producto.stock
             
             # Guardar
             metrica.save()
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from apps.analytics.tendencias import mantener_tendencias, reconstruir_tendencias
+
+
+class Command(BaseCommand):
+    help = 'Reescala y depura los puntajes de productos en tendencia'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reconstruir-dias',
+            type=int,
+            default=0,
+            help='Recalcular todos los puntajes desde los eventos de los últimos N días'
+        )
+
+    def handle(self, *args, **options):
+        dias = options['reconstruir_dias']
+        if dias:
+            total = reconstruir_tendencias(dias=dias)
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Tendencias reconstruidas para {total} producto(s) ({dias} días de eventos)'
+            ))
+            return
+
+        reescaladas, eliminadas = mantener_tendencias()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Tendencias al día: {reescaladas} reescalada(s), {eliminadas} eliminada(s)'
+        ))
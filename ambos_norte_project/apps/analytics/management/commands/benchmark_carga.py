@@ -0,0 +1,292 @@
+import io
+import json
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.test.utils import override_settings
+from django.utils import timezone
+import django
+from rest_framework.test import APIClient
+from apps.analytics.models import EventoUsuario
+from apps.carrito.sesion import obtener_carrito_activo
+from apps.catalogo.models import Categoria, Producto
+from apps.pedidos.models import ItemPedido, Pedido
+
+
+AGENTE = 'Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0'
+# Comandos periódicos que se miden (una corrida cada uno)
+COMANDOS = [
+    ('calcular_metricas_diarias', {}),
+    ('actualizar_metricas_productos', {}),
+    ('actualizar_tendencias', {}),
+    ('calcular_recomendaciones', {}),
+    ('calcular_pronosticos', {}),
+]
+
+
+class _ContadorConsultas:
+    def __init__(self):
+        self.consultas = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.consultas += 1
+        return execute(sql, params, many, context)
+
+
+def _percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(int(len(valores) * p), len(valores) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide los endpoints principales y los comandos periódicos sobre los datos cargados '
+        '(ver generar_datos_carga) y guarda un reporte JSON comparable entre commits'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iteraciones', type=int, default=20, help='Requests medidas por endpoint (default: 20)')
+        parser.add_argument('--calentamiento', type=int, default=2, help='Requests previas sin medir (default: 2)')
+        parser.add_argument(
+            '--salida', default='benchmark_carga.json', help='Archivo del reporte (default: benchmark_carga.json)'
+        )
+        parser.add_argument('--comparar', help='Reporte anterior contra el que comparar p50/p95')
+        parser.add_argument(
+            '--umbral', type=float, default=10.0,
+            help='Porcentaje de empeoramiento del p50 que cuenta como regresión (default: 10)'
+        )
+        parser.add_argument('--estricto', action='store_true', help='Termina con error si hay regresiones')
+        parser.add_argument('--sin-comandos', action='store_true', help='Mide solo los endpoints')
+
+    def handle(self, *args, **options):
+        anterior = self._leer_reporte(options['comparar']) if options['comparar'] else None
+
+        self.stdout.write(f'⏱️  Benchmark de carga ({options["iteraciones"]} iteraciones por endpoint)\n')
+        reporte = {
+            'commit': self._commit(),
+            'fecha': timezone.now().isoformat(),
+            'entorno': {
+                'base': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'volumen': self._volumen(),
+            'endpoints': self._medir_endpoints(options['iteraciones'], options['calentamiento']),
+            'comandos': {} if options['sin_comandos'] else self._medir_comandos(),
+        }
+
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(reporte, archivo, indent=2, sort_keys=True, default=str)
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Reporte guardado en {options["salida"]}'))
+
+        if anterior is not None:
+            regresiones = self._comparar(anterior, reporte, options['umbral'])
+            if regresiones and options['estricto']:
+                raise CommandError(f'{regresiones} regresiones sobre el {options["umbral"]:g}%')
+
+    # -- Endpoints ----------------------------------------------------------
+
+    def _casos(self, cliente):
+        """(nombre, rol, método, url, datos, escribe) de cada endpoint medido"""
+        producto = Producto.objects.filter(activo=True, stock__gte=100).order_by('id').first() or \
+            Producto.objects.filter(activo=True).order_by('id').first()
+        if producto is None:
+            raise CommandError('No hay productos activos: ejecutá generar_datos_carga primero')
+        categoria = Categoria.objects.filter(activo=True).order_by('id').first()
+        carrito = obtener_carrito_activo(cliente)
+        item = {'producto_id': producto.id, 'cantidad': 1}
+
+        return [
+            ('catalogo_lista', 'anonimo', 'get', '/api/catalogo/producto/', None, False),
+            ('catalogo_lista_categoria', 'anonimo', 'get', f'/api/catalogo/producto/?categoria={categoria.id}', None, False),
+            ('catalogo_busqueda', 'anonimo', 'get', '/api/catalogo/producto/buscar/?q=ambo', None, False),
+            ('producto_detalle', 'anonimo', 'get', f'/api/catalogo/producto/{producto.id}/', None, False),
+            ('carrito_sesion_agregar', 'anonimo', 'post', '/api/carrito/carrito-sesion/agregar_item/', item, False),
+            ('carrito_agregar', 'cliente', 'post', f'/api/carrito/carrito/{carrito.id}/agregar_item/', item, True),
+            ('checkout', 'cliente', 'post', '/api/pedidos/pedido/', {
+                'items': [{**item, 'precio_unitario': str(producto.precio)}],
+                'contacto': {'email': cliente.email or 'cliente@carga.test', 'telefono': '1100000000'},
+            }, True),
+            ('pedidos_cliente', 'cliente', 'get', '/api/pedidos/pedido/', None, False),
+            ('pedidos_staff', 'staff', 'get', '/api/pedidos/pedido/', None, False),
+            ('dashboard_ventas', 'staff', 'get', '/dashboard/ventas/', None, False),
+            ('dashboard_inventario', 'staff', 'get', '/dashboard/inventario/', None, False),
+            ('embudo_conversion', 'staff', 'get', '/api/analytics/reportes/embudo_conversion/', None, False),
+        ]
+
+    def _clientes(self, staff, cliente):
+        clientes = {}
+        for rol, usuario in (('anonimo', None), ('cliente', cliente), ('staff', staff)):
+            # Una vista que falla queda en el reporte con su código y el resto sigue
+            cliente_api = APIClient(raise_request_exception=False, HTTP_USER_AGENT=AGENTE)
+            if usuario is not None:
+                cliente_api.force_authenticate(usuario)
+                cliente_api.force_login(usuario)
+            clientes[rol] = cliente_api
+        return clientes
+
+    def _usuarios(self):
+        Usuario = get_user_model()
+        staff = Usuario.objects.filter(is_staff=True, is_active=True).order_by('id').first()
+        if staff is None:
+            staff, _ = Usuario.objects.get_or_create(
+                username='benchmark_staff', defaults={'is_staff': True, 'tipo_usuario': 'administrador'}
+            )
+        # El cliente con más pedidos sería el caso más caro, pero buscarlo recorre pedidos: alcanza con uno que tenga
+        pedido = Pedido.objects.filter(usuario__isnull=False, usuario__is_staff=False).order_by('-id').first()
+        cliente = pedido.usuario if pedido else Usuario.objects.get_or_create(username='benchmark_cliente')[0]
+        return staff, cliente
+
+    def _medir_endpoints(self, iteraciones, calentamiento):
+        resultados = {}
+        contador = _ContadorConsultas()
+        with ExitStack() as pila:
+            pila.enter_context(override_settings(ALLOWED_HOSTS=['testserver', *settings.ALLOWED_HOSTS]))
+            staff, cliente = self._usuarios()
+            clientes = self._clientes(staff, cliente)
+            casos = self._casos(cliente)
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(contador))
+
+            for nombre, rol, metodo, url, datos, escribe in casos:
+                cliente_api = clientes[rol]
+                tiempos = []
+                consultas = []
+                codigos = {}
+                for iteracion in range(calentamiento + iteraciones):
+                    antes = contador.consultas
+                    inicio = time.perf_counter()
+                    if escribe:
+                        # Las escrituras se descartan: cada corrida mide sobre los mismos datos
+                        with transaction.atomic():
+                            respuesta = getattr(cliente_api, metodo)(url, datos, format='json')
+                            transaction.set_rollback(True)
+                    else:
+                        respuesta = getattr(cliente_api, metodo)(url, datos, format='json')
+                    duracion = time.perf_counter() - inicio
+                    if iteracion < calentamiento:
+                        continue
+                    tiempos.append(duracion * 1000)
+                    consultas.append(contador.consultas - antes)
+                    codigos[respuesta.status_code] = codigos.get(respuesta.status_code, 0) + 1
+
+                resultado = {
+                    'metodo': metodo.upper(),
+                    'url': url,
+                    'rol': rol,
+                    'iteraciones': len(tiempos),
+                    'codigos': {str(codigo): cantidad for codigo, cantidad in sorted(codigos.items())},
+                    'consultas': int(statistics.median(consultas)),
+                    'min_ms': round(min(tiempos), 2),
+                    'p50_ms': round(statistics.median(tiempos), 2),
+                    'p95_ms': round(_percentil(tiempos, 0.95), 2),
+                    'max_ms': round(max(tiempos), 2),
+                    'media_ms': round(statistics.fmean(tiempos), 2),
+                }
+                resultados[nombre] = resultado
+                errores = sum(cantidad for codigo, cantidad in codigos.items() if codigo >= 400)
+                marca = '⚠️ ' if errores else '✅'
+                self.stdout.write(
+                    f'{marca} {nombre:<26} p50 {resultado["p50_ms"]:9.1f} ms | p95 {resultado["p95_ms"]:9.1f} ms | '
+                    f'{resultado["consultas"]:>3} consultas' + (f' | {errores} errores {resultado["codigos"]}' if errores else '')
+                )
+        return resultados
+
+    # -- Comandos -----------------------------------------------------------
+
+    def _medir_comandos(self):
+        self.stdout.write('')
+        resultados = {}
+        contador = _ContadorConsultas()
+        for nombre, argumentos in COMANDOS:
+            with ExitStack() as pila:
+                for conexion in connections.all():
+                    pila.enter_context(conexion.execute_wrapper(contador))
+                antes = contador.consultas
+                inicio = time.perf_counter()
+                error = None
+                try:
+                    call_command(nombre, stdout=io.StringIO(), stderr=io.StringIO(), **argumentos)
+                except Exception as e:
+                    error = f'{type(e).__name__}: {e}'
+                duracion = time.perf_counter() - inicio
+
+            resultados[nombre] = {
+                'segundos': round(duracion, 3),
+                'consultas': contador.consultas - antes,
+                'error': error,
+            }
+            if error:
+                self.stdout.write(self.style.ERROR(f'❌ {nombre:<30} {error}'))
+            else:
+                self.stdout.write(
+                    f'✅ {nombre:<30} {duracion:9.2f} s | {resultados[nombre]["consultas"]:>7} consultas'
+                )
+        return resultados
+
+    # -- Reporte ------------------------------------------------------------
+
+    def _volumen(self):
+        """Filas aproximadas (id máximo: un COUNT(*) sobre decenas de millones tarda)"""
+        return {
+            modelo._meta.db_table: modelo.objects.aggregate(maximo=Max('pk'))['maximo'] or 0
+            for modelo in (Producto, get_user_model(), Pedido, ItemPedido, EventoUsuario)
+        }
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ''
+
+    def _leer_reporte(self, ruta):
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                return json.load(archivo)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'No se pudo leer el reporte {ruta}: {e}')
+
+    def _comparar(self, anterior, actual, umbral):
+        """Imprime la variación del p50 por endpoint y del tiempo por comando; devuelve las regresiones"""
+        self.stdout.write(f'\n📊 Comparación con {anterior.get("commit") or "reporte anterior"} (umbral {umbral:g}%)')
+        # Las vistas registran eventos, así que el volumen crece un poco en cada corrida
+        volumen_anterior = anterior.get('volumen', {})
+        if any(
+            abs(filas - volumen_anterior.get(tabla, 0)) > filas * 0.01 for tabla, filas in actual['volumen'].items()
+        ):
+            self.stdout.write(self.style.WARNING('⚠️  El volumen de datos no es el mismo: la comparación es orientativa'))
+
+        filas = [
+            (nombre, datos['p50_ms'], anterior.get('endpoints', {}).get(nombre, {}).get('p50_ms'), 'ms')
+            for nombre, datos in actual['endpoints'].items()
+        ] + [
+            (nombre, datos['segundos'], anterior.get('comandos', {}).get(nombre, {}).get('segundos'), 's')
+            for nombre, datos in actual['comandos'].items() if not datos['error']
+        ]
+
+        regresiones = 0
+        for nombre, ahora, antes, unidad in filas:
+            if not antes:
+                self.stdout.write(f'  {nombre:<30} {ahora:10.2f} {unidad} (nuevo)')
+                continue
+            variacion = (ahora - antes) / antes * 100
+            if variacion > umbral:
+                regresiones += 1
+                marca = self.style.ERROR('🔺 regresión')
+            elif variacion < -umbral:
+                marca = self.style.SUCCESS('🔻 mejora')
+            else:
+                marca = ''
+            self.stdout.write(f'  {nombre:<30} {antes:10.2f} → {ahora:10.2f} {unidad} ({variacion:+6.1f}%) {marca}')
+        return regresiones
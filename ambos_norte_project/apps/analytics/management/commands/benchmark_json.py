@@ -0,0 +1,82 @@
+import io
+import json
+import time
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from ambos_norte import renderers
+from ambos_norte.serializacion_rapida import Contexto
+from apps.analytics.models import EventoUsuario, MetricaDiaria, MetricaProducto
+from apps.analytics.serializers import EVENTO_USUARIO_RAPIDO
+from apps.catalogo.models import Producto
+from apps.catalogo.serializers import PRODUCTO_LISTA_RAPIDO
+from apps.usuarios.serializer import datos_usuarios_rapido
+
+
+class Command(BaseCommand):
+    help = 'Compara el renderer/parser JSON de DRF con los de orjson (ambos_norte/renderers.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=2000, help='Filas por payload (default: 2000)')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Se informa el mejor tiempo (default: 5)')
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stdout.write(self.style.WARNING(
+                '⚠️  orjson no está instalado: los renderers rápidos usan el JSON de DRF'
+            ))
+
+        limite = options['limite']
+        repeticiones = options['repeticiones']
+        contexto = Contexto(RequestFactory().get('/'))
+
+        eventos = list(EVENTO_USUARIO_RAPIDO.valores(EventoUsuario.objects.all()[:limite]))
+        contexto.datos.update(datos_usuarios_rapido({fila['usuario'] for fila in eventos if fila['usuario']}))
+        payloads = [
+            ('eventos', EVENTO_USUARIO_RAPIDO.serializar(eventos, contexto)),
+            ('productos', PRODUCTO_LISTA_RAPIDO.serializar(
+                PRODUCTO_LISTA_RAPIDO.valores(Producto.objects.all()[:limite]), contexto
+            )),
+            # Valores crudos (Decimal, date, datetime), como las series de los reportes
+            ('metricas_productos', list(MetricaProducto.objects.values()[:limite])),
+            ('metricas_diarias', list(MetricaDiaria.objects.values()[:limite])),
+        ]
+
+        self.stdout.write(f'📊 Benchmark JSON (hasta {limite} filas, mejor de {repeticiones})\n')
+        for nombre, data in payloads:
+            if not data:
+                self.stdout.write(self.style.WARNING(f'⚠️  {nombre}: sin datos'))
+                continue
+
+            render_drf, contenido_drf = self._medir(lambda: JSONRenderer().render(data), repeticiones)
+            render_rapido, contenido_rapido = self._medir(
+                lambda: renderers.RenderizadorJSONRapido().render(data), repeticiones
+            )
+            parse_drf, datos_drf = self._medir(
+                lambda: JSONParser().parse(io.BytesIO(contenido_drf)), repeticiones
+            )
+            parse_rapido, datos_rapido = self._medir(
+                lambda: renderers.ParserJSONRapido().parse(io.BytesIO(contenido_drf)), repeticiones
+            )
+
+            if json.loads(contenido_drf) != json.loads(contenido_rapido) or datos_drf != datos_rapido:
+                self.stdout.write(self.style.ERROR(f'❌ {nombre}: el JSON no coincide con el de DRF'))
+
+            self.stdout.write(
+                f'  {nombre:<20} {len(data):>6} filas {len(contenido_drf) / 1024:8.0f} KB | '
+                f'render {render_drf * 1000:7.1f} -> {render_rapido * 1000:6.1f} ms '
+                f'(x{render_drf / max(render_rapido, 1e-9):.1f}) | '
+                f'parse {parse_drf * 1000:7.1f} -> {parse_rapido * 1000:6.1f} ms '
+                f'(x{parse_drf / max(parse_rapido, 1e-9):.1f})'
+            )
+        self.stdout.write(self.style.SUCCESS('\n✅ Benchmark completado'))
+
+    def _medir(self, funcion, repeticiones):
+        mejor = None
+        for _ in range(max(repeticiones, 1)):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        return mejor, resultado
@@ -0,0 +1,106 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, DecimalField, ExpressionWrapper, F
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from ambos_norte.serializacion_rapida import Contexto
+from apps.analytics.models import EventoUsuario
+from apps.analytics.serializers import EventoUsuarioSerializer, EVENTO_USUARIO_RAPIDO
+from apps.catalogo.models import Producto
+from apps.catalogo.serializers import ProductoListSerializer, PRODUCTO_LISTA_RAPIDO
+from apps.pedidos.models import Pedido
+from apps.pedidos.serializers import PedidoListaSerializer, PEDIDO_LISTA_RAPIDO
+from apps.usuarios.serializer import datos_usuarios_rapido
+
+
+def _datos_eventos(filas):
+    return datos_usuarios_rapido({fila['usuario'] for fila in filas if fila['usuario']})
+
+
+class Command(BaseCommand):
+    help = 'Compara los serializers de DRF con la serialización rápida (values()) en los listados principales'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=500, help='Filas por listado (default: 500)')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Se informa el mejor tiempo (default: 5)')
+
+    def handle(self, *args, **options):
+        limite = options['limite']
+        repeticiones = options['repeticiones']
+        request = RequestFactory().get('/')
+
+        # Mismos querysets que usan los listados de cada ViewSet
+        casos = [
+            (
+                'productos',
+                Producto.objects.select_related('categoria').order_by('id')[:limite],
+                ProductoListSerializer, PRODUCTO_LISTA_RAPIDO, None,
+            ),
+            (
+                'eventos',
+                EventoUsuario.objects.select_related(
+                    'usuario', 'producto', 'categoria', 'pedido', 'sesion', 'agente'
+                )[:limite],
+                EventoUsuarioSerializer, EVENTO_USUARIO_RAPIDO, _datos_eventos,
+            ),
+            (
+                'pedidos',
+                Pedido.objects.select_related('usuario').annotate(
+                    total_items=Count('items'),
+                    costo_envio=ExpressionWrapper(F('total') - F('subtotal'), output_field=DecimalField())
+                )[:limite],
+                PedidoListaSerializer, PEDIDO_LISTA_RAPIDO, None,
+            ),
+        ]
+
+        self.stdout.write(f'📊 Benchmark de serialización ({limite} filas, mejor de {repeticiones})\n')
+        for nombre, queryset, serializer_class, esquema, cargar_datos in casos:
+
+            def drf():
+                return serializer_class(list(queryset.all()), many=True, context={'request': request}).data
+
+            def rapida():
+                filas = list(esquema.valores(queryset))
+                datos = cargar_datos(filas) if cargar_datos else {}
+                return esquema.serializar(filas, Contexto(request, **datos))
+
+            tiempo_drf, consultas_drf, salida_drf = self._medir(drf, repeticiones)
+            tiempo_rapida, consultas_rapida, salida_rapida = self._medir(rapida, repeticiones)
+
+            if not salida_drf:
+                self.stdout.write(self.style.WARNING(f'⚠️  {nombre}: sin datos'))
+                continue
+
+            diferencia = self._diferencia(salida_drf, salida_rapida)
+            if diferencia:
+                self.stdout.write(self.style.ERROR(f'❌ {nombre}: la salida no coincide ({diferencia})'))
+            self.stdout.write(
+                f'  {nombre:<10} {len(salida_drf):>6} filas | '
+                f'DRF {tiempo_drf * 1000:8.1f} ms ({consultas_drf} consultas) | '
+                f'rápida {tiempo_rapida * 1000:8.1f} ms ({consultas_rapida} consultas) | '
+                f'x{tiempo_drf / max(tiempo_rapida, 1e-9):.1f}'
+            )
+        self.stdout.write(self.style.SUCCESS('\n✅ Benchmark completado'))
+
+    def _medir(self, funcion, repeticiones):
+        mejor = None
+        for _ in range(max(repeticiones, 1)):
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                salida = funcion()
+                duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        return mejor, len(consultas), salida
+
+    def _diferencia(self, esperada, obtenida):
+        """Primera diferencia entre las dos salidas, o None si son iguales"""
+        if len(esperada) != len(obtenida):
+            return f'{len(esperada)} filas vs {len(obtenida)}'
+        for posicion, (fila_drf, fila_rapida) in enumerate(zip(esperada, obtenida)):
+            if list(fila_drf) != list(fila_rapida):
+                return f'fila {posicion}: claves {list(fila_drf)} vs {list(fila_rapida)}'
+            for clave in fila_drf:
+                if fila_drf[clave] != fila_rapida[clave]:
+                    return f'fila {posicion}, {clave}: {fila_drf[clave]!r} vs {fila_rapida[clave]!r}'
+        return None
@@ -1,9 +1,11 @@
 from django.core.management.base import BaseCommand
+from ambos_norte.routers import en_replica
 from django.utils import timezone
 from django.db.models import Sum, Count, Avg, F
 from datetime import date, timedelta
 from apps.analytics.models import MetricaDiaria, EventoUsuario
-from apps.pedidos.models import Pedido
+from apps.analytics.captura import contar_distintos, contar_por_tipo
+from apps.pedidos.models import Pedido, ItemPedido
 from apps.carrito.models import Carrito
 from apps.usuarios.models import Usuario
 from apps.catalogo.models import Producto
@@ -19,6 +21,7 @@ class Command(BaseCommand):
             help='Fecha para calcular métricas (formato: YYYY-MM-DD). Por defecto: ayer'
         )
 
+    @en_replica(leer_lo_escrito=False)
     def handle(self, *args, **options):
         # Determinar fecha a procesar
         if options['fecha']:
@@ -80,22 +83,13 @@ class Command(BaseCommand):
             fecha_registro__lte=fin_dia
         ).count()
         
-        # Usuarios activos (que generaron al menos un evento)
-        usuarios_activos = EventoUsuario.objects.filter(
-            timestamp__gte=inicio_dia,
-            timestamp__lte=fin_dia,
-            usuario__isnull=False
-        ).values('usuario').distinct().count()
-        
-        metrica.usuarios_activos = usuarios_activos
-        
-        # Sesiones totales (sessions únicas)
-        sesiones = EventoUsuario.objects.filter(
+        # Usuarios activos y sesiones (distintos, ponderados por el muestreo)
+        eventos_del_dia = EventoUsuario.objects.filter(
             timestamp__gte=inicio_dia,
             timestamp__lte=fin_dia
-        ).values('session_id').distinct().count()
-        
-        metrica.sesiones_totales = sesiones
+        )
+        metrica.usuarios_activos = contar_distintos(eventos_del_dia, 'usuario')
+        metrica.sesiones_totales = contar_distintos(eventos_del_dia, 'sesion')
         
         # ==================== CONVERSIÓN ====================
         carritos_del_dia = Carrito.objects.filter(
@@ -124,17 +118,13 @@ class Command(BaseCommand):
             metrica.tasa_abandono = 0
         
         # Tasa de conversión (visitas a compras)
-        vistas = EventoUsuario.objects.filter(
-            timestamp__gte=inicio_dia,
-            timestamp__lte=fin_dia,
-            tipo_evento='vista_producto'
-        ).count()
-        
-        compras = EventoUsuario.objects.filter(
-            timestamp__gte=inicio_dia,
-            timestamp__lte=fin_dia,
-            tipo_evento='compra_completada'
-        ).count()
+        # Suma de pesos: cada evento muestreado representa a varios (ver captura.py)
+        conteo = contar_por_tipo(
+            EventoUsuario.objects.filter(timestamp__gte=inicio_dia, timestamp__lte=fin_dia),
+            ['vista_producto', 'compra_completada']
+        )
+        vistas = conteo['vista_producto']
+        compras = conteo['compra_completada']
         
         if vistas > 0:
             metrica.tasa_conversion = (compras / vistas) * 100
@@ -143,8 +133,6 @@ class Command(BaseCommand):
         
         # ==================== PRODUCTOS ====================
         # Total de productos vendidos (unidades)
-from apps.pedidos.models import ItemPedido
-        
         items_vendidos = ItemPedido.objects.filter(
             pedido__in=pedidos_del_dia,
             pedido__estado_pedido__in=['pagado', 'entregado']
@@ -0,0 +1,43 @@
+import time
+from collections import Counter
+from django.core.management.base import BaseCommand
+from ambos_norte.routers import en_replica
+from apps.analytics.pronostico import calcular_pronosticos, HISTORIA_DIAS, LEAD_TIME_DIAS
+
+
+class Command(BaseCommand):
+    help = 'Calcula pronósticos de demanda, puntos de reorden y fechas de quiebre de stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=HISTORIA_DIAS,
+            help=f'Días de historial de ventas a usar (default: {HISTORIA_DIAS})'
+        )
+        parser.add_argument(
+            '--lead-time',
+            type=int,
+            default=LEAD_TIME_DIAS,
+            help=f'Días que tarda una reposición (default: {LEAD_TIME_DIAS})'
+        )
+
+    @en_replica(leer_lo_escrito=False)
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        pronosticos = calcular_pronosticos(dias=options['dias'], lead_time=options['lead_time'])
+        duracion = time.monotonic() - inicio
+
+        if not pronosticos:
+            self.stdout.write(self.style.WARNING('⚠️  No hay productos activos'))
+            return
+
+        metodos = Counter(pronostico.metodo for pronostico in pronosticos)
+        con_quiebre = sum(1 for pronostico in pronosticos if pronostico.fecha_quiebre)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {len(pronosticos)} pronóstico(s) calculados en {duracion:.2f}s'
+        ))
+        for metodo, cantidad in metodos.most_common():
+            self.stdout.write(f'  📈 {metodo}: {cantidad}')
+        self.stdout.write(f'  ⏳ Con quiebre estimado en el horizonte: {con_quiebre}')
@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from ambos_norte.routers import en_replica
+from apps.analytics.recomendaciones import calcular_recomendaciones, RECOMENDACIONES_POR_PRODUCTO
+
+
+class Command(BaseCommand):
+    help = 'Calcula los productos relacionados ("los clientes también compraron") a partir de pedidos y sesiones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limite',
+            type=int,
+            default=RECOMENDACIONES_POR_PRODUCTO,
+            help=f'Recomendaciones a guardar por producto (default: {RECOMENDACIONES_POR_PRODUCTO})'
+        )
+
+    @en_replica(leer_lo_escrito=False)
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        recomendaciones = calcular_recomendaciones(limite=options['limite'])
+        duracion = time.monotonic() - inicio
+
+        if not recomendaciones:
+            self.stdout.write(self.style.WARNING('⚠️  No hay suficientes pedidos ni sesiones para recomendar'))
+            return
+
+        total = sum(len(vecinos) for vecinos in recomendaciones.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {total} recomendación(es) para {len(recomendaciones)} producto(s) en {duracion:.2f}s'
+        ))
@@ -0,0 +1,349 @@
+import random
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from apps.analytics.models import AgenteUsuario, EventoUsuario, SesionVisitante
+from apps.catalogo.models import Categoria, Producto
+from apps.pedidos.models import ItemPedido, Pedido
+from apps.usuarios.models import Usuario
+
+
+# Volúmenes con --escala 1
+PRODUCTOS = 100_000
+USUARIOS = 1_000_000
+PEDIDOS = 5_000_000
+EVENTOS = 50_000_000
+EVENTOS_POR_SESION = 15
+
+PRENDAS = ['Ambo', 'Chaqueta', 'Pantalón', 'Casaca', 'Cofia', 'Bata', 'Chaleco', 'Zueco', 'Barbijo', 'Delantal']
+LINEAS = ['Clásica', 'Premium', 'Stretch', 'Antifluido', 'Cirugía', 'Pediatría']
+COLORES = ['Azul', 'Celeste', 'Verde', 'Bordó', 'Negro', 'Blanco', 'Gris', 'Lila', 'Rosa', 'Turquesa']
+TALLAS = ['XS', 'S', 'M', 'L', 'XL', 'XXL']
+MATERIALES = ['Algodón', 'Poliéster', 'Gabardina', 'Spandex', 'Microfibra']
+BUSQUEDAS = [f'{prenda} {color}'.lower() for prenda in PRENDAS for color in COLORES] + [p.lower() for p in PRENDAS]
+
+TIPOS_EVENTO = ['vista_producto', 'agregar_carrito', 'remover_carrito', 'inicio_checkout', 'compra_completada', 'busqueda']
+PESOS_TIPO_EVENTO = [62, 14, 3, 7, 4, 10]
+ESTADOS_PEDIDO = ['pendiente', 'pagado', 'en_preparacion', 'enviado', 'entregado', 'cancelado']
+PESOS_ESTADO_PEDIDO = [8, 10, 5, 10, 60, 7]
+PESOS_ITEMS_PEDIDO = [60, 25, 10, 5]  # 1, 2, 3 o 4 productos distintos
+
+AGENTES = [
+    ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36', 35),
+    ('Mozilla/5.0 (Linux; Android 14; SM-A546B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Mobile Safari/537.36', 30),
+    ('Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Mobile/15E148 Safari/604.1', 20),
+    ('Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Safari/605.1.15', 6),
+    ('Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) Gecko/20100101 Firefox/128.0', 5),
+    ('Mozilla/5.0 (iPad; CPU OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Mobile/15E148 Safari/604.1', 4),
+]
+
+
+class LeyPotencia:
+    """
+    Elige ids con popularidad de ley de potencia (Zipf): el de rango r
+    tiene peso 1 / r^exponente. Los rangos se asignan al azar para que la
+    popularidad no dependa del orden de creación.
+    """
+
+    def __init__(self, ids, exponente, rng):
+        self.ids = array('q', ids)
+        rng.shuffle(self.ids)
+        self.acumulados = list(accumulate(1 / (rango ** exponente) for rango in range(1, len(self.ids) + 1)))
+        self.rng = rng
+
+    def elegir(self, cantidad):
+        return self.rng.choices(self.ids, cum_weights=self.acumulados, k=cantidad)
+
+
+@contextmanager
+def _fechas_manuales(*campos):
+    """Desactiva auto_now/auto_now_add para poder cargar fechas históricas con bulk_create"""
+    originales = [(campo, campo.auto_now, campo.auto_now_add) for campo in campos]
+    try:
+        for campo in campos:
+            campo.auto_now = campo.auto_now_add = False
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in originales:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+def _campo(modelo, nombre):
+    return modelo._meta.get_field(nombre)
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera datos sintéticos a escala para pruebas de carga (bulk_create por lotes, '
+        'popularidad de productos y usuarios con ley de potencia)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--escala', type=float, default=1.0,
+            help=f'Multiplica los volúmenes ({PRODUCTOS:,} productos, {USUARIOS:,} usuarios, '
+                 f'{PEDIDOS:,} pedidos, {EVENTOS:,} eventos con escala 1)'
+        )
+        parser.add_argument('--productos', type=int, help='Cantidad de productos (ignora --escala)')
+        parser.add_argument('--usuarios', type=int, help='Cantidad de usuarios (ignora --escala)')
+        parser.add_argument('--pedidos', type=int, help='Cantidad de pedidos (ignora --escala)')
+        parser.add_argument('--eventos', type=int, help='Cantidad de eventos (ignora --escala)')
+        parser.add_argument('--categorias', type=int, default=40, help='Categorías (default: 40)')
+        parser.add_argument('--dias', type=int, default=365, help='Días de historia (default: 365)')
+        parser.add_argument(
+            '--exponente', type=float, default=1.1,
+            help='Exponente de la ley de potencia de popularidad (default: 1.1)'
+        )
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por INSERT y por transacción (default: 5000)')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla para repetir la misma carga (default: 42)')
+
+    def handle(self, *args, **options):
+        escala = options['escala']
+        volumen = {
+            nombre: options[nombre] if options[nombre] is not None else int(base * escala)
+            for nombre, base in (
+                ('productos', PRODUCTOS), ('usuarios', USUARIOS), ('pedidos', PEDIDOS), ('eventos', EVENTOS)
+            )
+        }
+        self.rng = random.Random(options['semilla'])
+        self.lote = max(options['lote'], 1)
+        self.dias = max(options['dias'], 1)
+        self.ahora = timezone.now()
+        # Prefijo de la corrida: usuarios y números de pedido no chocan con cargas anteriores
+        self.corrida = self.ahora.strftime('%y%m%d%H%M%S')
+
+        self.stdout.write(
+            f'🏭 Generando carga: {volumen["productos"]:,} productos, {volumen["usuarios"]:,} usuarios, '
+            f'{volumen["pedidos"]:,} pedidos, {volumen["eventos"]:,} eventos ({self.dias} días)\n'
+        )
+        inicio = time.perf_counter()
+
+        categorias = self._crear_categorias(options['categorias'])
+        productos = self._crear_productos(volumen['productos'], categorias)
+        if not productos:
+            self.stdout.write(self.style.ERROR('❌ No hay productos para generar pedidos ni eventos'))
+            return
+        usuarios = self._crear_usuarios(volumen['usuarios'])
+
+        populares = LeyPotencia(productos.keys(), options['exponente'], self.rng)
+        activos = LeyPotencia(usuarios, options['exponente'], self.rng) if usuarios else None
+        self._crear_pedidos(volumen['pedidos'], productos, populares, activos)
+        self._crear_eventos(volumen['eventos'], productos, populares, activos)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Carga generada en {timedelta(seconds=int(time.perf_counter() - inicio))}'
+        ))
+        self.stdout.write('\nAhora ejecuta:')
+        self.stdout.write(f'  python manage.py actualizar_tendencias --reconstruir-dias {min(self.dias, 30)}')
+        self.stdout.write('  python manage.py actualizar_metricas_productos')
+        self.stdout.write('  python manage.py benchmark_carga')
+
+    # -- Etapas -------------------------------------------------------------
+
+    def _crear_categorias(self, cantidad):
+        nombres = [f'{prenda}s {linea}' for linea in LINEAS for prenda in PRENDAS][:cantidad]
+        Categoria.objects.bulk_create(
+            [Categoria(nombre=nombre, descripcion=f'{nombre} (datos de carga)') for nombre in nombres],
+            ignore_conflicts=True
+        )
+        categorias = list(Categoria.objects.filter(nombre__in=nombres).values_list('id', flat=True))
+        self.stdout.write(f'  📁 {len(categorias)} categorías')
+        return categorias
+
+    def _crear_productos(self, total, categorias):
+        """{id: (categoria_id, precio)} de todos los productos (los pedidos y eventos usan también los existentes)"""
+        rng = self.rng
+
+        def crear(inicio, cantidad):
+            productos = []
+            for numero in range(inicio, inicio + cantidad):
+                prenda, color, talla = rng.choice(PRENDAS), rng.choice(COLORES), rng.choice(TALLAS)
+                fecha = self._fecha_al_azar()
+                productos.append(Producto(
+                    categoria_id=rng.choice(categorias),
+                    nombre=f'{prenda} {rng.choice(LINEAS)} {color} {talla} #{numero + 1}',
+                    descripcion=f'{prenda} de {rng.choice(MATERIALES).lower()} color {color.lower()}',
+                    precio=Decimal(round(rng.lognormvariate(10, 0.5), -1)).quantize(Decimal('0.01')),
+                    stock=0 if rng.random() < 0.05 else rng.randint(1, 500),
+                    talla=talla,
+                    color=color,
+                    material=rng.choice(MATERIALES),
+                    activo=rng.random() < 0.95,
+                    destacado=rng.random() < 0.02,
+                    fecha_creacion=fecha,
+                    fecha_modificacion=fecha,
+                ))
+            Producto.objects.bulk_create(productos)
+
+        with _fechas_manuales(_campo(Producto, 'fecha_creacion'), _campo(Producto, 'fecha_modificacion')):
+            self._en_lotes('🧥 productos', total, crear)
+        return {
+            producto_id: (categoria_id, precio)
+            for producto_id, categoria_id, precio in Producto.objects.order_by('id').values_list(
+                'id', 'categoria_id', 'precio'
+            ).iterator(chunk_size=self.lote)
+        }
+
+    def _crear_usuarios(self, total):
+        """Ids de todos los clientes (los creados y los existentes)"""
+        # Sin contraseña utilizable (un solo hash: hashear por usuario tardaría horas)
+        password = make_password(None)
+        rng = self.rng
+
+        def crear(inicio, cantidad):
+            usuarios = []
+            for numero in range(inicio, inicio + cantidad):
+                fecha = self._fecha_al_azar()
+                usuarios.append(Usuario(
+                    username=f'carga_{self.corrida}_{numero}',
+                    email=f'carga_{self.corrida}_{numero}@carga.test',
+                    password=password,
+                    first_name=rng.choice(['Ana', 'Juan', 'Lucía', 'Martín', 'Sofía', 'Diego', 'Valentina', 'Pablo']),
+                    last_name=rng.choice(['Gómez', 'Fernández', 'López', 'Díaz', 'Pérez', 'Romero', 'Sosa', 'Torres']),
+                    date_joined=fecha,
+                    fecha_registro=fecha,
+                ))
+            Usuario.objects.bulk_create(usuarios)
+
+        with _fechas_manuales(_campo(Usuario, 'fecha_registro')):
+            self._en_lotes('👤 usuarios', total, crear)
+        return array('q', Usuario.objects.filter(is_staff=False).order_by('id').values_list(
+            'id', flat=True
+        ).iterator(chunk_size=self.lote))
+
+    def _crear_pedidos(self, total, productos, populares, activos):
+        rng = self.rng
+        campos_fecha = (_campo(Pedido, 'fecha_pedido'), _campo(Pedido, 'fecha_actualizacion'))
+
+        def crear(inicio, cantidad):
+            pedidos = []
+            detalles = {}
+            usuarios = activos.elegir(cantidad) if activos else [None] * cantidad
+            for numero, usuario_id in zip(range(inicio, inicio + cantidad), usuarios):
+                numero_pedido = f'CG{self.corrida}{numero:09d}'
+                items = []
+                subtotal = Decimal('0.00')
+                for producto_id in set(populares.elegir(rng.choices((1, 2, 3, 4), PESOS_ITEMS_PEDIDO)[0])):
+                    precio = productos[producto_id][1]
+                    cantidad_item = rng.choices((1, 2, 3), (80, 15, 5))[0]
+                    items.append((producto_id, cantidad_item, precio))
+                    subtotal += precio * cantidad_item
+                detalles[numero_pedido] = items
+                envio = Decimal(rng.choice((0, 0, 2500, 4500)))
+                fecha = self._fecha_al_azar()
+                pedidos.append(Pedido(
+                    numero_pedido=numero_pedido,
+                    usuario_id=usuario_id,
+                    email_contacto=f'cliente{usuario_id or numero}@carga.test',
+                    telefono_contacto='1100000000',
+                    subtotal=subtotal,
+                    total=subtotal + envio,
+                    estado=rng.choices(ESTADOS_PEDIDO, PESOS_ESTADO_PEDIDO)[0],
+                    activo=rng.random() < 0.98,
+                    fecha_pedido=fecha,
+                    fecha_actualizacion=fecha,
+                ))
+            Pedido.objects.bulk_create(pedidos)
+
+            # MySQL no devuelve los ids de bulk_create: se buscan por número (indexado)
+            ids = dict(Pedido.objects.filter(numero_pedido__in=detalles).values_list('numero_pedido', 'id'))
+            ItemPedido.objects.bulk_create([
+                ItemPedido(
+                    pedido_id=ids[numero_pedido],
+                    producto_id=producto_id,
+                    nombre_producto=f'Producto {producto_id}',
+                    cantidad=cantidad_item,
+                    precio_unitario=precio,
+                    subtotal=precio * cantidad_item,
+                )
+                for numero_pedido, items in detalles.items()
+                for producto_id, cantidad_item, precio in items
+            ], batch_size=self.lote)
+
+        with _fechas_manuales(*campos_fecha):
+            self._en_lotes('📦 pedidos', total, crear)
+
+    def _crear_eventos(self, total, productos, populares, activos):
+        if not total:
+            return
+        rng = self.rng
+        agentes = [AgenteUsuario.id_para(user_agent) for user_agent, _ in AGENTES]
+        pesos_agentes = [peso for _, peso in AGENTES]
+        sesiones = self._crear_sesiones(max(total // EVENTOS_POR_SESION, 1))
+
+        def crear(inicio, cantidad):
+            # Sorteos por lote (mucho más rápidos que uno por evento)
+            tipos = rng.choices(TIPOS_EVENTO, PESOS_TIPO_EVENTO, k=cantidad)
+            elegidos = populares.elegir(cantidad)
+            usuarios = activos.elegir(cantidad) if activos else [None] * cantidad
+            # 30% de los eventos son de visitantes anónimos
+            anonimos = rng.choices((False, True), (70, 30), k=cantidad)
+            elegidas = rng.choices(sesiones, k=cantidad)
+            navegadores = rng.choices(agentes, pesos_agentes, k=cantidad)
+            eventos = []
+            for tipo, producto_id, usuario_id, anonimo, sesion_id, agente_id in zip(
+                tipos, elegidos, usuarios, anonimos, elegidas, navegadores
+            ):
+                evento = EventoUsuario(
+                    tipo_evento=tipo,
+                    usuario_id=None if anonimo else usuario_id,
+                    sesion_id=sesion_id,
+                    agente_id=agente_id,
+                    timestamp=self._fecha_al_azar(),
+                )
+                if tipo == 'busqueda':
+                    evento.metadata = {'query': rng.choice(BUSQUEDAS), 'resultados': rng.randint(0, 60)}
+                else:
+                    categoria_id, precio = productos[producto_id]
+                    evento.producto_id = producto_id
+                    evento.categoria_id = categoria_id
+                    if tipo == 'compra_completada':
+                        evento.valor_monetario = precio
+                eventos.append(evento)
+            EventoUsuario.objects.bulk_create(eventos)
+
+        self._en_lotes('📈 eventos', total, crear)
+
+    def _crear_sesiones(self, total):
+        desde = self._ultimo_id(SesionVisitante)
+
+        def crear(inicio, cantidad):
+            SesionVisitante.objects.bulk_create([
+                SesionVisitante(clave=f'carga-{self.corrida}-{numero}', creada=self.ahora)
+                for numero in range(inicio, inicio + cantidad)
+            ])
+
+        self._en_lotes('🔑 sesiones', total, crear)
+        return array('q', SesionVisitante.objects.filter(id__gt=desde).order_by('id').values_list(
+            'id', flat=True
+        ).iterator(chunk_size=self.lote))
+
+    # -- Utilidades ---------------------------------------------------------
+
+    def _en_lotes(self, etiqueta, total, crear):
+        """Llama crear(inicio, cantidad) por lotes, cada uno en su transacción, informando el avance"""
+        if total <= 0:
+            return
+        inicio_etapa = time.perf_counter()
+        siguiente_aviso = 0.1
+        for inicio in range(0, total, self.lote):
+            with transaction.atomic():
+                crear(inicio, min(self.lote, total - inicio))
+            hechos = min(inicio + self.lote, total)
+            if hechos / total >= siguiente_aviso or hechos == total:
+                siguiente_aviso = hechos / total + 0.1
+                ritmo = hechos / max(time.perf_counter() - inicio_etapa, 1e-9)
+                self.stdout.write(f'  {etiqueta}: {hechos:,}/{total:,} ({ritmo:,.0f} filas/s)')
+
+    def _fecha_al_azar(self):
+        return self.ahora - timedelta(seconds=self.rng.randrange(self.dias * 24 * 60 * 60))
+
+    def _ultimo_id(self, modelo):
+        return modelo.objects.order_by('-id').values_list('id', flat=True).first() or 0
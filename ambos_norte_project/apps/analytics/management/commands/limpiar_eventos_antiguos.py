@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
-from apps.analytics.models import EventoUsuario
+from apps.analytics.models import EventoUsuario, ActividadReciente
 
 
 class Command(BaseCommand):
@@ -52,6 +52,14 @@ class Command(BaseCommand):
         
         eventos_antiguos.delete()
         
+        # Buffers de actividad de sesiones anónimas que no volvieron
+        actividades, _ = ActividadReciente.objects.filter(
+            clave__startswith='s:',
+            ultima_actividad__lt=fecha_limite
+        ).delete()
+        
         self.stdout.write(
             self.style.SUCCESS(f'✅ {total} eventos eliminados correctamente')
         )
+        if actividades:
+            self.stdout.write(f'  🧹 {actividades} actividad(es) reciente(s) de sesiones inactivas eliminadas')
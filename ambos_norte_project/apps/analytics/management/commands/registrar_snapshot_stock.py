@@ -0,0 +1,34 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from apps.analytics.inventario import registrar_snapshot, reconstruir_desde_movimientos
+
+
+class Command(BaseCommand):
+    help = 'Registra el stock actual de todos los productos (snapshot diario)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fecha',
+            type=str,
+            help='Fecha del snapshot (YYYY-MM-DD). Por defecto: hoy'
+        )
+        parser.add_argument(
+            '--reconstruir-dias',
+            type=int,
+            help='Completar los últimos N días desde el historial de movimientos de stock'
+        )
+
+    def handle(self, *args, **options):
+        fecha = None
+        if options.get('fecha'):
+            try:
+                fecha = datetime.strptime(options['fecha'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Formato de fecha inválido. Use YYYY-MM-DD')
+
+        if options.get('reconstruir_dias'):
+            creados = reconstruir_desde_movimientos(options['reconstruir_dias'])
+            self.stdout.write(f'🕐 Snapshots reconstruidos desde movimientos: {creados}')
+
+        filas = registrar_snapshot(fecha)
+        self.stdout.write(self.style.SUCCESS(f'✅ Snapshot de stock registrado ({filas} producto(s))'))
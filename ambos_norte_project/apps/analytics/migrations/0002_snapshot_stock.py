@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('catalogo', '0006_movimiento_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('stock', models.IntegerField()),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots_stock', to='catalogo.producto')),
+            ],
+            options={
+                'verbose_name': 'Snapshot de Stock',
+                'verbose_name_plural': 'Snapshots de Stock',
+                'db_table': 'analytics_snapshots_stock',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['fecha'], name='analytics_s_fecha_e97a7b_idx')],
+                'unique_together': {('producto', 'fecha')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_snapshot_stock'),
+        ('catalogo', '0006_movimiento_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PronosticoProducto',
+            fields=[
+                ('producto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pronostico', serialize=False, to='catalogo.producto')),
+                ('metodo', models.CharField(choices=[('sin_ventas', 'Sin ventas'), ('media_movil', 'Media móvil'), ('holt_winters', 'Suavizado exponencial con estacionalidad semanal')], default='sin_ventas', max_length=20)),
+                ('demanda_diaria', models.DecimalField(decimal_places=2, default=0, help_text='Unidades por día esperadas durante el tiempo de reposición', max_digits=10)),
+                ('demanda_30d', models.DecimalField(decimal_places=2, default=0, help_text='Unidades esperadas en los próximos 30 días', max_digits=12)),
+                ('error_medio', models.DecimalField(decimal_places=2, default=0, help_text='Error absoluto medio del modelo (unidades/día)', max_digits=10)),
+                ('stock_seguridad', models.IntegerField(default=0)),
+                ('punto_reorden', models.IntegerField(db_index=True, default=0)),
+                ('fecha_quiebre', models.DateField(blank=True, help_text='Fecha estimada en la que se agota el stock actual', null=True)),
+                ('ultima_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Pronóstico de Producto',
+                'verbose_name_plural': 'Pronósticos de Productos',
+                'db_table': 'analytics_pronosticos_producto',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_pronostico_producto'),
+        ('catalogo', '0006_movimiento_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecomendacionProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicion', models.PositiveSmallIntegerField()),
+                ('puntaje', models.FloatField(help_text='Similitud coseno ponderada (0 a 1)')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recomendaciones', to='catalogo.producto')),
+                ('recomendado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='catalogo.producto')),
+            ],
+            options={
+                'verbose_name': 'Recomendación de Producto',
+                'verbose_name_plural': 'Recomendaciones de Productos',
+                'db_table': 'analytics_recomendaciones_producto',
+                'ordering': ['producto', 'posicion'],
+                'unique_together': {('producto', 'posicion')},
+            },
+        ),
+    ]
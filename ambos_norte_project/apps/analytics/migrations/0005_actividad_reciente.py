@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_recomendacion_producto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActividadReciente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(help_text='u:<id de usuario> o s:<session_id>', max_length=50, unique=True)),
+                ('productos', models.JSONField(blank=True, default=list, help_text='[[producto_id, "v"|"c", timestamp], ...] del más reciente al más antiguo')),
+                ('ultima_actividad', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Actividad Reciente',
+                'verbose_name_plural': 'Actividad Reciente',
+                'db_table': 'analytics_actividad_reciente',
+            },
+        ),
+    ]
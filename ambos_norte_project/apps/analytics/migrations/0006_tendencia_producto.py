@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_actividad_reciente'),
+        ('catalogo', '0006_movimiento_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TendenciaProducto',
+            fields=[
+                ('producto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='tendencia', serialize=False, to='catalogo.producto')),
+                ('puntaje', models.FloatField(default=0)),
+                ('periodo', models.IntegerField(default=0)),
+                ('actualizado', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Tendencia de Producto',
+                'verbose_name_plural': 'Tendencias de Productos',
+                'db_table': 'analytics_tendencias_producto',
+                'indexes': [models.Index(fields=['periodo', '-puntaje'], name='analytics_t_periodo_9d420d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0006_tendencia_producto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventousuario',
+            name='peso',
+            field=models.PositiveIntegerField(default=1, help_text='Eventos que representa (1 de cada N muestreados, ver captura.py)'),
+        ),
+    ]
@@ -0,0 +1,224 @@
+import hashlib
+import re
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models, transaction
+from django.db.models import Case, OuterRef, Subquery, Value, When
+from django.db.models.functions import Left, MD5
+import apps.analytics.campos
+
+
+LOTE = 5000
+
+# Copia congelada de EventoUsuario.CODIGOS_TIPO_EVENTO
+CODIGOS_TIPO_EVENTO = {
+    'vista_producto': 1,
+    'agregar_carrito': 2,
+    'remover_carrito': 3,
+    'inicio_checkout': 4,
+    'compra_completada': 5,
+    'busqueda': 6,
+    'registro': 7,
+    'login': 8,
+}
+
+# Copia congelada de la clasificación de apps/analytics/agentes.py y
+# captura.es_bot: si cambian, los agentes ya migrados no deben cambiar
+_BOTS = re.compile(
+    r'bot\b|bot/|crawl|spider|slurp|scrap|archiver|'
+    r'facebookexternalhit|whatsapp|telegram|preview|lighthouse|pagespeed|'
+    r'headless|phantomjs|selenium|puppeteer|playwright|'
+    r'curl|wget|httpie|python|aiohttp|httpx|go-http-client|java/|okhttp|axios|node-fetch|'
+    r'libwww|guzzle|postman|insomnia|'
+    r'monitor|uptime|pingdom|statuscake|health|kube-probe|elb-healthchecker',
+    re.IGNORECASE,
+)
+NAVEGADORES = (
+    ('Edge', re.compile(r'Edg(?:e|A|iOS)?/', re.I)),
+    ('Opera', re.compile(r'OPR/|Opera', re.I)),
+    ('Samsung Internet', re.compile(r'SamsungBrowser/', re.I)),
+    ('Firefox', re.compile(r'Firefox/|FxiOS/', re.I)),
+    ('Chrome', re.compile(r'Chrome/|CriOS/', re.I)),
+    ('Safari', re.compile(r'Safari/', re.I)),
+)
+SISTEMAS = (
+    ('Windows', re.compile(r'Windows', re.I)),
+    ('Android', re.compile(r'Android', re.I)),
+    ('iOS', re.compile(r'iPhone|iPad|iPod', re.I)),
+    ('macOS', re.compile(r'Mac OS X|Macintosh', re.I)),
+    ('Linux', re.compile(r'Linux|X11', re.I)),
+)
+_TABLET = re.compile(r'iPad|Tablet|Android(?!.*Mobile)', re.I)
+_MOVIL = re.compile(r'Mobile|iPhone|iPod|Android', re.I)
+
+
+def hash_agente(user_agent):
+    return hashlib.md5((user_agent or '').encode()).hexdigest()
+
+
+def clasificar_agente(user_agent):
+    user_agent = user_agent or ''
+    if not user_agent or _BOTS.search(user_agent):
+        return 'Bot', 'Otro', 'bot'
+
+    navegador = next((nombre for nombre, patron in NAVEGADORES if patron.search(user_agent)), 'Otro')
+    sistema = next((nombre for nombre, patron in SISTEMAS if patron.search(user_agent)), 'Otro')
+    if _TABLET.search(user_agent):
+        dispositivo = 'tablet'
+    elif _MOVIL.search(user_agent):
+        dispositivo = 'movil'
+    else:
+        dispositivo = 'escritorio'
+    return navegador, sistema, dispositivo
+
+
+def _internar(modelo, db, campo, valores, crear):
+    """Crea en bloque las entradas del diccionario que todavía no existen"""
+    existentes = set(modelo.objects.using(db).filter(**{f'{campo}__in': valores}).values_list(campo, flat=True))
+    modelo.objects.using(db).bulk_create(
+        [crear(valor) for valor in valores if valor not in existentes], ignore_conflicts=True
+    )
+
+
+def _codigos(campo, codigos):
+    return Case(
+        *[When(**{campo: valor}, then=Value(codigo)) for valor, codigo in codigos.items()],
+        default=Value(None),
+    )
+
+
+def compactar_eventos(apps, schema_editor):
+    """
+    Llena tipo_evento_codigo, sesion y agente por lotes de LOTE eventos
+    (una transacción y un UPDATE por lote; las referencias se resuelven en
+    la base con los índices únicos de los diccionarios). Los eventos con un
+    tipo_evento desconocido se borran.
+    """
+    EventoUsuario = apps.get_model('analytics', 'EventoUsuario')
+    AgenteUsuario = apps.get_model('analytics', 'AgenteUsuario')
+    SesionVisitante = apps.get_model('analytics', 'SesionVisitante')
+    db = schema_editor.connection.alias
+
+    def crear_agente(clave):
+        user_agent = textos[clave]
+        navegador, sistema, dispositivo = clasificar_agente(user_agent)
+        return AgenteUsuario(
+            hash=clave, user_agent=user_agent,
+            navegador=navegador, sistema=sistema, dispositivo=dispositivo,
+        )
+
+    ultimo = 0
+    while True:
+        with transaction.atomic(using=db):
+            lote = list(
+                EventoUsuario.objects.using(db).filter(pk__gt=ultimo).order_by('pk').values_list(
+                    'pk', 'tipo_evento', 'session_id', 'user_agent'
+                )[:LOTE]
+            )
+            if not lote:
+                break
+
+            # Un tipo fuera de CODIGOS_TIPO_EVENTO quedaría sin código y 0009
+            # no podría hacer la columna NOT NULL: esos eventos se descartan
+            descartados = [pk for pk, tipo_evento, _, _ in lote if tipo_evento not in CODIGOS_TIPO_EVENTO]
+            if descartados:
+                EventoUsuario.objects.using(db).filter(pk__in=descartados).delete()
+            validos = [fila for fila in lote if fila[1] in CODIGOS_TIPO_EVENTO]
+
+            claves = {session_id[:64] for _, _, session_id, _ in validos if session_id}
+            textos = {hash_agente(user_agent): user_agent for _, _, _, user_agent in validos if user_agent}
+            _internar(SesionVisitante, db, 'clave', claves, lambda clave: SesionVisitante(clave=clave))
+            _internar(AgenteUsuario, db, 'hash', textos, crear_agente)
+
+            EventoUsuario.objects.using(db).filter(pk__gt=ultimo, pk__lte=lote[-1][0]).update(
+                tipo_evento_codigo=_codigos('tipo_evento', CODIGOS_TIPO_EVENTO),
+                sesion=Subquery(SesionVisitante.objects.filter(
+                    clave=Left(OuterRef('session_id'), 64)
+                ).values('pk')[:1]),
+                agente=Subquery(AgenteUsuario.objects.filter(
+                    hash=MD5(OuterRef('user_agent'))
+                ).values('pk')[:1]),
+            )
+            ultimo = lote[-1][0]
+
+
+def expandir_eventos(apps, schema_editor):
+    """Inverso: vuelve a escribir tipo_evento, session_id y user_agent como texto"""
+    EventoUsuario = apps.get_model('analytics', 'EventoUsuario')
+    AgenteUsuario = apps.get_model('analytics', 'AgenteUsuario')
+    SesionVisitante = apps.get_model('analytics', 'SesionVisitante')
+    db = schema_editor.connection.alias
+    nombres = {codigo: nombre for nombre, codigo in CODIGOS_TIPO_EVENTO.items()}
+
+    ultimo = 0
+    while True:
+        with transaction.atomic(using=db):
+            pks = list(
+                EventoUsuario.objects.using(db).filter(pk__gt=ultimo).order_by('pk').values_list('pk', flat=True)[:LOTE]
+            )
+            if not pks:
+                break
+            EventoUsuario.objects.using(db).filter(pk__gt=ultimo, pk__lte=pks[-1]).update(
+                tipo_evento=_codigos('tipo_evento_codigo', nombres),
+                session_id=Subquery(SesionVisitante.objects.filter(pk=OuterRef('sesion')).values('clave')[:1]),
+                user_agent=Subquery(AgenteUsuario.objects.filter(pk=OuterRef('agente')).values('user_agent')[:1]),
+            )
+            ultimo = pks[-1]
+
+
+class Migration(migrations.Migration):
+    # Cada lote se confirma por separado: la tabla de eventos puede ser grande
+    atomic = False
+
+    dependencies = [
+        ('analytics', '0007_evento_peso'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgenteUsuario',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('hash', models.CharField(help_text='MD5 del User-Agent', max_length=32, unique=True)),
+                ('user_agent', models.TextField(blank=True)),
+                ('navegador', models.CharField(max_length=30)),
+                ('sistema', models.CharField(max_length=30)),
+                ('dispositivo', models.CharField(choices=[('escritorio', 'Escritorio'), ('movil', 'Móvil'), ('tablet', 'Tablet'), ('bot', 'Bot')], max_length=20)),
+                ('primera_vez', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Agente de Usuario',
+                'verbose_name_plural': 'Agentes de Usuario',
+                'db_table': 'analytics_agentes_usuario',
+            },
+        ),
+        migrations.CreateModel(
+            name='SesionVisitante',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('clave', models.CharField(max_length=64, unique=True)),
+                ('creada', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Sesión de Visitante',
+                'verbose_name_plural': 'Sesiones de Visitantes',
+                'db_table': 'analytics_sesiones_visitante',
+            },
+        ),
+        migrations.AddField(
+            model_name='eventousuario',
+            name='agente',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='eventos', to='analytics.agenteusuario'),
+        ),
+        migrations.AddField(
+            model_name='eventousuario',
+            name='sesion',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='eventos', to='analytics.sesionvisitante'),
+        ),
+        migrations.AddField(
+            model_name='eventousuario',
+            name='tipo_evento_codigo',
+            field=apps.analytics.campos.CodigoField(null=True),
+        ),
+        migrations.RunPython(compactar_eventos, expandir_eventos),
+    ]
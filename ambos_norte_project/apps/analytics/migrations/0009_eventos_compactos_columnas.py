@@ -0,0 +1,49 @@
+from django.db import migrations, models
+import apps.analytics.campos
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0008_eventos_compactos'),
+    ]
+
+    operations = [
+        # Con default para que, al revertir, la columna se pueda recrear sobre
+        # filas existentes (0008 la vuelve a llenar)
+        migrations.AlterField(
+            model_name='eventousuario',
+            name='tipo_evento',
+            field=models.CharField(choices=[('vista_producto', 'Vista de Producto'), ('agregar_carrito', 'Agregado al Carrito'), ('remover_carrito', 'Removido del Carrito'), ('inicio_checkout', 'Inicio de Checkout'), ('compra_completada', 'Compra Completada'), ('busqueda', 'Búsqueda'), ('registro', 'Registro de Usuario'), ('login', 'Inicio de Sesión')], default='', max_length=50),
+        ),
+        migrations.RemoveIndex(
+            model_name='eventousuario',
+            name='analytics_e_tipo_ev_d0a2a8_idx',
+        ),
+        migrations.RemoveField(
+            model_name='eventousuario',
+            name='tipo_evento',
+        ),
+        migrations.RemoveField(
+            model_name='eventousuario',
+            name='session_id',
+        ),
+        migrations.RemoveField(
+            model_name='eventousuario',
+            name='user_agent',
+        ),
+        migrations.RenameField(
+            model_name='eventousuario',
+            old_name='tipo_evento_codigo',
+            new_name='tipo_evento',
+        ),
+        migrations.AlterField(
+            model_name='eventousuario',
+            name='tipo_evento',
+            field=apps.analytics.campos.CodigoField(choices=[('vista_producto', 'Vista de Producto'), ('agregar_carrito', 'Agregado al Carrito'), ('remover_carrito', 'Removido del Carrito'), ('inicio_checkout', 'Inicio de Checkout'), ('compra_completada', 'Compra Completada'), ('busqueda', 'Búsqueda'), ('registro', 'Registro de Usuario'), ('login', 'Inicio de Sesión')], codigos={'vista_producto': 1, 'agregar_carrito': 2, 'remover_carrito': 3, 'inicio_checkout': 4, 'compra_completada': 5, 'busqueda': 6, 'registro': 7, 'login': 8}),
+        ),
+        migrations.AddIndex(
+            model_name='eventousuario',
+            index=models.Index(fields=['tipo_evento', '-timestamp'], name='analytics_e_tipo_ev_d0a2a8_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0009_eventos_compactos_columnas'),
+        ('catalogo', '0007_indices'),
+        ('pedidos', '0009_indices'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventousuario',
+            index=models.Index(fields=['sesion', '-timestamp'], name='analytics_e_sesion__58d6d5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventousuario',
+            index=models.Index(fields=['pedido', 'tipo_evento'], name='analytics_e_pedido__1ac81d_idx'),
+        ),
+    ]
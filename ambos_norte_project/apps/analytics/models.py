@@ -1,12 +1,117 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 from apps.catalogo.models import Producto, Categoria
 from apps.pedidos.models import Pedido
+from .agentes import clasificar_agente, hash_agente
+from .campos import CodigoField
+
+
+# Ids ya internados (valor -> id). Solo se cachean fuera de transacciones:
+# si la transacción se revierte el id dejaría de existir
+MAXIMO_CACHE_IDS = 10000
+
+
+def _id_internado(cache, valor, obtener):
+    if valor in cache:
+        return cache[valor]
+    id_ = obtener()
+    if not transaction.get_connection().in_atomic_block:
+        if len(cache) >= MAXIMO_CACHE_IDS:
+            cache.clear()
+        cache[valor] = id_
+    return id_
+
+
+class AgenteUsuario(models.Model):
+    """
+    User-Agents distintos (diccionario): cada evento guarda solo el id.
+    Se clasifican una vez, al registrarse por primera vez.
+    """
+    DISPOSITIVOS = [
+        ('escritorio', 'Escritorio'),
+        ('movil', 'Móvil'),
+        ('tablet', 'Tablet'),
+        ('bot', 'Bot'),
+    ]
+
+    # Clave de 4 bytes: es la columna que repite cada evento
+    id = models.AutoField(primary_key=True)
+    hash = models.CharField(max_length=32, unique=True, help_text='MD5 del User-Agent')
+    user_agent = models.TextField(blank=True)
+    navegador = models.CharField(max_length=30)
+    sistema = models.CharField(max_length=30)
+    dispositivo = models.CharField(max_length=20, choices=DISPOSITIVOS)
+    primera_vez = models.DateTimeField(default=timezone.now)
+
+    _ids = {}
+
+    class Meta:
+        db_table = 'analytics_agentes_usuario'
+        verbose_name = 'Agente de Usuario'
+        verbose_name_plural = 'Agentes de Usuario'
+
+    def __str__(self):
+        return f"{self.navegador} / {self.sistema} ({self.get_dispositivo_display()})"
+
+    @classmethod
+    def id_para(cls, user_agent):
+        """Id del User-Agent, creándolo si es nuevo (None si no hay)"""
+        if not user_agent:
+            return None
+        clave = hash_agente(user_agent)
+
+        def obtener():
+            navegador, sistema, dispositivo = clasificar_agente(user_agent)
+            agente, _ = cls.objects.get_or_create(hash=clave, defaults={
+                'user_agent': user_agent,
+                'navegador': navegador,
+                'sistema': sistema,
+                'dispositivo': dispositivo,
+            })
+            return agente.pk
+
+        return _id_internado(cls._ids, clave, obtener)
+
+
+class SesionVisitante(models.Model):
+    """
+    Identificadores de visitante/sesión (diccionario): los eventos guardan
+    un entero en lugar del texto.
+    """
+    id = models.AutoField(primary_key=True)
+    clave = models.CharField(max_length=64, unique=True)
+    creada = models.DateTimeField(default=timezone.now)
+
+    _ids = {}
+
+    class Meta:
+        db_table = 'analytics_sesiones_visitante'
+        verbose_name = 'Sesión de Visitante'
+        verbose_name_plural = 'Sesiones de Visitantes'
+
+    def __str__(self):
+        return self.clave
+
+    @classmethod
+    def id_para(cls, clave):
+        """Id de la sesión, creándola si es nueva (None si no hay)"""
+        if not clave:
+            return None
+        clave = str(clave)[:64]
+        return _id_internado(
+            cls._ids, clave, lambda: cls.objects.get_or_create(clave=clave)[0].pk
+        )
+
 
 class EventoUsuario(models.Model):
     """
-    Registro de eventos de usuario para análisis de comportamiento
+    Registro de eventos de usuario para análisis de comportamiento.
+
+    Filas compactas: tipo_evento es un código de 2 bytes y la sesión y el
+    User-Agent son referencias a diccionarios. session_id y user_agent
+    siguen disponibles como propiedades (se aceptan en create()); para
+    filtrar por sesión se usa sesion__clave.
     """
     TIPO_EVENTO = [
         ('vista_producto', 'Vista de Producto'),
@@ -18,6 +123,17 @@ class EventoUsuario(models.Model):
         ('registro', 'Registro de Usuario'),
         ('login', 'Inicio de Sesión'),
     ]
+    # Código guardado en la columna: no reasignar, solo agregar
+    CODIGOS_TIPO_EVENTO = {
+        'vista_producto': 1,
+        'agregar_carrito': 2,
+        'remover_carrito': 3,
+        'inicio_checkout': 4,
+        'compra_completada': 5,
+        'busqueda': 6,
+        'registro': 7,
+        'login': 8,
+    }
     
     usuario = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -26,8 +142,14 @@ class EventoUsuario(models.Model):
         blank=True,
         related_name='eventos'
     )
-    session_id = models.CharField(max_length=255, blank=True, null=True)
-    tipo_evento = models.CharField(max_length=50, choices=TIPO_EVENTO)
+    sesion = models.ForeignKey(
+        SesionVisitante,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='eventos'
+    )
+    tipo_evento = CodigoField(choices=TIPO_EVENTO, codigos=CODIGOS_TIPO_EVENTO)
     
     producto = models.ForeignKey(
         Producto,
@@ -63,9 +185,19 @@ class EventoUsuario(models.Model):
         blank=True,
         help_text='Datos adicionales del evento'
     )
+    peso = models.PositiveIntegerField(
+        default=1,
+        help_text='Eventos que representa (1 de cada N muestreados, ver captura.py)'
+    )
     
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    user_agent = models.TextField(blank=True, null=True)
+    agente = models.ForeignKey(
+        AgenteUsuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='eventos'
+    )
     timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     
     class Meta:
@@ -77,12 +209,36 @@ class EventoUsuario(models.Model):
             models.Index(fields=['tipo_evento', '-timestamp']),
             models.Index(fields=['usuario', '-timestamp']),
             models.Index(fields=['producto', '-timestamp']),
+            models.Index(fields=['sesion', '-timestamp']),
+            # Chequeo de compra ya registrada en registrar_pedido
+            models.Index(fields=['pedido', 'tipo_evento']),
         ]
     
     def __str__(self):
-        usuario_str = self.usuario.username if self.usuario else f"Anónimo ({self.session_id[:8]})"
+        usuario_str = self.usuario.username if self.usuario else f"Anónimo ({(self.session_id or '')[:8]})"
         return f"{usuario_str} - {self.get_tipo_evento_display()} - {self.timestamp}"
 
+    @property
+    def session_id(self):
+        if not self.sesion_id:
+            return None
+        if getattr(self, '_session_id', None) is None:
+            self._session_id = self.sesion.clave
+        return self._session_id
+
+    @session_id.setter
+    def session_id(self, clave):
+        self.sesion_id = SesionVisitante.id_para(clave)
+        self._session_id = str(clave)[:64] if self.sesion_id else None
+
+    @property
+    def user_agent(self):
+        return self.agente.user_agent if self.agente_id else None
+
+    @user_agent.setter
+    def user_agent(self, valor):
+        self.agente_id = AgenteUsuario.id_para(valor)
+
 
 class MetricaProducto(models.Model):
     """
@@ -148,6 +304,172 @@ class MetricaProducto(models.Model):
         self.save()
 
 
+class SnapshotStock(models.Model):
+    """
+    Stock de cada producto al cierre del día (una fila por producto y fecha)
+    """
+    fecha = models.DateField()
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='snapshots_stock'
+    )
+    stock = models.IntegerField()
+
+    class Meta:
+        db_table = 'analytics_snapshots_stock'
+        verbose_name = 'Snapshot de Stock'
+        verbose_name_plural = 'Snapshots de Stock'
+        ordering = ['-fecha']
+        unique_together = ['producto', 'fecha']
+        indexes = [
+            models.Index(fields=['fecha']),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_id} - {self.fecha}: {self.stock}"
+
+
+class PronosticoProducto(models.Model):
+    """
+    Pronóstico de demanda y punto de reorden por producto
+    (recalculado por el comando calcular_pronosticos)
+    """
+    METODO_CHOICES = [
+        ('sin_ventas', 'Sin ventas'),
+        ('media_movil', 'Media móvil'),
+        ('holt_winters', 'Suavizado exponencial con estacionalidad semanal'),
+    ]
+
+    producto = models.OneToOneField(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='pronostico',
+        primary_key=True
+    )
+    metodo = models.CharField(max_length=20, choices=METODO_CHOICES, default='sin_ventas')
+    demanda_diaria = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        help_text='Unidades por día esperadas durante el tiempo de reposición'
+    )
+    demanda_30d = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text='Unidades esperadas en los próximos 30 días'
+    )
+    error_medio = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        help_text='Error absoluto medio del modelo (unidades/día)'
+    )
+    stock_seguridad = models.IntegerField(default=0)
+    punto_reorden = models.IntegerField(default=0, db_index=True)
+    fecha_quiebre = models.DateField(
+        null=True,
+        blank=True,
+        help_text='Fecha estimada en la que se agota el stock actual'
+    )
+    ultima_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'analytics_pronosticos_producto'
+        verbose_name = 'Pronóstico de Producto'
+        verbose_name_plural = 'Pronósticos de Productos'
+
+    def __str__(self):
+        return f"Pronóstico: {self.producto_id} ({self.metodo})"
+
+
+class RecomendacionProducto(models.Model):
+    """
+    Vecinos más similares de cada producto ("los clientes también compraron"),
+    precalculados por el comando calcular_recomendaciones.
+    Servir las recomendaciones es una lectura por índice (producto, posicion).
+    """
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='recomendaciones'
+    )
+    recomendado = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    posicion = models.PositiveSmallIntegerField()
+    puntaje = models.FloatField(help_text='Similitud coseno ponderada (0 a 1)')
+
+    class Meta:
+        db_table = 'analytics_recomendaciones_producto'
+        verbose_name = 'Recomendación de Producto'
+        verbose_name_plural = 'Recomendaciones de Productos'
+        ordering = ['producto', 'posicion']
+        unique_together = ['producto', 'posicion']
+
+    def __str__(self):
+        return f"{self.producto_id} -> {self.recomendado_id} ({self.puntaje:.3f})"
+
+
+class ActividadReciente(models.Model):
+    """
+    Últimos productos vistos o agregados al carrito por un usuario o una
+    sesión anónima: un buffer acotado en una sola fila, actualizado al
+    registrar cada evento (ver actividad.py)
+    """
+    clave = models.CharField(
+        max_length=50,
+        unique=True,
+        help_text='u:<id de usuario> o s:<session_id>'
+    )
+    productos = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='[[producto_id, "v"|"c", timestamp], ...] del más reciente al más antiguo'
+    )
+    ultima_actividad = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = 'analytics_actividad_reciente'
+        verbose_name = 'Actividad Reciente'
+        verbose_name_plural = 'Actividad Reciente'
+
+    def __str__(self):
+        return f"{self.clave} ({len(self.productos)} productos)"
+
+
+class TendenciaProducto(models.Model):
+    """
+    Popularidad con decaimiento exponencial por producto (ver tendencias.py).
+    `puntaje` se guarda escalado a la base del `periodo`, así el orden entre
+    productos no cambia con el paso del tiempo y solo se escriben las filas
+    de los productos que reciben eventos.
+    """
+    producto = models.OneToOneField(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='tendencia',
+        primary_key=True
+    )
+    puntaje = models.FloatField(default=0)
+    periodo = models.IntegerField(default=0)
+    actualizado = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'analytics_tendencias_producto'
+        verbose_name = 'Tendencia de Producto'
+        verbose_name_plural = 'Tendencias de Productos'
+        indexes = [
+            models.Index(fields=['periodo', '-puntaje']),
+        ]
+
+    def __str__(self):
+        return f"Tendencia: {self.producto_id} ({self.puntaje:.2f})"
+
+
 class MetricaDiaria(models.Model):
     """
     Snapshot diario del negocio completo
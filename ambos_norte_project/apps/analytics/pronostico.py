@@ -0,0 +1,185 @@
+import math
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from apps.catalogo.models import Producto
+from apps.pedidos.models import ItemPedido
+from .inventario import ESTADOS_VENTA
+from .models import PronosticoProducto
+
+
+HISTORIA_DIAS = getattr(settings, 'PRONOSTICO_HISTORIA_DIAS', 90)
+VENTANA_MEDIA = getattr(settings, 'PRONOSTICO_VENTANA_MEDIA', 14)
+LEAD_TIME_DIAS = getattr(settings, 'PRONOSTICO_LEAD_TIME_DIAS', 7)
+# z del nivel de servicio para el stock de seguridad (1.65 ~ 95 %)
+Z_SERVICIO = getattr(settings, 'PRONOSTICO_Z_SERVICIO', 1.65)
+HORIZONTE_DIAS = 90
+DIAS_EVALUACION = 28
+
+# Parámetros de Holt-Winters aditivo con tendencia amortiguada
+PERIODO = 7
+ALFA = 0.3
+BETA = 0.05
+GAMMA = 0.2
+PHI = 0.9
+
+
+def serie_ventas(producto_ids, dias=HISTORIA_DIAS):
+    """
+    Matriz [producto x día] con las unidades vendidas en los últimos `dias`
+    días completos (hoy no se incluye), armada con una sola consulta agrupada.
+    """
+    hoy = timezone.localdate()
+    inicio = hoy - timedelta(days=dias)
+    desde = timezone.make_aware(datetime.combine(inicio, time.min))
+    hasta = timezone.make_aware(datetime.combine(hoy, time.min))
+
+    posicion = {producto_id: i for i, producto_id in enumerate(producto_ids)}
+    matriz = np.zeros((len(producto_ids), dias))
+
+    filas = ItemPedido.objects.filter(
+        pedido__fecha_pedido__gte=desde,
+        pedido__fecha_pedido__lt=hasta,
+        pedido__estado__in=ESTADOS_VENTA
+    ).annotate(
+        dia=TruncDate('pedido__fecha_pedido')
+    ).values('producto_id', 'dia').annotate(
+        unidades=Sum('cantidad')
+    ).values_list('producto_id', 'dia', 'unidades')
+
+    for producto_id, dia, unidades in filas:
+        i = posicion.get(producto_id)
+        j = (dia - inicio).days
+        if i is not None and 0 <= j < dias:
+            matriz[i, j] = unidades
+    return matriz
+
+
+def media_movil(ventas, ventana=VENTANA_MEDIA):
+    """
+    Predicción un paso adelante con media móvil (para medir el error)
+    y demanda diaria pronosticada (media de los últimos `ventana` días).
+    """
+    acumulado = np.cumsum(np.pad(ventas, ((0, 0), (1, 0))), axis=1)
+    ajuste = np.full(ventas.shape, np.nan)
+    ajuste[:, ventana:] = (acumulado[:, ventana:-1] - acumulado[:, :-ventana - 1]) / ventana
+    return ajuste, ventas[:, -ventana:].mean(axis=1)
+
+
+def holt_winters(ventas, horizonte, alfa=ALFA, beta=BETA, gamma=GAMMA, phi=PHI, periodo=PERIODO):
+    """
+    Suavizado exponencial aditivo con estacionalidad semanal, ajustado a
+    todos los productos a la vez (cada paso opera sobre un vector).
+    Devuelve (predicciones un paso adelante, pronóstico [producto x horizonte]).
+    """
+    total, dias = ventas.shape
+    nivel = ventas[:, :periodo].mean(axis=1)
+    tendencia = (ventas[:, periodo:2 * periodo].mean(axis=1) - nivel) / periodo
+    estacion = ventas[:, :periodo] - nivel[:, None]
+
+    ajuste = np.empty_like(ventas)
+    for t in range(dias):
+        s = estacion[:, t % periodo]
+        ajuste[:, t] = nivel + phi * tendencia + s
+        real = ventas[:, t]
+        nuevo_nivel = alfa * (real - s) + (1 - alfa) * (nivel + phi * tendencia)
+        tendencia = beta * (nuevo_nivel - nivel) + (1 - beta) * phi * tendencia
+        estacion[:, t % periodo] = gamma * (real - nuevo_nivel) + (1 - gamma) * s
+        nivel = nuevo_nivel
+
+    pasos = np.arange(1, horizonte + 1)
+    amortiguacion = np.cumsum(phi ** pasos)
+    temporada = estacion[:, (dias + pasos - 1) % periodo]
+    pronostico = nivel[:, None] + tendencia[:, None] * amortiguacion[None, :] + temporada
+    return ajuste, np.clip(pronostico, 0, None)
+
+
+def calcular_pronosticos(dias=HISTORIA_DIAS, lead_time=LEAD_TIME_DIAS, guardar=True):
+    """
+    Pronóstico de demanda, stock de seguridad, punto de reorden y fecha
+    estimada de quiebre para todos los productos activos.
+    Por producto se elige el modelo con menor error en las últimas semanas.
+    """
+    productos = list(Producto.objects.filter(activo=True).values_list('id', 'stock'))
+    if not productos:
+        return []
+    # La media móvil necesita VENTANA_MEDIA días antes del período de evaluación
+    dias = max(dias, DIAS_EVALUACION + VENTANA_MEDIA)
+
+    ids = [producto_id for producto_id, _ in productos]
+    stock = np.array([max(stock, 0) for _, stock in productos], dtype=float)
+    ventas = serie_ventas(ids, dias)
+
+    ajuste_mm, demanda_mm = media_movil(ventas)
+    ajuste_hw, pronostico_hw = holt_winters(ventas, HORIZONTE_DIAS)
+    pronostico_mm = np.repeat(demanda_mm[:, None], HORIZONTE_DIAS, axis=1)
+
+    evaluacion = slice(dias - DIAS_EVALUACION, dias)
+    residuos_mm = ventas[:, evaluacion] - ajuste_mm[:, evaluacion]
+    residuos_hw = ventas[:, evaluacion] - ajuste_hw[:, evaluacion]
+    error_mm = np.abs(residuos_mm).mean(axis=1)
+    error_hw = np.abs(residuos_hw).mean(axis=1)
+
+    usar_hw = error_hw < error_mm
+    pronostico = np.where(usar_hw[:, None], pronostico_hw, pronostico_mm)
+    error = np.where(usar_hw, error_hw, error_mm)
+    desvio = np.where(usar_hw, residuos_hw.std(axis=1), residuos_mm.std(axis=1))
+    sin_ventas = ventas.sum(axis=1) == 0
+
+    demanda_lead = pronostico[:, :lead_time].sum(axis=1)
+    stock_seguridad = np.ceil(Z_SERVICIO * desvio * math.sqrt(lead_time))
+    punto_reorden = np.ceil(demanda_lead + stock_seguridad)
+
+    # Primer día en el que la demanda acumulada alcanza el stock actual
+    acumulada = np.cumsum(pronostico, axis=1)
+    alcanza = acumulada >= stock[:, None]
+    hay_quiebre = alcanza.any(axis=1) & (acumulada[:, -1] > 0)
+    dia_quiebre = np.where(stock <= 0, 0, alcanza.argmax(axis=1) + 1)
+
+    hoy = timezone.localdate()
+    pronosticos = []
+    for i, producto_id in enumerate(ids):
+        if sin_ventas[i]:
+            pronosticos.append(PronosticoProducto(producto_id=producto_id, metodo='sin_ventas'))
+            continue
+        pronosticos.append(PronosticoProducto(
+            producto_id=producto_id,
+            metodo='holt_winters' if usar_hw[i] else 'media_movil',
+            demanda_diaria=Decimal(str(round(demanda_lead[i] / lead_time, 2))),
+            demanda_30d=Decimal(str(round(pronostico[i, :30].sum(), 2))),
+            error_medio=Decimal(str(round(error[i], 2))),
+            stock_seguridad=int(stock_seguridad[i]),
+            punto_reorden=int(punto_reorden[i]),
+            fecha_quiebre=(
+                hoy + timedelta(days=int(dia_quiebre[i]))
+                if hay_quiebre[i] or stock[i] <= 0 else None
+            ),
+        ))
+
+    if guardar:
+        guardar_pronosticos(pronosticos)
+    return pronosticos
+
+
+def guardar_pronosticos(pronosticos):
+    """Upsert de todos los pronósticos en lotes"""
+    campos = [
+        'metodo', 'demanda_diaria', 'demanda_30d', 'error_medio',
+        'stock_seguridad', 'punto_reorden', 'fecha_quiebre', 'ultima_actualizacion',
+    ]
+    ahora = timezone.now()
+    for pronostico in pronosticos:
+        pronostico.ultima_actualizacion = ahora
+    PronosticoProducto.objects.bulk_create(
+        pronosticos,
+        batch_size=1000,
+        update_conflicts=True,
+        # MySQL no acepta unique_fields (usa ON DUPLICATE KEY)
+        unique_fields=['producto'] if connection.features.supports_update_conflicts_with_target else None,
+        update_fields=campos,
+    )
@@ -0,0 +1,190 @@
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from apps.catalogo.models import Producto
+from apps.pedidos.models import ItemPedido
+from .inventario import ESTADOS_VENTA
+from .models import EventoUsuario, RecomendacionProducto
+
+
+RECOMENDACIONES_POR_PRODUCTO = getattr(settings, 'RECOMENDACIONES_POR_PRODUCTO', 12)
+DIAS_PEDIDOS = getattr(settings, 'RECOMENDACIONES_DIAS_PEDIDOS', 365)
+DIAS_EVENTOS = getattr(settings, 'RECOMENDACIONES_DIAS_EVENTOS', 60)
+# Mínimo de canastas en común para considerar un par (descarta coincidencias sueltas)
+MIN_SOPORTE = getattr(settings, 'RECOMENDACIONES_MIN_SOPORTE', 2)
+# Canastas más grandes se descartan: suelen ser bots o sesiones de carga
+MAX_CANASTA = 50
+CANASTAS_POR_BLOQUE = 20000
+
+# Peso de cada producto dentro de su canasta
+PESO_COMPRA = 1.0
+PESO_CARRITO = 0.5
+PESO_VISTA = 0.2
+
+
+def _canastas_pedidos(desde):
+    """(canasta, producto, peso) de los pedidos concretados"""
+    filas = ItemPedido.objects.filter(
+        pedido__fecha_pedido__gte=desde,
+        pedido__estado__in=ESTADOS_VENTA
+    ).values_list('pedido_id', 'producto_id')
+    for pedido_id, producto_id in filas.iterator(chunk_size=5000):
+        yield ('p', pedido_id), producto_id, PESO_COMPRA
+
+
+def _canastas_sesiones(desde):
+    """(canasta, producto, peso) de las vistas y agregados al carrito por sesión"""
+    filas = EventoUsuario.objects.filter(
+        timestamp__gte=desde,
+        tipo_evento__in=['vista_producto', 'agregar_carrito'],
+        producto__isnull=False
+    ).values_list('sesion_id', 'usuario_id', 'producto_id', 'tipo_evento')
+    for sesion_id, usuario_id, producto_id, tipo_evento in filas.iterator(chunk_size=5000):
+        if sesion_id:
+            canasta = ('s', sesion_id)
+        elif usuario_id:
+            canasta = ('u', usuario_id)
+        else:
+            continue
+        yield canasta, producto_id, PESO_CARRITO if tipo_evento == 'agregar_carrito' else PESO_VISTA
+
+
+def cargar_incidencias(dias_pedidos=DIAS_PEDIDOS, dias_eventos=DIAS_EVENTOS):
+    """
+    Matriz dispersa canasta x producto en formato coordenado.
+    Devuelve (canastas, productos, pesos, ids): arrays ordenados por canasta,
+    con un producto por canasta una sola vez (se queda el peso mayor), y los
+    ids de producto que corresponden a cada índice.
+    """
+    ahora = timezone.now()
+    codigos = {}
+    canastas, productos, pesos = [], [], []
+    for fuente in (
+        _canastas_pedidos(ahora - timedelta(days=dias_pedidos)),
+        _canastas_sesiones(ahora - timedelta(days=dias_eventos)),
+    ):
+        for canasta, producto_id, peso in fuente:
+            canastas.append(codigos.setdefault(canasta, len(codigos)))
+            productos.append(producto_id)
+            pesos.append(peso)
+
+    if not canastas:
+        vacio = np.array([], dtype=np.int64)
+        return vacio, vacio, np.array([]), vacio
+
+    ids, productos = np.unique(np.array(productos, dtype=np.int64), return_inverse=True)
+    canastas = np.array(canastas, dtype=np.int64)
+
+    # Un producto repetido en la canasta cuenta una vez, con el mayor peso
+    claves, inverso = np.unique(canastas * len(ids) + productos, return_inverse=True)
+    maximos = np.zeros(len(claves))
+    np.maximum.at(maximos, inverso, np.array(pesos))
+    canastas, productos = np.divmod(claves, len(ids))
+
+    # Se descartan canastas de un solo producto (no aportan pares) y las enormes
+    _, tamanio = np.unique(canastas, return_counts=True)
+    tamanio_fila = np.repeat(tamanio, tamanio)
+    validas = (tamanio_fila > 1) & (tamanio_fila <= MAX_CANASTA)
+    return canastas[validas], productos[validas], maximos[validas], ids
+
+
+def _pares(canastas, productos, pesos):
+    """
+    Todos los pares (a, b) con a != b dentro de cada canasta, generados sin
+    bucles: cada incidencia se repite tantas veces como el tamaño de su canasta.
+    Devuelve (a, b, peso del par).
+    """
+    _, inicio, tamanio = np.unique(canastas, return_index=True, return_counts=True)
+    tamanio_fila = np.repeat(tamanio, tamanio)
+    inicio_fila = np.repeat(inicio, tamanio)
+
+    izquierda = np.repeat(np.arange(len(canastas)), tamanio_fila)
+    desplazamiento = np.arange(len(izquierda)) - np.repeat(np.cumsum(tamanio_fila) - tamanio_fila, tamanio_fila)
+    derecha = np.repeat(inicio_fila, tamanio_fila) + desplazamiento
+
+    distintos = izquierda != derecha
+    izquierda, derecha = izquierda[distintos], derecha[distintos]
+    return productos[izquierda], productos[derecha], pesos[izquierda] * pesos[derecha]
+
+
+def _acumular(claves, pesos, soportes):
+    unicas, inverso = np.unique(claves, return_inverse=True)
+    return unicas, np.bincount(inverso, weights=pesos), np.bincount(inverso, weights=soportes)
+
+
+def coocurrencias(canastas, productos, pesos, total_productos):
+    """
+    Co-ocurrencia ponderada y soporte (canastas en común) de cada par,
+    procesando las canastas por bloques para acotar la memoria.
+    """
+    if not len(canastas):
+        vacio = np.array([], dtype=np.int64)
+        return vacio, np.array([]), np.array([])
+
+    # Límites de bloque alineados al comienzo de una canasta
+    _, inicio = np.unique(canastas, return_index=True)
+    limites = list(inicio[::CANASTAS_POR_BLOQUE]) + [len(canastas)]
+
+    claves, totales, soportes = [], [], []
+    for desde, hasta in zip(limites, limites[1:]):
+        a, b, peso = _pares(canastas[desde:hasta], productos[desde:hasta], pesos[desde:hasta])
+        bloque = _acumular(a * total_productos + b, peso, np.ones(len(peso)))
+        claves.append(bloque[0])
+        totales.append(bloque[1])
+        soportes.append(bloque[2])
+    return _acumular(np.concatenate(claves), np.concatenate(totales), np.concatenate(soportes))
+
+
+def calcular_recomendaciones(limite=RECOMENDACIONES_POR_PRODUCTO, guardar=True):
+    """
+    Similitud coseno ítem-ítem sobre las canastas (pedidos y sesiones) y
+    top `limite` vecinos activos por producto.
+    Devuelve {producto_id: [(recomendado_id, puntaje), ...]}.
+    """
+    canastas, productos, pesos, ids = cargar_incidencias()
+    total = len(ids)
+    claves, coocurrencia, soporte = coocurrencias(canastas, productos, pesos, total)
+
+    a, b = np.divmod(claves, max(total, 1))
+    norma = np.sqrt(np.bincount(productos, weights=pesos ** 2, minlength=total))
+    puntaje = coocurrencia / (norma[a] * norma[b]) if len(claves) else coocurrencia
+
+    # Solo se recomiendan productos activos
+    activos = np.isin(ids, list(Producto.objects.filter(activo=True).values_list('id', flat=True)))
+    validos = (soporte >= MIN_SOPORTE) & activos[b]
+    a, b, puntaje = a[validos], b[validos], puntaje[validos]
+
+    # Top `limite` por producto: orden por producto y puntaje descendente
+    orden = np.lexsort((-puntaje, a))
+    a, b, puntaje = a[orden], b[orden], puntaje[orden]
+    _, inicio, cantidad = np.unique(a, return_index=True, return_counts=True)
+    posicion = np.arange(len(a)) - np.repeat(inicio, cantidad)
+    entran = posicion < limite
+
+    recomendaciones = {}
+    for origen, destino, valor in zip(ids[a[entran]].tolist(), ids[b[entran]].tolist(), puntaje[entran].tolist()):
+        recomendaciones.setdefault(origen, []).append((destino, round(min(valor, 1.0), 4)))
+
+    if guardar:
+        guardar_recomendaciones(recomendaciones)
+    return recomendaciones
+
+
+def guardar_recomendaciones(recomendaciones):
+    """Reemplaza la tabla completa en una transacción (los lectores nunca la ven a medias)"""
+    filas = [
+        RecomendacionProducto(
+            producto_id=producto_id,
+            recomendado_id=recomendado_id,
+            posicion=posicion,
+            puntaje=puntaje,
+        )
+        for producto_id, vecinos in recomendaciones.items()
+        for posicion, (recomendado_id, puntaje) in enumerate(vecinos, 1)
+    ]
+    with transaction.atomic():
+        RecomendacionProducto.objects.all().delete()
+        RecomendacionProducto.objects.bulk_create(filas, batch_size=2000)
+    return len(filas)
@@ -40,6 +40,25 @@ def tarea_actualizar_productos():
     print('=== Finalizando actualización de métricas de productos ===\n')
 
 
+def tarea_pronosticos():
+    """Recalcular pronósticos de demanda y puntos de reorden"""
+    print('=== Iniciando cálculo de pronósticos ===')
+    ejecutar_comando('calcular_pronosticos')
+    print('=== Finalizando cálculo de pronósticos ===\n')
+
+
+def tarea_recomendaciones():
+    """Recalcular recomendaciones de productos relacionados"""
+    print('=== Iniciando cálculo de recomendaciones ===')
+    ejecutar_comando('calcular_recomendaciones')
+    print('=== Finalizando cálculo de recomendaciones ===\n')
+
+
+def tarea_tendencias():
+    """Reescalar y depurar los puntajes de tendencia"""
+    ejecutar_comando('actualizar_tendencias')
+
+
 def tarea_limpiar_eventos():
     """Limpiar eventos antiguos"""
     print('=== Iniciando limpieza de eventos antiguos ===')
@@ -47,16 +66,39 @@ def tarea_limpiar_eventos():
     print('=== Finalizando limpieza de eventos antiguos ===\n')
 
 
+def tarea_snapshot_stock():
+    """Registrar el stock del día"""
+    print('=== Registrando snapshot de stock ===')
+    ejecutar_comando('registrar_snapshot_stock')
+    print('=== Snapshot de stock registrado ===\n')
+
+
+def tarea_variantes_imagenes():
+    """Procesar subidas y generar miniaturas de imágenes pendientes"""
+    ejecutar_comando('procesar_subidas_pendientes')
+    ejecutar_comando('generar_variantes_imagenes')
+
+
 # Programar tareas
+schedule.every().day.at("23:55").do(tarea_snapshot_stock)
 schedule.every().day.at("00:30").do(tarea_metricas_diarias)
 schedule.every().day.at("01:00").do(tarea_actualizar_productos)
+schedule.every().day.at("01:30").do(tarea_pronosticos)
+schedule.every().day.at("03:00").do(tarea_recomendaciones)
 schedule.every().sunday.at("02:00").do(tarea_limpiar_eventos)
+schedule.every(10).minutes.do(tarea_variantes_imagenes)
+schedule.every().hour.do(tarea_tendencias)
 
 print('Scheduler iniciado. Presiona Ctrl+C para detener.')
 print('Tareas programadas:')
+print('  - Snapshot de stock: 23:55')
 print('  - Métricas diarias: 00:30')
 print('  - Actualizar productos: 01:00')
+print('  - Pronósticos de demanda: 01:30')
 print('  - Limpiar eventos: Domingos 02:00')
+print('  - Recomendaciones de productos: 03:00')
+print('  - Subidas y variantes de imágenes pendientes: cada 10 minutos')
+print('  - Mantenimiento de tendencias: cada hora')
 
 # Loop principal
 while True:
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from ambos_norte import serializacion_rapida as rapida
 from .models import (
     EventoUsuario,
     MetricaProducto,
@@ -7,8 +8,9 @@ from .models import (
     DatosGoogleAnalytics
 )
 # ✅ CORREGIDO: CategoriaSerializer sin alias
-from apps.catalogo.serializers import ProductoListSerializer, CategoriaSerializer
-from apps.usuarios.serializer import UsuarioSerializer
+from apps.catalogo.serializers import ProductoListSerializer, CategoriaSerializer, PRODUCTO_LISTA_RAPIDO
+from apps.usuarios.serializer import UsuarioSerializer, USUARIO_RAPIDO
+from .visitante import visitante_id
 
 
 class EventoUsuarioSerializer(serializers.ModelSerializer):
@@ -18,6 +20,9 @@ class EventoUsuarioSerializer(serializers.ModelSerializer):
     usuario_detalle = UsuarioSerializer(source='usuario', read_only=True)
     producto_detalle = ProductoListSerializer(source='producto', read_only=True)
     tipo_evento_display = serializers.CharField(source='get_tipo_evento_display', read_only=True)
+    # Propiedades del modelo (se guardan en los diccionarios SesionVisitante / AgenteUsuario)
+    session_id = serializers.CharField(max_length=64, required=False, allow_null=True, allow_blank=True)
+    user_agent = serializers.CharField(required=False, allow_null=True, allow_blank=True)
     
     class Meta:
         model = EventoUsuario
@@ -58,14 +63,40 @@ class EventoUsuarioSerializer(serializers.ModelSerializer):
             # Asignar usuario si está autenticado
             if request.user.is_authenticated and not validated_data.get('usuario'):
                 validated_data['usuario'] = request.user
+            
+            if not validated_data.get('session_id'):
+                validated_data['session_id'] = visitante_id(request)
         
         return super().create(validated_data)
 
 
+# Misma salida que EventoUsuarioSerializer, armada desde values().
+# El contexto necesita datos_usuarios_rapido() de los usuarios de las filas
+EVENTO_USUARIO_RAPIDO = rapida.Esquema(
+    ('id', 'id', None),
+    ('usuario', 'usuario', None),
+    ('usuario_detalle', None, rapida.Anidado(USUARIO_RAPIDO, 'id').prefijado('usuario__')),
+    ('session_id', 'sesion__clave', None),
+    ('tipo_evento', 'tipo_evento', None),
+    ('tipo_evento_display', 'tipo_evento', rapida.opciones(EventoUsuario.TIPO_EVENTO)),
+    ('producto', 'producto', None),
+    ('producto_detalle', None, rapida.Anidado(PRODUCTO_LISTA_RAPIDO, 'id').prefijado('producto__')),
+    ('categoria', 'categoria', None),
+    ('pedido', 'pedido', None),
+    ('valor_monetario', 'valor_monetario', rapida.decimal(10, 2)),
+    ('metadata', 'metadata', None),
+    ('ip_address', 'ip_address', rapida.texto),
+    ('user_agent', 'agente__user_agent', None),
+    ('timestamp', 'timestamp', rapida.fecha_hora),
+)
+
+
 class EventoUsuarioCreateSerializer(serializers.ModelSerializer):
     """
     Serializer simplificado para crear eventos (sin detalles anidados)
     """
+    session_id = serializers.CharField(max_length=64, required=False, allow_null=True, allow_blank=True)
+    
     class Meta:
         model = EventoUsuario
         fields = [
@@ -94,6 +125,10 @@ class EventoUsuarioCreateSerializer(serializers.ModelSerializer):
             
             # User Agent
             validated_data['user_agent'] = request.META.get('HTTP_USER_AGENT', '')
+            
+            # Visitante anónimo (cookie de AnalyticsMiddleware) si el cliente no lo envía
+            if not validated_data.get('session_id'):
+                validated_data['session_id'] = visitante_id(request)
         
         return super().create(validated_data)
 
@@ -5,6 +5,9 @@ from apps.carrito.models import ItemCarrito, Carrito
 from apps.pedidos.models import Pedido
 from apps.usuarios.models import Usuario
 from .models import EventoUsuario
+from .actividad import registrar_actividades, TIPOS as TIPOS_ACTIVIDAD
+from .tendencias import registrar_evento_tendencia, PESOS as PESOS_TENDENCIA
+from .visitante import visitante_id
 
 
 @receiver(user_logged_in)
@@ -16,7 +19,7 @@ def registrar_login(sender, request, user, **kwargs):
         EventoUsuario.objects.create(
             usuario=user,
             tipo_evento='login',
-            session_id=request.session.session_key,
+            session_id=visitante_id(request),
             ip_address=get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
         )
@@ -129,6 +132,43 @@ def registrar_pedido(sender, instance, created, **kwargs):
             print(f"Error registrando compra completada: {e}")
 
 
+@receiver(post_save, sender=EventoUsuario)
+def actualizar_actividad_reciente(sender, instance, created, **kwargs):
+    """
+    Mantener al día el buffer de actividad reciente del usuario/sesión
+    (los bulk_create no disparan esta señal: llaman a registrar_actividades)
+    """
+    if created and instance.tipo_evento in TIPOS_ACTIVIDAD and instance.producto_id:
+        try:
+            registrar_actividades([(
+                instance.usuario_id,
+                instance.session_id,
+                instance.producto_id,
+                instance.tipo_evento,
+                instance.timestamp
+            )])
+        except Exception as e:
+            print(f"Error actualizando actividad reciente: {e}")
+
+
+@receiver(post_save, sender=EventoUsuario)
+def actualizar_tendencias(sender, instance, created, **kwargs):
+    """
+    Sumar el evento al puntaje de tendencia de los productos involucrados
+    """
+    if created and instance.tipo_evento in PESOS_TENDENCIA:
+        try:
+            registrar_evento_tendencia(
+                instance.tipo_evento,
+                producto_id=instance.producto_id,
+                pedido_id=instance.pedido_id,
+                ahora=instance.timestamp,
+                cantidad=instance.peso
+            )
+        except Exception as e:
+            print(f"Error actualizando tendencias: {e}")
+
+
 def get_client_ip(request):
     """Obtener IP del cliente"""
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -0,0 +1,197 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from django.db.models.functions import Power, TruncHour
+from django.utils import timezone
+from apps.pedidos.models import ItemPedido
+from .inventario import ESTADOS_VENTA
+from .models import EventoUsuario, TendenciaProducto
+
+
+# Cada cuántas horas el puntaje de un producto se reduce a la mitad
+VIDA_MEDIA_HORAS = getattr(settings, 'TENDENCIAS_VIDA_MEDIA_HORAS', 24)
+# Los puntajes se guardan escalados a la base de un período; al cambiar de
+# período se reescalan todas las filas (2 ** (168 / 24) = 128 como máximo)
+PERIODO_HORAS = 7 * 24
+EPOCA = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+# Por debajo de este puntaje actual el producto deja de estar en tendencia
+PUNTAJE_MINIMO = 0.05
+CACHE_SEGUNDOS = getattr(settings, 'TENDENCIAS_CACHE_SEGUNDOS', 60)
+
+PESOS = {
+    'vista_producto': 1.0,
+    'agregar_carrito': 3.0,
+    'compra_completada': 10.0,
+}
+
+
+def periodo_actual(ahora=None):
+    ahora = ahora or timezone.now()
+    return int((ahora - EPOCA).total_seconds() // (PERIODO_HORAS * 3600))
+
+
+def _factor(periodo, ahora):
+    """2 ** (horas desde la base del período / vida media)"""
+    base = EPOCA + timedelta(hours=periodo * PERIODO_HORAS)
+    return 2 ** ((ahora - base).total_seconds() / 3600 / VIDA_MEDIA_HORAS)
+
+
+def _reescalado(periodo):
+    """Expresión que lleva un puntaje guardado en otro período a la base de `periodo`"""
+    return F('puntaje') * Power(
+        Value(2.0),
+        (F('periodo') - Value(periodo)) * Value(PERIODO_HORAS / VIDA_MEDIA_HORAS),
+        output_field=FloatField()
+    )
+
+
+def sumar_tendencias(pesos, ahora=None):
+    """
+    Suma pesos {producto_id: peso} a los puntajes con un único UPDATE
+    (las filas de otro período se reescalan en la misma sentencia).
+    Solo se insertan filas para productos que todavía no tienen puntaje.
+    """
+    pesos = {int(producto_id): peso for producto_id, peso in pesos.items() if peso}
+    if not pesos:
+        return
+    ahora = ahora or timezone.now()
+    periodo = periodo_actual(ahora)
+    factor = _factor(periodo, ahora)
+
+    incremento = Case(
+        *[When(producto_id=producto_id, then=Value(peso * factor)) for producto_id, peso in pesos.items()],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    puntaje = Case(
+        When(periodo=periodo, then=F('puntaje')),
+        default=_reescalado(periodo),
+        output_field=FloatField(),
+    ) + incremento
+
+    with transaction.atomic():
+        actualizados = TendenciaProducto.objects.filter(
+            producto_id__in=pesos
+        ).update(puntaje=puntaje, periodo=periodo, actualizado=ahora)
+        if actualizados < len(pesos):
+            existentes = set(TendenciaProducto.objects.filter(
+                producto_id__in=pesos
+            ).values_list('producto_id', flat=True))
+            TendenciaProducto.objects.bulk_create([
+                TendenciaProducto(
+                    producto_id=producto_id,
+                    puntaje=peso * factor,
+                    periodo=periodo,
+                    actualizado=ahora,
+                )
+                for producto_id, peso in pesos.items()
+                if producto_id not in existentes
+            ], ignore_conflicts=True)
+
+
+def registrar_evento_tendencia(tipo_evento, producto_id=None, pedido_id=None, ahora=None, cantidad=1):
+    """
+    Suma el peso de un evento; una compra suma por cada producto del pedido.
+    cantidad es el peso de muestreo del evento (eventos que representa).
+    """
+    peso = PESOS.get(tipo_evento, 0) * cantidad
+    if not peso:
+        return
+    if tipo_evento == 'compra_completada':
+        if not pedido_id:
+            return
+        pesos = defaultdict(float)
+        for item_producto_id in ItemPedido.objects.filter(pedido_id=pedido_id).values_list('producto_id', flat=True):
+            pesos[item_producto_id] += peso
+        sumar_tendencias(pesos, ahora)
+    elif producto_id:
+        sumar_tendencias({producto_id: peso}, ahora)
+
+
+def mantener_tendencias(ahora=None):
+    """
+    Lleva las filas de períodos anteriores a la base actual y borra los
+    productos cuyo puntaje ya decayó por debajo del mínimo.
+    Devuelve (reescaladas, eliminadas).
+    """
+    ahora = ahora or timezone.now()
+    periodo = periodo_actual(ahora)
+    reescaladas = TendenciaProducto.objects.filter(
+        periodo__lt=periodo
+    ).update(puntaje=_reescalado(periodo), periodo=periodo)
+    eliminadas, _ = TendenciaProducto.objects.filter(
+        puntaje__lt=PUNTAJE_MINIMO * _factor(periodo, ahora)
+    ).delete()
+    return reescaladas, eliminadas
+
+
+def reconstruir_tendencias(dias=7):
+    """
+    Recalcula los puntajes desde la tabla de eventos (agrupados por hora).
+    Para la carga inicial o después de perder la tabla de tendencias.
+    """
+    ahora = timezone.now()
+    periodo = periodo_actual(ahora)
+    base = EPOCA + timedelta(hours=periodo * PERIODO_HORAS)
+    desde = ahora - timedelta(days=dias)
+    puntajes = defaultdict(float)
+
+    def sumar(producto_id, hora, peso):
+        # Mitad de la hora como instante representativo
+        horas = ((hora - base).total_seconds() + 1800) / 3600
+        puntajes[producto_id] += peso * 2 ** (horas / VIDA_MEDIA_HORAS)
+
+    eventos = EventoUsuario.objects.filter(
+        timestamp__gte=desde,
+        tipo_evento__in=['vista_producto', 'agregar_carrito'],
+        producto__isnull=False
+    ).annotate(hora=TruncHour('timestamp')).values('producto_id', 'tipo_evento', 'hora').annotate(
+        cantidad=Sum('peso')
+    ).values_list('producto_id', 'tipo_evento', 'hora', 'cantidad')
+    for producto_id, tipo_evento, hora, cantidad in eventos:
+        sumar(producto_id, hora, PESOS[tipo_evento] * cantidad)
+
+    compras = ItemPedido.objects.filter(
+        pedido__fecha_pedido__gte=desde,
+        pedido__estado__in=ESTADOS_VENTA
+    ).annotate(hora=TruncHour('pedido__fecha_pedido')).values('producto_id', 'hora').annotate(
+        cantidad=Count('id')
+    ).values_list('producto_id', 'hora', 'cantidad')
+    for producto_id, hora, cantidad in compras:
+        sumar(producto_id, hora, PESOS['compra_completada'] * cantidad)
+
+    minimo = PUNTAJE_MINIMO * _factor(periodo, ahora)
+    with transaction.atomic():
+        TendenciaProducto.objects.all().delete()
+        TendenciaProducto.objects.bulk_create([
+            TendenciaProducto(producto_id=producto_id, puntaje=puntaje, periodo=periodo, actualizado=ahora)
+            for producto_id, puntaje in puntajes.items()
+            if puntaje >= minimo
+        ], batch_size=2000)
+    return len(puntajes)
+
+
+def productos_en_tendencia(limite=12):
+    """
+    [(producto_id, puntaje actual)] de mayor a menor: una lectura del índice
+    (periodo, -puntaje), cacheada durante un minuto.
+    """
+    clave = f'tendencias:{limite}'
+    resultado = cache.get(clave)
+    if resultado is not None:
+        return resultado
+
+    ahora = timezone.now()
+    periodo = periodo_actual(ahora)
+    factor = _factor(periodo, ahora)
+    filas = TendenciaProducto.objects.filter(
+        periodo=periodo,
+        producto__activo=True,
+        puntaje__gte=PUNTAJE_MINIMO * factor
+    ).order_by('-puntaje').values_list('producto_id', 'puntaje')[:limite]
+    resultado = [(producto_id, round(puntaje / factor, 3)) for producto_id, puntaje in filas]
+    cache.set(clave, resultado, CACHE_SEGUNDOS)
+    return resultado
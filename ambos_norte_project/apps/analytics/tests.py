@@ -1,3 +1,62 @@
-from django.test import TestCase
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
 
-# Create your tests here.
+
+class MigracionEventosCompactosTests(TransactionTestCase):
+    """0008/0009: tipo_evento, session_id y user_agent pasan a códigos y diccionarios y vuelven"""
+
+    antes = [('analytics', '0007_evento_peso')]
+    despues = [('analytics', '0009_eventos_compactos_columnas')]
+
+    def migrar(self, destino):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(destino)
+        return executor.loader.project_state(destino).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_ida_y_vuelta(self):
+        apps = self.migrar(self.antes)
+        EventoUsuario = apps.get_model('analytics', 'EventoUsuario')
+        firefox = 'Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0'
+        iphone = 'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) Mobile/15E148 Safari/604.1'
+        EventoUsuario.objects.bulk_create([
+            EventoUsuario(tipo_evento='vista_producto', session_id='s1', user_agent=firefox),
+            EventoUsuario(tipo_evento='busqueda', session_id='s1', user_agent=firefox),
+            EventoUsuario(tipo_evento='login', session_id='s2', user_agent=iphone),
+            EventoUsuario(tipo_evento='compra_completada', session_id=None, user_agent=None),
+            EventoUsuario(tipo_evento='tipo_viejo', session_id='s3', user_agent=firefox),
+        ])
+
+        apps = self.migrar(self.despues)
+        EventoUsuario = apps.get_model('analytics', 'EventoUsuario')
+        AgenteUsuario = apps.get_model('analytics', 'AgenteUsuario')
+        SesionVisitante = apps.get_model('analytics', 'SesionVisitante')
+
+        # El tipo desconocido no tiene código: se descarta
+        self.assertEqual(
+            list(EventoUsuario.objects.order_by('pk').values_list('tipo_evento', 'sesion__clave')),
+            [('vista_producto', 's1'), ('busqueda', 's1'), ('login', 's2'), ('compra_completada', None)]
+        )
+        self.assertEqual(SesionVisitante.objects.count(), 2)
+        self.assertEqual(
+            set(AgenteUsuario.objects.values_list('navegador', 'sistema', 'dispositivo')),
+            {('Firefox', 'Linux', 'escritorio'), ('Safari', 'iOS', 'movil')}
+        )
+        self.assertEqual(EventoUsuario.objects.filter(agente__isnull=True).count(), 1)
+
+        apps = self.migrar(self.antes)
+        EventoUsuario = apps.get_model('analytics', 'EventoUsuario')
+        self.assertEqual(
+            list(EventoUsuario.objects.order_by('pk').values_list('tipo_evento', 'session_id', 'user_agent')),
+            [
+                ('vista_producto', 's1', firefox),
+                ('busqueda', 's1', firefox),
+                ('login', 's2', iphone),
+                ('compra_completada', None, None),
+            ]
+        )
@@ -1,5 +1,9 @@
+from django.utils import timezone
 from .models import EventoUsuario
-from django.db.models import Count, Sum, Avg
+from .captura import peso_request, contar_por_tipo
+from .actividad import registrar_actividades
+from .tendencias import sumar_tendencias, PESOS as PESOS_TENDENCIA
+from django.db.models import Sum, Avg
 from datetime import datetime, timedelta
 
 
@@ -9,21 +13,27 @@ class AnalyticsTracker:
     """
     
     @staticmethod
-    def track_busqueda(query, usuario=None, session_id=None, resultados_count=0):
+    def track_busqueda(query, usuario=None, session_id=None, resultados_count=0, request=None):
         """
-        Registrar búsqueda de usuario
+        Registrar búsqueda de usuario (salvo bots y búsquedas repetidas,
+        ver captura.py)
         
         Uso:
         AnalyticsTracker.track_busqueda(
             query="remera negra",
             usuario=request.user,
-            resultados_count=15
+            resultados_count=15,
+            request=request
         )
         """
+        peso = peso_request('busqueda', request, session_id, objeto=' '.join(query.lower().split()))
+        if not peso:
+            return
         EventoUsuario.objects.create(
             usuario=usuario,
             tipo_evento='busqueda',
             session_id=session_id,
+            peso=peso,
             metadata={
                 'query': query,
                 'resultados': resultados_count
@@ -33,21 +43,27 @@ class AnalyticsTracker:
     @staticmethod
     def track_vista_producto(producto, usuario=None, session_id=None, request=None):
         """
-        Registrar vista de producto
+        Registrar vista de producto (salvo bots y vistas repetidas, ver
+        captura.py)
         
         Uso:
         AnalyticsTracker.track_vista_producto(
             producto=producto_obj,
             usuario=request.user,
-            session_id=request.session.session_key
+            session_id=visitante_id(request),
+            request=request
         )
         """
+        peso = peso_request('vista_producto', request, session_id, objeto=producto.pk)
+        if not peso:
+            return
         kwargs = {
             'usuario': usuario,
             'tipo_evento': 'vista_producto',
             'producto': producto,
             'categoria': producto.categoria,
             'session_id': session_id,
+            'peso': peso,
         }
         
         if request:
@@ -73,6 +89,37 @@ class AnalyticsTracker:
             }
         )
     
+    @staticmethod
+    def track_agregar_carrito_lote(items, usuario=None, session_id=None):
+        """
+        Registrar varios items agregados al carrito con un solo INSERT
+        (los bulk_create no disparan la señal post_save de ItemCarrito)
+        """
+        ahora = timezone.now()
+        EventoUsuario.objects.bulk_create([
+            EventoUsuario(
+                usuario=usuario,
+                tipo_evento='agregar_carrito',
+                producto_id=item.producto_id,
+                categoria_id=item.producto.categoria_id,
+                session_id=session_id,
+                metadata={
+                    'cantidad': item.cantidad,
+                    'precio_unitario': float(item.precio_unitario)
+                },
+                timestamp=ahora
+            )
+            for item in items
+        ])
+        registrar_actividades([
+            (getattr(usuario, 'id', None), session_id, item.producto_id, 'agregar_carrito', ahora)
+            for item in items
+        ])
+        sumar_tendencias(
+            {item.producto_id: PESOS_TENDENCIA['agregar_carrito'] for item in items},
+            ahora
+        )
+    
     @staticmethod
     def track_inicio_checkout(pedido, usuario=None, session_id=None):
         """
@@ -131,7 +178,7 @@ class AnalyticsTracker:
             timestamp__gte=fecha_desde,
             producto__isnull=False
         ).values('producto', 'producto__nombre').annotate(
-            vistas=Count('id')
+            vistas=Sum('peso')
         ).order_by('-vistas')[:limite]
     
     @staticmethod
@@ -140,10 +187,12 @@ class AnalyticsTracker:
         Calcular tasa de conversión general
         """
         fecha_desde = datetime.now() - timedelta(days=dias)
-        eventos = EventoUsuario.objects.filter(timestamp__gte=fecha_desde)
-        
-        vistas = eventos.filter(tipo_evento='vista_producto').count()
-        compras = eventos.filter(tipo_evento='compra_completada').count()
+        conteo = contar_por_tipo(
+            EventoUsuario.objects.filter(timestamp__gte=fecha_desde),
+            ['vista_producto', 'compra_completada']
+        )
+        vistas = conteo['vista_producto']
+        compras = conteo['compra_completada']
         
         if vistas > 0:
             return (compras / vistas) * 100
@@ -21,8 +21,13 @@ from .serializers import (
     DatosGoogleAnalyticsSerializer,
     ResumenMetricasSerializer,
     TopProductoSerializer,
-    EmbudoConversionSerializer
+    EmbudoConversionSerializer,
+    EVENTO_USUARIO_RAPIDO
 )
+from ambos_norte.serializacion_rapida import Contexto
+from apps.usuarios.serializer import datos_usuarios_rapido
+from .visitante import visitante_id
+from .captura import contar_por_tipo, peso_request
 
 
 class EventoUsuarioViewSet(viewsets.ModelViewSet):
@@ -39,7 +44,7 @@ class EventoUsuarioViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         queryset = EventoUsuario.objects.select_related(
-            'usuario', 'producto', 'categoria', 'pedido'
+            'usuario', 'producto', 'categoria', 'pedido', 'sesion', 'agente'
         )
         
         # Filtros opcionales
@@ -49,6 +54,9 @@ class EventoUsuarioViewSet(viewsets.ModelViewSet):
         producto_id = self.request.query_params.get('producto_id', None)
         
         if tipo_evento:
+            # tipo_evento se guarda como código: un nombre desconocido no tiene filas
+            if tipo_evento not in EventoUsuario.CODIGOS_TIPO_EVENTO:
+                return queryset.none()
             queryset = queryset.filter(tipo_evento=tipo_evento)
         
         if fecha_desde:
@@ -62,12 +70,38 @@ class EventoUsuarioViewSet(viewsets.ModelViewSet):
         
         # Admin ve todo, usuarios normales solo sus eventos
         if not self.request.user.is_staff:
-            queryset = queryset.filter(
-                Q(usuario=self.request.user) | Q(session_id=self.request.session.session_key)
-            )
+            filtro = Q(usuario=self.request.user)
+            visitante = visitante_id(self.request)
+            if visitante:
+                filtro |= Q(sesion__clave=visitante)
+            queryset = queryset.filter(filtro)
         
         return queryset
     
+    def _peso_captura(self, datos):
+        """Peso del evento enviado por el cliente según la política de captura (0 = descartar)"""
+        producto = datos.get('producto')
+        metadata = datos.get('metadata') or {}
+        objeto = producto.pk if producto else (metadata.get('query') if isinstance(metadata, dict) else None)
+        return peso_request(
+            datos['tipo_evento'],
+            self.request,
+            datos.get('session_id') or visitante_id(self.request),
+            objeto=objeto
+        )
+    
+    def perform_create(self, serializer):
+        # Bots y vistas repetidas no se guardan (la respuesta no lleva id)
+        peso = self._peso_captura(serializer.validated_data)
+        if peso:
+            serializer.save(peso=peso)
+    
+    def list(self, request, *args, **kwargs):
+        """Listado armado desde values(): misma salida que EventoUsuarioSerializer"""
+        filas = list(EVENTO_USUARIO_RAPIDO.valores(self.filter_queryset(self.get_queryset())))
+        contexto = Contexto(request, **datos_usuarios_rapido({fila['usuario'] for fila in filas if fila['usuario']}))
+        return Response(EVENTO_USUARIO_RAPIDO.serializar(filas, contexto))
+    
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
         """
@@ -90,9 +124,17 @@ class EventoUsuarioViewSet(viewsets.ModelViewSet):
         )
         
         if serializer.is_valid():
-            serializer.save()
+            creados = 0
+            for datos in serializer.validated_data:
+                peso = self._peso_captura(datos)
+                if peso:
+                    serializer.child.create({**datos, 'peso': peso})
+                    creados += 1
             return Response(
-                {'mensaje': f'{len(eventos_data)} eventos creados exitosamente'},
+                {
+                    'mensaje': f'{creados} eventos creados exitosamente',
+                    'descartados': len(serializer.validated_data) - creados
+                },
                 status=status.HTTP_201_CREATED
             )
         
@@ -302,13 +344,15 @@ class ReportesViewSet(viewsets.ViewSet):
         dias = int(request.query_params.get('dias', 30))
         fecha_desde = timezone.now() - timedelta(days=dias)
         
-        # Contar eventos por tipo
-        eventos = EventoUsuario.objects.filter(timestamp__gte=fecha_desde)
-        
-        visitas = eventos.filter(tipo_evento='vista_producto').count()
-        agregados = eventos.filter(tipo_evento='agregar_carrito').count()
-        checkouts = eventos.filter(tipo_evento='inicio_checkout').count()
-        compras = eventos.filter(tipo_evento='compra_completada').count()
+        # Contar eventos por tipo (suma de pesos de muestreo, ver captura.py)
+        conteo = contar_por_tipo(
+            EventoUsuario.objects.filter(timestamp__gte=fecha_desde),
+            ['vista_producto', 'agregar_carrito', 'inicio_checkout', 'compra_completada']
+        )
+        visitas = conteo['vista_producto']
+        agregados = conteo['agregar_carrito']
+        checkouts = conteo['inicio_checkout']
+        compras = conteo['compra_completada']
         
         # Calcular tasas
         tasa_vista_carrito = (agregados / visitas * 100) if visitas > 0 else 0
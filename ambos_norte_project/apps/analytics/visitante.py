@@ -0,0 +1,49 @@
+import uuid
+from django.conf import settings
+from django.core import signing
+
+
+COOKIE_NOMBRE = getattr(settings, 'ANALYTICS_VISITANTE_COOKIE', 'visitante')
+COOKIE_MAX_AGE = getattr(settings, 'ANALYTICS_VISITANTE_MAX_AGE', 60 * 60 * 24 * 365)
+SALT = 'apps.analytics.visitante'
+
+_firmador = signing.Signer(salt=SALT)
+
+
+def leer_visitante(request):
+    """Id del visitante de la cookie firmada (None si no existe o fue alterada)"""
+    valor = request.COOKIES.get(COOKIE_NOMBRE)
+    if not valor:
+        return None
+    try:
+        return _firmador.unsign(valor)
+    except signing.BadSignature:
+        return None
+
+
+def nuevo_visitante():
+    return uuid.uuid4().hex
+
+
+def guardar_visitante(response, visitante):
+    response.set_cookie(
+        COOKIE_NOMBRE,
+        _firmador.sign(visitante),
+        max_age=COOKIE_MAX_AGE,
+        httponly=True,
+        samesite='Lax',
+        secure=settings.SESSION_COOKIE_SECURE,
+    )
+    return response
+
+
+def visitante_id(request):
+    """
+    Identificador anónimo para analytics (se guarda en session_id de los
+    eventos). Lo asigna AnalyticsMiddleware; sin el middleware se usa la
+    cookie o la sesión existente, nunca se crea una sesión nueva.
+    """
+    visitante = getattr(request, 'visitante_id', None) or leer_visitante(request)
+    if visitante:
+        return visitante
+    return request.session.session_key if hasattr(request, 'session') else None
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carrito', '0006_alter_itemcarrito_unique_together_carrito_activo_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carrito',
+            index=models.Index(fields=['usuario', 'activo', '-fecha_creacion'], name='carritos_usuario_419ac5_idx'),
+        ),
+    ]
@@ -23,6 +23,10 @@ class Carrito(models.Model):
         db_table = 'carritos'
         verbose_name = 'Carrito'
         verbose_name_plural = 'Carritos'
+        indexes = [
+            # Carrito activo del usuario (el anónimo vive en una cookie firmada)
+            models.Index(fields=['usuario', 'activo', '-fecha_creacion']),
+        ]
     
     def __str__(self):
         if self.usuario:
@@ -31,7 +35,7 @@ class Carrito(models.Model):
     
     def calcular_subtotal(self):
         """Calcula el subtotal del carrito"""
-        return sum(item.subtotal for item in self.items.all())
+        return sum(item.subtotal() for item in self.items.all())
     
     def total_items(self):
         """Cuenta total de items en el carrito"""
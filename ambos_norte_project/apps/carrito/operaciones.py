@@ -0,0 +1,85 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from apps.catalogo.models import Producto
+from .models import ItemCarrito
+
+
+def aplicar_operaciones(carrito, operaciones):
+    """
+    Aplica una lista de operaciones sobre un carrito con un número fijo de consultas.
+
+    Cada operación es {'accion': 'agregar'|'actualizar'|'quitar',
+    'producto_id': int, 'cantidad': int}. Se valida el stock de todos los
+    productos con una sola consulta y los cambios se guardan con un
+    bulk_create, un bulk_update y un único delete. Si alguna operación es
+    inválida no se aplica ninguna.
+
+    Devuelve (nuevos, actualizados, ids_quitados).
+    """
+    ids = {op['producto_id'] for op in operaciones}
+    productos = Producto.objects.filter(id__in=ids, activo=True).in_bulk()
+    existentes = {
+        item.producto_id: item
+        for item in carrito.items.filter(producto_id__in=ids)
+    }
+
+    cantidades = {producto_id: item.cantidad for producto_id, item in existentes.items()}
+    errores = []
+    for posicion, op in enumerate(operaciones):
+        producto_id = op['producto_id']
+        accion = op['accion']
+        cantidad = op.get('cantidad', 1)
+
+        if accion == 'quitar':
+            cantidades[producto_id] = 0
+            continue
+
+        if producto_id not in productos:
+            errores.append(f"Operación {posicion}: producto {producto_id} no existe o no está activo")
+            continue
+
+        if accion == 'agregar':
+            cantidades[producto_id] = cantidades.get(producto_id, 0) + cantidad
+        else:
+            cantidades[producto_id] = cantidad
+
+    for producto_id, cantidad in cantidades.items():
+        producto = productos.get(producto_id)
+        if cantidad > 0 and producto is not None and not producto.tiene_stock(cantidad):
+            errores.append(
+                f"Stock insuficiente para {producto.nombre}. "
+                f"Disponible: {producto.stock}"
+            )
+
+    if errores:
+        raise ValidationError(errores)
+
+    nuevos = []
+    actualizados = []
+    quitados = []
+    for producto_id, cantidad in cantidades.items():
+        item = existentes.get(producto_id)
+        if cantidad <= 0:
+            if item is not None:
+                quitados.append(producto_id)
+        elif item is None:
+            producto = productos[producto_id]
+            nuevos.append(ItemCarrito(
+                carrito=carrito,
+                producto=producto,
+                cantidad=cantidad,
+                precio_unitario=producto.precio,
+            ))
+        elif item.cantidad != cantidad:
+            item.cantidad = cantidad
+            actualizados.append(item)
+
+    with transaction.atomic():
+        if nuevos:
+            ItemCarrito.objects.bulk_create(nuevos)
+        if actualizados:
+            ItemCarrito.objects.bulk_update(actualizados, ['cantidad'])
+        if quitados:
+            carrito.items.filter(producto_id__in=quitados).delete()
+
+    return nuevos, actualizados, quitados
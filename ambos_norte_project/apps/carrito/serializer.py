@@ -31,3 +31,20 @@ class CarritoSerializer(serializers.ModelSerializer):
 
     def get_total_items(self, obj):
         return obj.total_items()
+
+
+class OperacionCarritoSerializer(serializers.Serializer):
+    accion = serializers.ChoiceField(choices=['agregar', 'actualizar', 'quitar'])
+    producto_id = serializers.IntegerField()
+    cantidad = serializers.IntegerField(min_value=0, default=1)
+
+
+class OperacionesCarritoSerializer(serializers.Serializer):
+    """Entrada de la acción operaciones: lista de cambios y/o un pedido a repetir"""
+    operaciones = OperacionCarritoSerializer(many=True, required=False)
+    pedido_id = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if not attrs.get('operaciones') and not attrs.get('pedido_id'):
+            raise serializers.ValidationError('Se requiere "operaciones" o "pedido_id"')
+        return attrs
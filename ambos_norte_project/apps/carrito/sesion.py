@@ -0,0 +1,193 @@
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from apps.catalogo.models import Producto
+from apps.catalogo.serializers import ProductoSerializer
+from .models import Carrito, ItemCarrito
+
+
+COOKIE_NOMBRE = getattr(settings, 'CARRITO_SESION_COOKIE', 'carrito_anonimo')
+COOKIE_MAX_AGE = getattr(settings, 'CARRITO_SESION_MAX_AGE', 60 * 60 * 24 * 14)
+MAX_ITEMS = getattr(settings, 'CARRITO_SESION_MAX_ITEMS', 50)
+SALT = 'apps.carrito.sesion'
+
+
+class CarritoSesion:
+    """
+    Carrito de visitantes anónimos guardado en una cookie firmada.
+
+    No escribe nada en la base de datos: los items viven en la cookie como
+    {producto_id: cantidad} y recién se pasan a un Carrito real al hacer
+    login o checkout (ver promover_carrito_sesion).
+    """
+
+    def __init__(self, items=None):
+        self.items = dict(items or {})
+        self.modificado = False
+
+    @classmethod
+    def desde_request(cls, request):
+        """Lee el carrito de la cookie firmada (vacío si no existe o fue alterada)"""
+        datos = request.COOKIES.get(COOKIE_NOMBRE)
+        items = {}
+        if datos:
+            try:
+                contenido = signing.loads(datos, salt=SALT, max_age=COOKIE_MAX_AGE)
+                for producto_id, cantidad in contenido.items():
+                    if int(cantidad) > 0:
+                        items[int(producto_id)] = int(cantidad)
+            except (signing.BadSignature, ValueError, TypeError, AttributeError):
+                items = {}
+        return cls(items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def agregar(self, producto, cantidad=1):
+        """Suma unidades de un producto validando stock"""
+        nueva_cantidad = self.items.get(producto.id, 0) + cantidad
+        return self.actualizar(producto, nueva_cantidad)
+
+    def actualizar(self, producto, cantidad):
+        """Fija la cantidad de un producto (0 lo quita)"""
+        if cantidad <= 0:
+            return self.quitar(producto.id)
+        if not producto.tiene_stock(cantidad):
+            raise ValueError(
+                f"Stock insuficiente para {producto.nombre}. "
+                f"Disponible: {producto.stock}"
+            )
+        if producto.id not in self.items and len(self.items) >= MAX_ITEMS:
+            raise ValueError(f"El carrito admite hasta {MAX_ITEMS} productos distintos")
+        self.items[producto.id] = cantidad
+        self.modificado = True
+
+    def quitar(self, producto_id):
+        if self.items.pop(int(producto_id), None) is not None:
+            self.modificado = True
+
+    def vaciar(self):
+        if self.items:
+            self.items = {}
+            self.modificado = True
+
+    def total_items(self):
+        return sum(self.items.values())
+
+    def resumen(self, request=None):
+        """
+        Arma la misma estructura que CarritoSerializer con una sola consulta
+        de productos (los precios son siempre los actuales)
+        """
+        productos = Producto.objects.filter(
+            id__in=self.items.keys(), activo=True
+        ).in_bulk()
+
+        items = []
+        subtotal = 0
+        for producto_id, cantidad in self.items.items():
+            producto = productos.get(producto_id)
+            if producto is None:
+                continue
+            item_subtotal = cantidad * producto.precio
+            subtotal += item_subtotal
+            items.append({
+                'producto': ProductoSerializer(producto, context={'request': request}).data,
+                'cantidad': cantidad,
+                'precio_unitario': str(producto.precio),
+                'subtotal': str(item_subtotal),
+            })
+
+        return {
+            'items': items,
+            'subtotal': str(subtotal),
+            'total_items': sum(item['cantidad'] for item in items),
+        }
+
+    def guardar(self, response):
+        """Escribe (o borra) la cookie en la respuesta si hubo cambios"""
+        if not self.modificado:
+            return response
+        if not self.items:
+            response.delete_cookie(COOKIE_NOMBRE)
+            return response
+        datos = signing.dumps(
+            {str(producto_id): cantidad for producto_id, cantidad in self.items.items()},
+            salt=SALT,
+            compress=True,
+        )
+        response.set_cookie(
+            COOKIE_NOMBRE,
+            datos,
+            max_age=COOKIE_MAX_AGE,
+            httponly=True,
+            samesite='Lax',
+        )
+        return response
+
+
+def obtener_carrito_activo(usuario):
+    """Devuelve el carrito activo del usuario, creándolo si no existe"""
+    carrito = Carrito.objects.filter(usuario=usuario, activo=True).order_by('-fecha_creacion').first()
+    if carrito is None:
+        carrito = Carrito.objects.create(usuario=usuario)
+    return carrito
+
+
+def fusionar_items(carrito, items):
+    """
+    Fusiona {producto_id: cantidad} en un Carrito de la base de datos.
+
+    Las cantidades se suman a las existentes y se recortan al stock
+    disponible. Usa una consulta de productos, una de items existentes y
+    un bulk_create/bulk_update.
+    """
+    if not items:
+        return carrito
+
+    productos = Producto.objects.filter(id__in=items.keys(), activo=True).in_bulk()
+    existentes = {
+        item.producto_id: item
+        for item in carrito.items.filter(producto_id__in=productos.keys())
+    }
+
+    nuevos = []
+    actualizados = []
+    for producto_id, cantidad in items.items():
+        producto = productos.get(producto_id)
+        if producto is None or producto.stock <= 0:
+            continue
+        item = existentes.get(producto_id)
+        if item is None:
+            nuevos.append(ItemCarrito(
+                carrito=carrito,
+                producto=producto,
+                cantidad=min(cantidad, producto.stock),
+                precio_unitario=producto.precio,
+            ))
+        else:
+            item.cantidad = min(item.cantidad + cantidad, producto.stock)
+            actualizados.append(item)
+
+    with transaction.atomic():
+        if nuevos:
+            ItemCarrito.objects.bulk_create(nuevos)
+        if actualizados:
+            ItemCarrito.objects.bulk_update(actualizados, ['cantidad'])
+    return carrito
+
+
+def promover_carrito_sesion(request, usuario, response=None):
+    """
+    Pasa el carrito anónimo de la cookie al carrito del usuario.
+    Llamar al hacer login/registro o al iniciar el checkout.
+    """
+    carrito_sesion = CarritoSesion.desde_request(request)
+    if not carrito_sesion:
+        return None
+
+    carrito = fusionar_items(obtener_carrito_activo(usuario), carrito_sesion.items)
+    carrito_sesion.vaciar()
+    if response is not None:
+        carrito_sesion.guardar(response)
+    return carrito
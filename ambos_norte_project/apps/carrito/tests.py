@@ -1,3 +1,173 @@
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from apps.catalogo.models import Categoria, Producto
+from apps.usuarios.models import Usuario
+from .models import Carrito, ItemCarrito
+from .operaciones import aplicar_operaciones
+from .sesion import COOKIE_NOMBRE, fusionar_items, obtener_carrito_activo
 
-# Create your tests here.
+
+def crear_producto(nombre, stock=10, activo=True):
+    categoria = Categoria.objects.get_or_create(nombre='Ambos')[0]
+    return Producto.objects.create(
+        categoria=categoria, nombre=nombre, precio=Decimal('1000.00'), stock=stock, activo=activo
+    )
+
+
+class AplicarOperacionesTests(TestCase):
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='cliente')
+        self.carrito = Carrito.objects.create(usuario=self.usuario)
+        self.ambo = crear_producto('Ambo')
+        self.chaqueta = crear_producto('Chaqueta', stock=3)
+        self.cofia = crear_producto('Cofia')
+        ItemCarrito.objects.create(carrito=self.carrito, producto=self.ambo, cantidad=2, precio_unitario=Decimal('1000.00'))
+        ItemCarrito.objects.create(carrito=self.carrito, producto=self.cofia, cantidad=1, precio_unitario=Decimal('1000.00'))
+
+    def cantidades(self):
+        return dict(self.carrito.items.values_list('producto_id', 'cantidad'))
+
+    def test_agrega_actualiza_y_quita_en_un_lote(self):
+        nuevos, actualizados, quitados = aplicar_operaciones(self.carrito, [
+            {'accion': 'agregar', 'producto_id': self.chaqueta.id, 'cantidad': 1},
+            {'accion': 'agregar', 'producto_id': self.chaqueta.id, 'cantidad': 1},
+            {'accion': 'actualizar', 'producto_id': self.ambo.id, 'cantidad': 5},
+            {'accion': 'quitar', 'producto_id': self.cofia.id},
+        ])
+
+        self.assertEqual([item.producto_id for item in nuevos], [self.chaqueta.id])
+        self.assertEqual([item.producto_id for item in actualizados], [self.ambo.id])
+        self.assertEqual(quitados, [self.cofia.id])
+        self.assertEqual(self.cantidades(), {self.ambo.id: 5, self.chaqueta.id: 2})
+
+    def test_consultas_no_dependen_de_la_cantidad_de_operaciones(self):
+        def contar(cantidad):
+            carrito = Carrito.objects.create(usuario=self.usuario)
+            ItemCarrito.objects.create(carrito=carrito, producto=self.ambo, cantidad=1, precio_unitario=Decimal('1000.00'))
+            operaciones = [
+                {'accion': 'agregar', 'producto_id': crear_producto(f'Producto {cantidad}-{i}').id, 'cantidad': 1}
+                for i in range(cantidad)
+            ] + [{'accion': 'actualizar', 'producto_id': self.ambo.id, 'cantidad': 3}]
+            with CaptureQueriesContext(connection) as consultas:
+                aplicar_operaciones(carrito, operaciones)
+            return len(consultas)
+
+        self.assertEqual(contar(2), contar(20))
+
+    def test_sin_stock_no_aplica_nada(self):
+        with self.assertRaises(ValidationError) as contexto:
+            aplicar_operaciones(self.carrito, [
+                {'accion': 'actualizar', 'producto_id': self.ambo.id, 'cantidad': 4},
+                {'accion': 'agregar', 'producto_id': self.chaqueta.id, 'cantidad': 4},
+            ])
+
+        self.assertIn('Chaqueta', contexto.exception.messages[0])
+        self.assertEqual(self.cantidades(), {self.ambo.id: 2, self.cofia.id: 1})
+
+    def test_producto_inactivo_o_inexistente(self):
+        inactivo = crear_producto('Viejo', activo=False)
+        with self.assertRaises(ValidationError) as contexto:
+            aplicar_operaciones(self.carrito, [
+                {'accion': 'agregar', 'producto_id': inactivo.id, 'cantidad': 1},
+                {'accion': 'agregar', 'producto_id': 999999, 'cantidad': 1},
+            ])
+        self.assertEqual(len(contexto.exception.messages), 2)
+
+    def test_endpoint_operaciones(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.usuario)
+
+        respuesta = cliente.post(f'/api/carrito/carrito/{self.carrito.id}/operaciones/', {
+            'operaciones': [{'accion': 'agregar', 'producto_id': self.chaqueta.id, 'cantidad': 9}]
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+
+        respuesta = cliente.post(f'/api/carrito/carrito/{self.carrito.id}/operaciones/', {
+            'operaciones': [{'accion': 'agregar', 'producto_id': self.chaqueta.id, 'cantidad': 2}]
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.cantidades()[self.chaqueta.id], 2)
+
+    def test_repetir_pedido_sin_usuario(self):
+        carrito = Carrito.objects.create(session_id='anonimo')
+
+        respuesta = APIClient().post(
+            f'/api/carrito/carrito/{carrito.id}/operaciones/', {'pedido_id': 1}, format='json'
+        )
+
+        self.assertEqual(respuesta.status_code, 403)
+        self.assertFalse(carrito.items.exists())
+
+
+class CarritoSesionTests(TestCase):
+
+    def setUp(self):
+        self.ambo = crear_producto('Ambo', stock=5)
+        self.chaqueta = crear_producto('Chaqueta', stock=3)
+        self.cliente = APIClient()
+
+    def agregar(self, producto, cantidad):
+        return self.cliente.post(
+            '/api/carrito/carrito-sesion/agregar_item/',
+            {'producto_id': producto.id, 'cantidad': cantidad}, format='json'
+        )
+
+    def test_carrito_anonimo_vive_en_la_cookie(self):
+        self.assertEqual(self.agregar(self.ambo, 2).status_code, 200)
+        self.assertEqual(self.agregar(self.ambo, 1).status_code, 200)
+
+        self.assertIn(COOKIE_NOMBRE, self.cliente.cookies)
+        self.assertFalse(Carrito.objects.exists())
+        respuesta = self.cliente.get('/api/carrito/carrito-sesion/')
+        self.assertEqual(respuesta.data['total_items'], 3)
+
+    def test_sin_stock_y_cookie_alterada(self):
+        self.assertEqual(self.agregar(self.chaqueta, 4).status_code, 400)
+
+        self.cliente.cookies[COOKIE_NOMBRE] = 'no-firmada'
+        self.assertEqual(self.cliente.get('/api/carrito/carrito-sesion/').data['total_items'], 0)
+
+    def test_quitar_item_valida_el_id(self):
+        self.agregar(self.ambo, 1)
+        respuesta = self.cliente.post('/api/carrito/carrito-sesion/quitar_item/', {'producto_id': 'abc'}, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+
+        respuesta = self.cliente.post('/api/carrito/carrito-sesion/quitar_item/', {'producto_id': self.ambo.id}, format='json')
+        self.assertEqual(respuesta.data['total_items'], 0)
+
+    def test_promover_fusiona_con_el_carrito_del_usuario(self):
+        usuario = Usuario.objects.create_user(username='cliente')
+        carrito = obtener_carrito_activo(usuario)
+        ItemCarrito.objects.create(carrito=carrito, producto=self.ambo, cantidad=4, precio_unitario=Decimal('1000.00'))
+        self.agregar(self.ambo, 3)
+        self.agregar(self.chaqueta, 2)
+
+        self.cliente.force_authenticate(usuario)
+        respuesta = self.cliente.post('/api/carrito/carrito-sesion/promover/')
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['id'], carrito.id)
+        # Las cantidades se suman y se recortan al stock disponible
+        self.assertEqual(
+            dict(carrito.items.values_list('producto_id', 'cantidad')),
+            {self.ambo.id: 5, self.chaqueta.id: 2}
+        )
+        # La cookie se borra: promover otra vez no vuelve a sumar
+        self.assertEqual(self.cliente.cookies[COOKIE_NOMBRE].value, '')
+        self.cliente.post('/api/carrito/carrito-sesion/promover/')
+        self.assertEqual(carrito.items.get(producto=self.chaqueta).cantidad, 2)
+
+    def test_fusionar_ignora_inactivos_y_sin_stock(self):
+        usuario = Usuario.objects.create_user(username='cliente')
+        carrito = obtener_carrito_activo(usuario)
+        inactivo = crear_producto('Viejo', activo=False)
+        agotado = crear_producto('Agotado', stock=0)
+
+        fusionar_items(carrito, {self.ambo.id: 9, inactivo.id: 1, agotado.id: 1, 999999: 1})
+
+        self.assertEqual(dict(carrito.items.values_list('producto_id', 'cantidad')), {self.ambo.id: 5})
@@ -3,14 +3,26 @@ from django.core.exceptions import ValidationError
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from .models import Carrito, ItemCarrito
 from apps.catalogo.models import Producto
-from .serializer import CarritoSerializer, ItemCarritoSerializer
+from apps.pedidos.models import ItemPedido
+from apps.analytics.utils import AnalyticsTracker
+from .serializer import CarritoSerializer, ItemCarritoSerializer, OperacionesCarritoSerializer
+from .operaciones import aplicar_operaciones
+from .sesion import CarritoSesion, obtener_carrito_activo, promover_carrito_sesion
 
 class CarritoViewSet(viewsets.ModelViewSet):
     queryset = Carrito.objects.all()
     serializer_class = CarritoSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            # El serializer anida items y productos: dos consultas fijas en vez de dos por carrito
+            queryset = queryset.prefetch_related('items__producto')
+        return queryset
+
     def perform_create(self, serializer):
         serializer.save(usuario=self.request.user)
     
@@ -37,6 +49,64 @@ class CarritoViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['post'])
+    def operaciones(self, request, pk=None):
+        """
+        Aplica varias altas/modificaciones/bajas en una sola request
+        POST /api/carrito/carrito/{id}/operaciones/
+        Body: {
+            "operaciones": [
+                {"accion": "agregar", "producto_id": 1, "cantidad": 2},
+                {"accion": "actualizar", "producto_id": 2, "cantidad": 5},
+                {"accion": "quitar", "producto_id": 3}
+            ],
+            "pedido_id": 10   (opcional: vuelve a agregar los items de un pedido)
+        }
+        """
+        carrito = self.get_object()
+        serializer = OperacionesCarritoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        operaciones = list(serializer.validated_data.get('operaciones', []))
+        pedido_id = serializer.validated_data.get('pedido_id')
+        if pedido_id:
+            # Repetir un pedido exige saber de quién es
+            if not request.user.is_authenticated:
+                return Response(
+                    {'error': 'Se requiere iniciar sesión para repetir un pedido'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            items_pedido = ItemPedido.objects.filter(pedido_id=pedido_id)
+            if not request.user.is_staff:
+                items_pedido = items_pedido.filter(pedido__usuario=request.user)
+            operaciones = [
+                {'accion': 'agregar', 'producto_id': producto_id, 'cantidad': cantidad}
+                for producto_id, cantidad in items_pedido.values_list('producto_id', 'cantidad')
+            ] + operaciones
+
+        try:
+            nuevos, actualizados, quitados = aplicar_operaciones(carrito, operaciones)
+        except ValidationError as e:
+            return Response({'error': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+        if nuevos:
+            try:
+                AnalyticsTracker.track_agregar_carrito_lote(
+                    nuevos,
+                    usuario=carrito.usuario,
+                    session_id=carrito.session_id
+                )
+            except Exception as e:
+                print(f"Error registrando items al carrito: {e}")
+
+        carrito = Carrito.objects.prefetch_related('items__producto').get(pk=carrito.pk)
+        return Response({
+            'agregados': len(nuevos),
+            'actualizados': len(actualizados),
+            'quitados': len(quitados),
+            'carrito': CarritoSerializer(carrito, context={'request': request}).data
+        }, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'])
     def vaciar(self, request, pk=None):
         carrito = self.get_object()
@@ -49,3 +119,94 @@ class ItemCarritoViewSet(viewsets.ModelViewSet):
     serializer_class = ItemCarritoSerializer
 
 
+
+
+class CarritoSesionViewSet(viewsets.ViewSet):
+    """
+    Carrito de visitantes anónimos guardado en cookie (sin escrituras en la base)
+    """
+    permission_classes = [AllowAny]
+
+    def list(self, request):
+        """
+        GET /api/carrito/carrito-sesion/
+        """
+        carrito = CarritoSesion.desde_request(request)
+        return Response(carrito.resumen(request))
+
+    @action(detail=False, methods=['post'])
+    def agregar_item(self, request):
+        """
+        POST /api/carrito/carrito-sesion/agregar_item/
+        Body: { "producto_id": 1, "cantidad": 2 }
+        """
+        return self._modificar(request, 'agregar')
+
+    @action(detail=False, methods=['post'])
+    def actualizar_item(self, request):
+        """
+        POST /api/carrito/carrito-sesion/actualizar_item/
+        Body: { "producto_id": 1, "cantidad": 3 }  (0 quita el producto)
+        """
+        return self._modificar(request, 'actualizar')
+
+    @action(detail=False, methods=['post'])
+    def quitar_item(self, request):
+        """
+        POST /api/carrito/carrito-sesion/quitar_item/
+        Body: { "producto_id": 1 }
+        """
+        try:
+            producto_id = int(request.data.get('producto_id'))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'producto_id debe ser un número'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        carrito = CarritoSesion.desde_request(request)
+        carrito.quitar(producto_id)
+        return carrito.guardar(Response(carrito.resumen(request)))
+
+    @action(detail=False, methods=['post'])
+    def vaciar(self, request):
+        carrito = CarritoSesion.desde_request(request)
+        carrito.vaciar()
+        return carrito.guardar(
+            Response({'mensaje': 'Carrito vaciado correctamente.'}, status=status.HTTP_200_OK)
+        )
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def promover(self, request):
+        """
+        Pasa el carrito anónimo al carrito del usuario autenticado (checkout)
+        POST /api/carrito/carrito-sesion/promover/
+        """
+        response = Response()
+        carrito = promover_carrito_sesion(request, request.user, response)
+        if carrito is None:
+            carrito = obtener_carrito_activo(request.user)
+        response.data = CarritoSerializer(carrito, context={'request': request}).data
+        return response
+
+    def _modificar(self, request, operacion):
+        try:
+            producto_id = int(request.data.get('producto_id'))
+            cantidad = int(request.data.get('cantidad', 1))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'producto_id y cantidad deben ser números'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        producto = get_object_or_404(Producto, pk=producto_id, activo=True)
+        carrito = CarritoSesion.desde_request(request)
+        try:
+            if operacion == 'agregar':
+                carrito.agregar(producto, cantidad)
+            else:
+                carrito.actualizar(producto, cantidad)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return carrito.guardar(Response(carrito.resumen(request), status=status.HTTP_200_OK))
@@ -1,5 +1,8 @@
-from django.contrib import admin
-from .models import Categoria, Producto, ImagenProducto
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from .models import Categoria, Producto, ImagenProducto, SubidaImagen, MovimientoStock
+from .stock import registrar_movimientos, guardar_sin_stock, ajustar_stock
 # Register your models here.
 @admin.register(Categoria)
 class CategoriaAdmin(admin.ModelAdmin):
@@ -19,4 +22,66 @@ class ProductoAdmin(admin.ModelAdmin):
     list_filter = ['categoria', 'activo', 'destacado']
     search_fields = ['nombre', 'descripcion']
     list_editable = ['precio', 'stock', 'activo', 'destacado']
-    inlines = [ImagenProductoInline]
\ No newline at end of file
+    inlines = [ImagenProductoInline]
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_dbfield(db_field, request, **kwargs)
+        if db_field.name == 'stock':
+            # El formulario devuelve el stock que mostraba (initial-stock): el cambio se aplica como delta
+            formfield.show_hidden_initial = True
+        return formfield
+
+    def save_model(self, request, obj, form, change):
+        """
+        Los cambios de stock desde el admin (formulario o list_editable) se
+        aplican como delta sobre el stock actual y quedan en el ledger; el
+        resto de los campos se guarda sin tocar la columna stock
+        """
+        if not change:
+            super().save_model(request, obj, form, change)
+            registrar_movimientos([(obj.pk, obj.stock, obj.stock)], usuario=request.user)
+            return
+
+        with transaction.atomic():
+            guardar_sin_stock(obj)
+            if 'stock' not in form.changed_data:
+                obj.refresh_from_db(fields=['stock'])
+                return
+            try:
+                ajustar_stock(obj, self._stock_visto(form), form.cleaned_data['stock'], usuario=request.user)
+            except ValidationError as e:
+                obj.refresh_from_db(fields=['stock'])
+                self.message_user(
+                    request, f'{obj}: el stock no se modificó ({"; ".join(e.messages)})', messages.ERROR
+                )
+
+    def _stock_visto(self, form):
+        try:
+            return int(form.data.get(form.add_initial_prefix('stock')))
+        except (TypeError, ValueError):
+            return form.initial.get('stock') or 0
+
+
+@admin.register(SubidaImagen)
+class SubidaImagenAdmin(admin.ModelAdmin):
+    list_display = ['id', 'producto', 'destino', 'nombre_original', 'estado', 'progreso', 'fecha_creacion']
+    list_filter = ['estado', 'destino']
+    search_fields = ['nombre_original', 'producto__nombre']
+    readonly_fields = ['fecha_creacion', 'fecha_actualizacion']
+
+
+@admin.register(MovimientoStock)
+class MovimientoStockAdmin(admin.ModelAdmin):
+    list_display = ['fecha', 'producto', 'cantidad', 'stock_resultante', 'motivo', 'referencia', 'usuario']
+    list_filter = ['motivo', 'fecha']
+    search_fields = ['producto__nombre', 'referencia']
+    date_hierarchy = 'fecha'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,179 @@
+import bisect
+import math
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from apps.analytics.models import EventoUsuario
+from .busqueda import normalizar
+from .indices import IndiceCatalogo, registrar
+
+
+# Cada cuánto se vuelven a leer las búsquedas populares de analytics
+CONSULTAS_SEGUNDOS = getattr(settings, 'AUTOCOMPLETADO_CONSULTAS_SEGUNDOS', 10 * 60)
+CONSULTAS_DIAS = getattr(settings, 'AUTOCOMPLETADO_CONSULTAS_DIAS', 30)
+CONSULTAS_MAXIMO = 500
+EVENTOS_MAXIMO = 5000
+
+# Prioridad de cada tipo de sugerencia en el ranking
+PRIORIDAD_TIPO = {
+    'busqueda': 3.0,
+    'categoria': 2.5,
+    'producto': 2.0,
+    'color': 1.5,
+}
+
+# Cuántas claves se revisan como máximo por consulta
+MAX_CANDIDATOS = 200
+
+
+def _claves(texto):
+    """Claves por inicio de palabra: 'ambo azul' -> ['ambo azul', 'azul']"""
+    palabras = normalizar(texto).split()
+    return [' '.join(palabras[i:]) for i in range(len(palabras))]
+
+
+class IndiceAutocompletado(IndiceCatalogo):
+    """
+    Índice de prefijos (arreglo ordenado + bisect) sobre nombres de productos
+    activos, categorías, colores y búsquedas populares.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._consultas_lock = threading.Lock()
+        self._ultima_lectura_consultas = None
+
+    def _reiniciar(self):
+        self._claves = []          # [(clave, tipo, texto_normalizado)] ordenado
+        self._entradas = {}        # (tipo, texto_normalizado) -> entrada
+        self._por_producto = {}    # producto_id -> [(tipo, texto_normalizado)]
+        self._consultas = []
+        self._ultima_lectura_consultas = None
+
+    def _sumar(self, tipo, texto, objeto_id=None, cantidad=1):
+        normalizado = ' '.join(normalizar(texto).split())
+        if not normalizado:
+            return None
+        llave = (tipo, normalizado)
+        entrada = self._entradas.get(llave)
+        if entrada is None:
+            entrada = {'texto': texto.strip(), 'tipo': tipo, 'id': objeto_id, 'refs': 0}
+            self._entradas[llave] = entrada
+            for clave in _claves(normalizado):
+                if self._reconstruyendo:
+                    self._claves.append((clave, tipo, normalizado))
+                else:
+                    bisect.insort(self._claves, (clave, tipo, normalizado))
+        entrada['refs'] += cantidad
+        return llave
+
+    def _terminar_reconstruccion(self):
+        # Un solo sort al final: insort por clave es cuadrático con muchos productos
+        self._claves.sort()
+
+    def _restar(self, llave, cantidad=1):
+        entrada = self._entradas.get(llave)
+        if entrada is None:
+            return
+        entrada['refs'] -= cantidad
+        if entrada['refs'] > 0:
+            return
+        del self._entradas[llave]
+        tipo, normalizado = llave
+        for clave in _claves(normalizado):
+            posicion = bisect.bisect_left(self._claves, (clave, tipo, normalizado))
+            if posicion < len(self._claves) and self._claves[posicion] == (clave, tipo, normalizado):
+                del self._claves[posicion]
+
+    def _agregar(self, fila):
+        if not fila['activo']:
+            return
+        llaves = [
+            self._sumar('producto', fila['nombre'], fila['id']),
+            self._sumar('categoria', fila['categoria__nombre'] or '', fila['categoria_id']),
+            self._sumar('color', fila['color'] or ''),
+        ]
+        self._por_producto[fila['id']] = [llave for llave in llaves if llave]
+
+    def _quitar(self, producto_id):
+        for llave in self._por_producto.pop(producto_id, ()):
+            self._restar(llave)
+
+    def _actualizar_consultas(self):
+        """Reemplaza las búsquedas populares con las de los últimos días"""
+        ahora = time.monotonic()
+        if (
+            self._ultima_lectura_consultas is not None
+            and ahora - self._ultima_lectura_consultas < CONSULTAS_SEGUNDOS
+        ):
+            return
+        if not self._consultas_lock.acquire(blocking=False):
+            return
+        try:
+            desde = timezone.now() - timedelta(days=CONSULTAS_DIAS)
+            metadatas = EventoUsuario.objects.filter(
+                tipo_evento='busqueda',
+                timestamp__gte=desde
+            ).order_by('-timestamp').values_list('metadata', 'peso')[:EVENTOS_MAXIMO]
+
+            conteo = Counter()
+            textos = {}
+            for metadata, peso in metadatas:
+                if not isinstance(metadata, dict) or not metadata.get('resultados'):
+                    continue
+                consulta = str(metadata.get('query') or '').strip()
+                normalizado = ' '.join(normalizar(consulta).split())
+                if len(normalizado) < 2:
+                    continue
+                conteo[normalizado] += peso
+                textos.setdefault(normalizado, consulta.lower())
+
+            with self._lock:
+                for llave, cantidad in self._consultas:
+                    self._restar(llave, cantidad)
+                self._consultas = []
+                for normalizado, cantidad in conteo.most_common(CONSULTAS_MAXIMO):
+                    if cantidad < 2:
+                        break
+                    llave = self._sumar('busqueda', textos[normalizado], cantidad=cantidad)
+                    self._consultas.append((llave, cantidad))
+            self._ultima_lectura_consultas = ahora
+        finally:
+            self._consultas_lock.release()
+
+    def sugerir(self, prefijo, limite=8):
+        """Sugerencias para un prefijo, ordenadas por tipo y popularidad"""
+        self.asegurar_actualizado()
+        self._actualizar_consultas()
+
+        prefijo = ' '.join(normalizar(prefijo).split())
+        if not prefijo:
+            return []
+
+        with self._lock:
+            inicio = bisect.bisect_left(self._claves, (prefijo,))
+            candidatos = {}
+            for clave, tipo, normalizado in self._claves[inicio:inicio + MAX_CANDIDATOS]:
+                if not clave.startswith(prefijo):
+                    break
+                entrada = self._entradas[(tipo, normalizado)]
+                puntaje = PRIORIDAD_TIPO[tipo] + math.log1p(entrada['refs'])
+                if normalizado.startswith(prefijo):
+                    puntaje += 1.0  # coincide desde la primera palabra
+                if puntaje > candidatos.get((tipo, normalizado), (0, None))[0]:
+                    candidatos[(tipo, normalizado)] = (puntaje, entrada)
+
+        ordenados = sorted(
+            candidatos.values(),
+            key=lambda par: (-par[0], len(par[1]['texto']), par[1]['texto'])
+        )
+        return [
+            {'texto': entrada['texto'], 'tipo': entrada['tipo'], 'id': entrada['id']}
+            for _, entrada in ordenados[:limite]
+        ]
+
+
+indice_autocompletado = registrar(IndiceAutocompletado())
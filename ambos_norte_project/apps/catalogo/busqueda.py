@@ -0,0 +1,163 @@
+import bisect
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from django.conf import settings
+from .indices import IndiceCatalogo, registrar
+
+
+MAX_RESULTADOS = getattr(settings, 'BUSQUEDA_MAX_RESULTADOS', 500)
+
+# Peso de cada campo en el puntaje de relevancia
+PESOS_CAMPOS = {
+    'nombre': 3.0,
+    'categoria__nombre': 2.0,
+    'color': 2.0,
+    'talla': 1.5,
+    'material': 1.5,
+    'descripcion': 1.0,
+}
+
+# Peso de un término que solo coincide por prefijo ("rem" -> "remera")
+PESO_PREFIJO = 0.5
+
+STOPWORDS = {
+    'a', 'al', 'con', 'de', 'del', 'el', 'en', 'la', 'las', 'lo', 'los',
+    'o', 'para', 'por', 'sin', 'u', 'un', 'una', 'y',
+}
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes: 'Clínico Azúl' -> 'clinico azul'"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def raiz(token):
+    """
+    Reducción mínima de plurales en español a una raíz común para singular y
+    plural: remera/remeras -> remera, color/colores -> color,
+    verde/verdes -> verd, luz/luces -> luc
+    """
+    if len(token) > 4 and token.endswith('es') and token[-3] not in 'aeiou':
+        # colores -> color, verdes -> verd, luces -> luc
+        token = token[:-2]
+    elif len(token) > 3 and token.endswith('s') and token[-2] in 'aeo':
+        # remeras -> remera (gris, tenis: la s es del singular)
+        token = token[:-1]
+    # El singular de 'verdes' es 'verde' y el de 'colores' es 'color': sin la
+    # 'e' final ambos quedan con la misma raíz que su plural
+    if len(token) > 3 and token.endswith('e') and token[-2] not in 'aeiou':
+        token = token[:-1]
+    # luz / luces: la z del singular es c en el plural
+    if token.endswith('z'):
+        token = token[:-1] + 'c'
+    return token
+
+
+def tokenizar(texto):
+    return [
+        raiz(token)
+        for token in _TOKEN_RE.findall(normalizar(texto))
+        if token not in STOPWORDS
+    ]
+
+
+class IndiceBusqueda(IndiceCatalogo):
+    """
+    Índice invertido en memoria sobre nombre, descripción, color, material,
+    talla y categoría, con ranking tf-idf ponderado por campo.
+    """
+
+    def _reiniciar(self):
+        self._postings = defaultdict(dict)   # termino -> {producto_id: peso}
+        self._terminos_producto = {}         # producto_id -> terminos
+        self._activos = set()
+        self._terminos_ordenados = None
+
+    def _agregar(self, fila):
+        pesos = defaultdict(float)
+        for campo, peso in PESOS_CAMPOS.items():
+            for termino in tokenizar(fila.get(campo)):
+                pesos[termino] += peso
+
+        producto_id = fila['id']
+        for termino, peso in pesos.items():
+            if termino not in self._postings:
+                self._terminos_ordenados = None
+            self._postings[termino][producto_id] = peso
+        self._terminos_producto[producto_id] = list(pesos)
+        if fila['activo']:
+            self._activos.add(producto_id)
+
+    def _quitar(self, producto_id):
+        for termino in self._terminos_producto.pop(producto_id, ()):
+            postings = self._postings.get(termino)
+            if postings is None:
+                continue
+            postings.pop(producto_id, None)
+            if not postings:
+                del self._postings[termino]
+                self._terminos_ordenados = None
+        self._activos.discard(producto_id)
+
+    def _expandir(self, termino):
+        """Términos del índice que empiezan con `termino`"""
+        if self._terminos_ordenados is None:
+            self._terminos_ordenados = sorted(self._postings)
+        inicio = bisect.bisect_left(self._terminos_ordenados, termino)
+        for candidato in self._terminos_ordenados[inicio:]:
+            if not candidato.startswith(termino):
+                break
+            yield candidato
+
+    def buscar(self, consulta, solo_activos=False, limite=MAX_RESULTADOS):
+        """
+        Devuelve ids de productos ordenados por relevancia.
+        Todos los términos de la consulta deben coincidir (exacto o por prefijo).
+        """
+        self.asegurar_actualizado()
+        terminos = tokenizar(consulta)
+        if not terminos:
+            return []
+
+        with self._lock:
+            total = max(len(self._terminos_producto), 1)
+            puntajes = None
+            for termino in dict.fromkeys(terminos):
+                coincidencias = defaultdict(float)
+                for candidato in self._expandir(termino):
+                    postings = self._postings[candidato]
+                    idf = math.log(1 + total / len(postings))
+                    factor = 1.0 if candidato == termino else PESO_PREFIJO
+                    for producto_id, peso in postings.items():
+                        coincidencias[producto_id] = max(
+                            coincidencias[producto_id], peso * idf * factor
+                        )
+
+                if puntajes is None:
+                    puntajes = coincidencias
+                else:
+                    puntajes = {
+                        producto_id: puntaje + coincidencias[producto_id]
+                        for producto_id, puntaje in puntajes.items()
+                        if producto_id in coincidencias
+                    }
+                if not puntajes:
+                    return []
+
+            if solo_activos:
+                puntajes = {
+                    producto_id: puntaje
+                    for producto_id, puntaje in puntajes.items()
+                    if producto_id in self._activos
+                }
+
+        ordenados = sorted(puntajes, key=lambda producto_id: (-puntajes[producto_id], producto_id))
+        return ordenados[:limite] if limite else ordenados
+
+
+indice_busqueda = registrar(IndiceBusqueda())
@@ -0,0 +1,268 @@
+import bisect
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.db.models.functions import Trim
+from .indices import IndiceCatalogo, registrar
+
+
+FACETAS = ('categoria', 'talla', 'color', 'material')
+
+# Límites de los rangos de precio que se muestran como faceta
+LIMITES_PRECIO = [
+    Decimal(str(limite))
+    for limite in getattr(settings, 'CATALOGO_RANGOS_PRECIO', [0, 5000, 10000, 20000, 40000])
+]
+
+
+def leer_filtros(params):
+    """
+    Lee los filtros de facetas de los query params.
+    Cada faceta acepta varios valores separados por coma (?color=Azul,Negro).
+    Devuelve (filtros, precio_min, precio_max).
+    """
+    filtros = {}
+    for faceta in FACETAS:
+        crudo = params.get(faceta)
+        if not crudo:
+            continue
+        valores = [valor.strip() for valor in crudo.split(',') if valor.strip()]
+        if faceta == 'categoria':
+            valores = [int(valor) for valor in valores if valor.isdigit()]
+        if valores:
+            filtros[faceta] = valores
+
+    precios = []
+    for nombre in ('precio_min', 'precio_max'):
+        try:
+            precio = Decimal(params.get(nombre)) if params.get(nombre) else None
+        except InvalidOperation:
+            precio = None
+        # NaN e Infinity se parsean pero no se pueden comparar ni filtrar
+        precios.append(precio if precio is not None and precio.is_finite() else None)
+    return filtros, precios[0], precios[1]
+
+
+def aplicar_filtros(queryset, filtros, precio_min=None, precio_max=None):
+    """
+    Aplica los mismos filtros de facetas a un queryset de Producto. Talla,
+    color y material se comparan sin espacios en los extremos, igual que
+    los guarda el índice de facetas ('Azul ' cuenta y filtra como 'Azul').
+    """
+    for faceta, valores in filtros.items():
+        if faceta == 'categoria':
+            queryset = queryset.filter(categoria_id__in=valores)
+        else:
+            queryset = queryset.annotate(**{f'{faceta}_normalizado': Trim(faceta)}).filter(
+                **{f'{faceta}_normalizado__in': valores}
+            )
+    if precio_min is not None:
+        queryset = queryset.filter(precio__gte=precio_min)
+    if precio_max is not None:
+        queryset = queryset.filter(precio__lte=precio_max)
+    return queryset
+
+
+class IndiceFacetas(IndiceCatalogo):
+    """
+    Índice de bitmaps por valor de faceta (un bit por producto, usando
+    enteros de Python). Los conteos se calculan con AND/OR y bit_count,
+    sin un GROUP BY por faceta.
+    """
+
+    def _reiniciar(self):
+        self._posiciones = {}                 # producto_id -> bit
+        self._productos = {}                  # bit -> producto_id
+        self._libres = []
+        self._siguiente = 0
+        self._todos = 0
+        self._activos = 0
+        self._bits = {faceta: defaultdict(int) for faceta in FACETAS}
+        self._bits_rango = defaultdict(int)   # índice de rango de precio -> bitmap
+        self._precios = []                    # [(precio, bit)] ordenado
+        self._valores = {}                    # producto_id -> (valores, precio, rango)
+        self._nombres_categoria = {}
+
+    def _rango(self, precio):
+        return max(bisect.bisect_right(LIMITES_PRECIO, precio) - 1, 0)
+
+    def _agregar(self, fila):
+        posicion = self._libres.pop() if self._libres else self._siguiente
+        if posicion == self._siguiente:
+            self._siguiente += 1
+        bit = 1 << posicion
+
+        valores = {
+            'categoria': fila['categoria_id'],
+            'talla': (fila['talla'] or '').strip() or None,
+            'color': (fila['color'] or '').strip() or None,
+            'material': (fila['material'] or '').strip() or None,
+        }
+        for faceta, valor in valores.items():
+            if valor is not None:
+                self._bits[faceta][valor] |= bit
+
+        rango = self._rango(fila['precio'])
+        self._bits_rango[rango] |= bit
+        if self._reconstruyendo:
+            self._precios.append((fila['precio'], posicion))
+        else:
+            bisect.insort(self._precios, (fila['precio'], posicion))
+
+        self._todos |= bit
+        if fila['activo']:
+            self._activos |= bit
+
+        self._posiciones[fila['id']] = posicion
+        self._productos[posicion] = fila['id']
+        self._valores[fila['id']] = (valores, fila['precio'], rango)
+        self._nombres_categoria[fila['categoria_id']] = fila['categoria__nombre']
+
+    def _terminar_reconstruccion(self):
+        self._precios.sort()
+
+    def _quitar(self, producto_id):
+        posicion = self._posiciones.pop(producto_id, None)
+        if posicion is None:
+            return
+        valores, precio, rango = self._valores.pop(producto_id)
+        mascara = ~(1 << posicion)
+
+        for faceta, valor in valores.items():
+            if valor is None:
+                continue
+            self._bits[faceta][valor] &= mascara
+            if not self._bits[faceta][valor]:
+                del self._bits[faceta][valor]
+
+        self._bits_rango[rango] &= mascara
+        indice = bisect.bisect_left(self._precios, (precio, posicion))
+        if indice < len(self._precios) and self._precios[indice] == (precio, posicion):
+            del self._precios[indice]
+
+        self._todos &= mascara
+        self._activos &= mascara
+        del self._productos[posicion]
+        self._libres.append(posicion)
+
+    def _mascara_precio(self, precio_min, precio_max):
+        """
+        Los rangos de precio que quedan enteros dentro de [precio_min, precio_max]
+        salen de _bits_rango; solo se recorren uno a uno los productos de los
+        rangos cortados por los extremos.
+        """
+        primero = 0 if precio_min is None else self._rango(precio_min)
+        ultimo = len(LIMITES_PRECIO) - 1 if precio_max is None else self._rango(precio_max)
+        mascara = 0
+        for rango in range(primero, ultimo + 1):
+            # El primer rango no tiene piso y el último no tiene techo (ver _rango)
+            desde = LIMITES_PRECIO[rango] if rango else None
+            hasta = LIMITES_PRECIO[rango + 1] if rango + 1 < len(LIMITES_PRECIO) else None
+            entero_abajo = precio_min is None or (desde is not None and desde >= precio_min)
+            entero_arriba = precio_max is None or (hasta is not None and hasta <= precio_max)
+            if entero_abajo and entero_arriba:
+                mascara |= self._bits_rango.get(rango, 0)
+                continue
+
+            pisos = [valor for valor in (desde, precio_min) if valor is not None]
+            inicio = bisect.bisect_left(self._precios, (max(pisos), -1)) if pisos else 0
+            fin = len(self._precios)
+            if hasta is not None:
+                fin = bisect.bisect_left(self._precios, (hasta, -1))
+            if precio_max is not None:
+                fin = min(fin, bisect.bisect_right(self._precios, (precio_max, float('inf'))))
+            for _, posicion in self._precios[inicio:fin]:
+                mascara |= 1 << posicion
+        return mascara
+
+    def _mascara_ids(self, ids):
+        mascara = 0
+        for producto_id in ids:
+            posicion = self._posiciones.get(producto_id)
+            if posicion is not None:
+                mascara |= 1 << posicion
+        return mascara
+
+    def _mascaras(self, filtros, precio_min, precio_max):
+        """{faceta: bitmap} de los productos que cumplen cada filtro"""
+        mascaras = {}
+        for faceta, valores in filtros.items():
+            mascara = 0
+            for valor in valores:
+                mascara |= self._bits[faceta].get(valor, 0)
+            mascaras[faceta] = mascara
+        if precio_min is not None or precio_max is not None:
+            mascaras['precio'] = self._mascara_precio(precio_min, precio_max)
+        return mascaras
+
+    def filtrar(self, ids, filtros, precio_min=None, precio_max=None, solo_activos=True):
+        """Los `ids` que cumplen los filtros, en el mismo orden (p. ej. de relevancia)"""
+        self.asegurar_actualizado()
+
+        with self._lock:
+            resultado = self._activos if solo_activos else self._todos
+            for mascara in self._mascaras(filtros, precio_min, precio_max).values():
+                resultado &= mascara
+            posiciones = self._posiciones
+            return [
+                producto_id for producto_id in ids
+                if producto_id in posiciones and resultado >> posiciones[producto_id] & 1
+            ]
+
+    def contar(self, filtros, precio_min=None, precio_max=None, solo_activos=True, ids=None):
+        """
+        Conteos por valor de cada faceta. Cada faceta se cuenta con los
+        filtros de las demás (selección múltiple dentro de una faceta).
+        `ids` restringe el universo (por ejemplo, resultados de una búsqueda).
+        """
+        self.asegurar_actualizado()
+
+        with self._lock:
+            universo = self._activos if solo_activos else self._todos
+            if ids is not None:
+                universo &= self._mascara_ids(ids)
+            mascaras = self._mascaras(filtros, precio_min, precio_max)
+
+            def combinar(excepto=None):
+                resultado = universo
+                for faceta, mascara in mascaras.items():
+                    if faceta != excepto:
+                        resultado &= mascara
+                return resultado
+
+            facetas = {}
+            for faceta in FACETAS:
+                base = combinar(faceta)
+                seleccionados = set(filtros.get(faceta, ()))
+                conteos = []
+                for valor, bits in self._bits[faceta].items():
+                    cantidad = (base & bits).bit_count()
+                    if cantidad or valor in seleccionados:
+                        conteo = {'valor': valor, 'cantidad': cantidad, 'seleccionado': valor in seleccionados}
+                        if faceta == 'categoria':
+                            conteo['nombre'] = self._nombres_categoria.get(valor)
+                        conteos.append(conteo)
+                conteos.sort(key=lambda conteo: (-conteo['cantidad'], str(conteo['valor'])))
+                facetas[faceta] = conteos
+
+            base = combinar('precio')
+            rangos = []
+            for indice, minimo in enumerate(LIMITES_PRECIO):
+                maximo = LIMITES_PRECIO[indice + 1] if indice + 1 < len(LIMITES_PRECIO) else None
+                cantidad = (base & self._bits_rango.get(indice, 0)).bit_count()
+                if cantidad:
+                    rangos.append({
+                        'valor': f'{minimo}-{maximo}' if maximo is not None else f'{minimo}-',
+                        'min': minimo,
+                        'max': maximo,
+                        'cantidad': cantidad,
+                    })
+            facetas['precio'] = rangos
+
+            return {
+                'total': combinar().bit_count(),
+                'facetas': facetas,
+            }
+
+
+indice_facetas = registrar(IndiceFacetas())
@@ -0,0 +1,135 @@
+import os
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from .models import Producto, ImagenProducto
+
+
+# Ancho máximo de cada variante (la altura mantiene la proporción)
+TAMANIOS = getattr(settings, 'IMAGENES_TAMANIOS', {
+    'thumb': 200,
+    'medium': 600,
+    'large': 1200,
+})
+
+# WebP como formato principal y JPEG como respaldo para navegadores viejos
+FORMATOS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+
+def _a_rgb(imagen):
+    """JPEG no admite transparencia: se compone sobre fondo blanco"""
+    if imagen.mode == 'RGB':
+        return imagen
+    if imagen.mode in ('RGBA', 'LA') or (imagen.mode == 'P' and 'transparency' in imagen.info):
+        imagen = imagen.convert('RGBA')
+        fondo = Image.new('RGB', imagen.size, (255, 255, 255))
+        fondo.paste(imagen, mask=imagen.getchannel('A'))
+        return fondo
+    return imagen.convert('RGB')
+
+
+def _guardar(ruta, contenido):
+    if default_storage.exists(ruta):
+        default_storage.delete(ruta)
+    return default_storage.save(ruta, ContentFile(contenido))
+
+
+def generar_variantes(nombre):
+    """
+    Genera las variantes de un archivo del storage y las guarda junto al
+    original (productos/foto.jpg -> productos/foto_thumb.webp, ...).
+    Devuelve el diccionario que se guarda en el campo JSON.
+    """
+    base, _ = os.path.splitext(nombre)
+
+    with default_storage.open(nombre, 'rb') as archivo:
+        imagen = Image.open(archivo)
+        imagen = ImageOps.exif_transpose(imagen)
+        imagen.load()
+
+    if imagen.mode not in ('RGB', 'RGBA'):
+        imagen = imagen.convert('RGBA' if 'transparency' in imagen.info else 'RGB')
+
+    tamanios = {}
+    for etiqueta, ancho in TAMANIOS.items():
+        copia = imagen.copy()
+        # Nunca se agranda: si el original es más chico se usa su tamaño
+        copia.thumbnail((ancho, ancho * 4), Image.LANCZOS)
+
+        variante = {'ancho': copia.width, 'alto': copia.height}
+        for extension, formato, opciones in FORMATOS:
+            salida = BytesIO()
+            origen = _a_rgb(copia) if formato == 'JPEG' else copia
+            origen.save(salida, formato, **opciones)
+            variante[extension] = _guardar(f'{base}_{etiqueta}.{extension}', salida.getvalue())
+        tamanios[etiqueta] = variante
+
+    return {'original': nombre, 'tamanios': tamanios}
+
+
+def variantes_desactualizadas(nombre, variantes):
+    """True si hay imagen y sus variantes no corresponden a ese archivo"""
+    return bool(nombre) and (variantes or {}).get('original') != nombre
+
+
+def procesar_producto(producto_id):
+    """Genera las variantes de la imagen principal de un producto"""
+    fila = Producto.objects.filter(pk=producto_id).values('imagen_principal').first()
+    if not fila or not fila['imagen_principal']:
+        return
+    nombre = fila['imagen_principal']
+    variantes = generar_variantes(nombre)
+    # Si la imagen cambió mientras se procesaba no se pisa nada
+    Producto.objects.filter(pk=producto_id, imagen_principal=nombre).update(
+        imagen_variantes=variantes
+    )
+
+
+def procesar_imagen_galeria(imagen_id):
+    """Genera las variantes de una imagen de la galería"""
+    fila = ImagenProducto.objects.filter(pk=imagen_id).values('imagen').first()
+    if not fila or not fila['imagen']:
+        return
+    nombre = fila['imagen']
+    variantes = generar_variantes(nombre)
+    ImagenProducto.objects.filter(pk=imagen_id, imagen=nombre).update(variantes=variantes)
+
+
+def srcset(variantes, request=None, url_media=None):
+    """
+    Estructura de URLs para <img srcset> / <picture>:
+    {'webp': 'url 200w, url 600w', 'jpg': '...', 'tamanios': {'thumb': {...}}}
+    Devuelve None si todavía no se generaron las variantes.
+    url_media(ruta) reemplaza el armado de cada URL (serialización rápida).
+    """
+    tamanios = (variantes or {}).get('tamanios')
+    if not tamanios:
+        return None
+
+    def url(ruta):
+        if url_media:
+            return url_media(ruta)
+        ruta = default_storage.url(ruta)
+        return request.build_absolute_uri(ruta) if request else ruta
+
+    resultado = {'tamanios': {}}
+    for etiqueta, variante in tamanios.items():
+        resultado['tamanios'][etiqueta] = {
+            'ancho': variante['ancho'],
+            'alto': variante['alto'],
+            **{extension: url(variante[extension]) for extension, _, _ in FORMATOS if extension in variante},
+        }
+
+    for extension, _, _ in FORMATOS:
+        candidatos = sorted(
+            (variante['ancho'], variante[extension])
+            for variante in resultado['tamanios'].values()
+            if extension in variante
+        )
+        resultado[extension] = ', '.join(f'{direccion} {ancho}w' for ancho, direccion in candidatos)
+    return resultado
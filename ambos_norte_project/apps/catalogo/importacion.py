@@ -0,0 +1,338 @@
+import csv
+import io
+import json
+import os
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Categoria, Producto
+from .indices import marcar_producto
+from .stock import aplicar_movimientos, registrar_movimientos
+
+
+TAMANIO_LOTE = getattr(settings, 'IMPORTACION_TAMANIO_LOTE', 500)
+
+# Columnas que se pueden actualizar; las que no vienen en el archivo no se tocan
+CAMPOS_TEXTO = ('nombre', 'descripcion', 'talla', 'color', 'material')
+CAMPOS_BOOLEANOS = ('activo', 'destacado')
+CAMPOS_OBLIGATORIOS_ALTA = ('nombre', 'precio', 'categoria')
+
+VERDADEROS = {'1', 'true', 'si', 'sí', 'yes', 'x'}
+FALSOS = {'0', 'false', 'no', ''}
+
+
+def detectar_formato(nombre):
+    extension = os.path.splitext(nombre or '')[1].lower()
+    return {'.csv': 'csv', '.json': 'json', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}.get(extension, 'csv')
+
+
+def leer_filas(archivo, formato='csv'):
+    """
+    Genera las filas del archivo como diccionarios, de a una.
+    CSV y JSON Lines se leen en streaming; un JSON común (lista de objetos)
+    se carga completo porque json no permite leerlo por partes.
+    """
+    if formato == 'json':
+        datos = json.load(io.TextIOWrapper(archivo, encoding='utf-8-sig'))
+        if isinstance(datos, dict):
+            datos = datos.get('productos', [])
+        yield from datos
+        return
+
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    if formato == 'jsonl':
+        for linea in texto:
+            if linea.strip():
+                yield json.loads(linea)
+        return
+
+    muestra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+    except csv.Error:
+        dialecto = csv.excel
+    for fila in csv.DictReader(texto, dialect=dialecto):
+        yield {
+            (clave or '').strip().lower(): valor.strip() if isinstance(valor, str) else valor
+            for clave, valor in fila.items()
+        }
+
+
+def _clave_natural(nombre, talla, color):
+    return (
+        (nombre or '').strip().lower(),
+        (talla or '').strip().lower(),
+        (color or '').strip().lower(),
+    )
+
+
+def _texto(valor):
+    if valor is None:
+        return None
+    valor = str(valor).strip()
+    return valor or None
+
+
+class ImportadorProductos:
+    """
+    Importación masiva de productos desde CSV/JSON.
+
+    Las filas se procesan en lotes de `tamanio_lote`: por lote se hace una
+    consulta para los productos existentes (por id o por nombre+talla+color),
+    y los cambios se guardan con bulk_create/bulk_update en una transacción
+    por lote. Una fila con errores no impide que se apliquen las demás.
+    """
+
+    def __init__(self, tamanio_lote=TAMANIO_LOTE, crear_categorias=False, simular=False, usuario=None):
+        self.tamanio_lote = tamanio_lote
+        self.usuario = usuario
+        self.crear_categorias = crear_categorias
+        self.simular = simular
+        self.reporte = []
+        self.resumen = {'creados': 0, 'actualizados': 0, 'sin_cambios': 0, 'errores': 0}
+        self._categorias = {
+            nombre.strip().lower(): categoria_id
+            for categoria_id, nombre in Categoria.objects.values_list('id', 'nombre')
+        }
+
+    def importar(self, filas):
+        """
+        Procesa un iterable de filas y devuelve el reporte.
+        En modo simulación todo corre dentro de una transacción que se
+        descarta al final, así el reporte es idéntico al de una importación real.
+        """
+        if not self.simular:
+            self._importar(filas)
+        else:
+            with transaction.atomic():
+                self._importar(filas)
+                transaction.set_rollback(True)
+        return {'resumen': self.resumen, 'simulacion': self.simular, 'filas': self.reporte}
+
+    def _importar(self, filas):
+        lote = []
+        for numero, fila in enumerate(filas, 1):
+            lote.append((numero, fila))
+            if len(lote) >= self.tamanio_lote:
+                self._procesar_lote(lote)
+                lote = []
+        if lote:
+            self._procesar_lote(lote)
+
+    # ==================== VALIDACIÓN ====================
+
+    def _categoria_id(self, nombre, errores):
+        clave = nombre.strip().lower()
+        if clave in self._categorias:
+            return self._categorias[clave]
+        if not self.crear_categorias:
+            errores.append(f"La categoría '{nombre}' no existe")
+            return None
+        categoria = Categoria.objects.create(nombre=nombre.strip())
+        self._categorias[clave] = categoria.id
+        return categoria.id
+
+    def _validar(self, fila):
+        """Normaliza una fila; devuelve (id, valores, errores)"""
+        errores = []
+        valores = {}
+        if not isinstance(fila, dict):
+            return None, valores, ['La fila no es un objeto']
+        fila = {str(clave).strip().lower(): valor for clave, valor in fila.items()}
+
+        producto_id = None
+        if _texto(fila.get('id')):
+            try:
+                producto_id = int(fila['id'])
+            except (TypeError, ValueError):
+                errores.append('id inválido')
+
+        for campo in CAMPOS_TEXTO:
+            if campo in fila:
+                valores[campo] = _texto(fila[campo])
+        if 'nombre' in valores and not valores['nombre']:
+            errores.append('El nombre no puede estar vacío')
+
+        if _texto(fila.get('precio')) is not None:
+            try:
+                precio = Decimal(str(fila['precio']).replace(',', '.'))
+                if precio <= 0:
+                    errores.append('El precio debe ser mayor a 0')
+                else:
+                    valores['precio'] = precio.quantize(Decimal('0.01'))
+            except InvalidOperation:
+                errores.append(f"Precio inválido: {fila['precio']}")
+
+        if _texto(fila.get('stock')) is not None:
+            try:
+                stock = int(fila['stock'])
+                if stock < 0:
+                    errores.append('El stock no puede ser negativo')
+                else:
+                    valores['stock'] = stock
+            except (TypeError, ValueError):
+                errores.append(f"Stock inválido: {fila['stock']}")
+
+        for campo in CAMPOS_BOOLEANOS:
+            if campo in fila and fila[campo] is not None:
+                valor = fila[campo]
+                if isinstance(valor, bool):
+                    valores[campo] = valor
+                elif str(valor).strip().lower() in VERDADEROS:
+                    valores[campo] = True
+                elif str(valor).strip().lower() in FALSOS:
+                    valores[campo] = False
+                else:
+                    errores.append(f"Valor inválido para {campo}: {valor}")
+
+        if _texto(fila.get('categoria')):
+            categoria_id = self._categoria_id(str(fila['categoria']), errores)
+            if categoria_id is not None:
+                valores['categoria_id'] = categoria_id
+
+        return producto_id, valores, errores
+
+    # ==================== LOTES ====================
+
+    def _procesar_lote(self, lote):
+        validadas = []
+        ids = set()
+        nombres = set()
+        for numero, fila in lote:
+            producto_id, valores, errores = self._validar(fila)
+            validadas.append((numero, producto_id, valores, errores))
+            if producto_id:
+                ids.add(producto_id)
+            elif valores.get('nombre'):
+                nombres.add(valores['nombre'])
+
+        # Una consulta por lote para los productos existentes
+        por_id = Producto.objects.in_bulk(ids) if ids else {}
+        por_clave = {}
+        if nombres:
+            for producto in Producto.objects.filter(nombre__in=nombres):
+                por_clave.setdefault(
+                    _clave_natural(producto.nombre, producto.talla, producto.color), producto
+                )
+
+        nuevos = []
+        actualizados = {}
+        campos_actualizados = set()
+        cambios_stock = []  # (producto nuevo, stock inicial) para el ledger
+        deltas_stock = {}  # producto_id -> delta sobre el stock leído en este lote
+        vistos = set()
+        entradas = {}
+        ahora = timezone.now()
+
+        for numero, producto_id, valores, errores in validadas:
+            entrada = {'fila': numero, 'accion': None, 'id': producto_id, 'errores': errores}
+            self.reporte.append(entrada)
+
+            producto = None
+            if not errores:
+                if producto_id:
+                    producto = por_id.get(producto_id)
+                    if producto is None:
+                        errores.append(f'No existe el producto con id {producto_id}')
+                else:
+                    clave = _clave_natural(valores.get('nombre'), valores.get('talla'), valores.get('color'))
+                    producto = por_clave.get(clave)
+                    if producto is None:
+                        faltantes = [
+                            campo for campo in CAMPOS_OBLIGATORIOS_ALTA
+                            if (campo if campo != 'categoria' else 'categoria_id') not in valores
+                        ]
+                        if faltantes:
+                            errores.append(f"Faltan columnas para crear el producto: {', '.join(faltantes)}")
+
+            identidad = producto.pk if producto else _clave_natural(
+                valores.get('nombre'), valores.get('talla'), valores.get('color')
+            )
+            if not errores and identidad in vistos:
+                errores.append('Producto repetido en el archivo')
+            vistos.add(identidad)
+
+            if errores:
+                entrada['accion'] = 'error'
+                self.resumen['errores'] += 1
+                continue
+
+            if producto is None:
+                nuevo = Producto(**valores)
+                nuevo.fecha_modificacion = ahora
+                nuevos.append((entrada, nuevo))
+                cambios_stock.append((nuevo, nuevo.stock))
+                entrada['accion'] = 'creado'
+                self.resumen['creados'] += 1
+                continue
+
+            entrada['id'] = producto.pk
+            cambios = [
+                campo for campo, valor in valores.items()
+                if getattr(producto, campo) != valor
+            ]
+            if not cambios:
+                entrada['accion'] = 'sin_cambios'
+                self.resumen['sin_cambios'] += 1
+                continue
+
+            # El stock no se escribe con bulk_update (pisaría las ventas
+            # confirmadas desde la lectura del lote): se aplica como delta
+            if 'stock' in cambios:
+                deltas_stock[producto.pk] = valores['stock'] - producto.stock
+            campos = [campo for campo in cambios if campo != 'stock']
+            if campos:
+                for campo in campos:
+                    setattr(producto, campo, valores[campo])
+                # bulk_update no aplica auto_now; los índices usan esta fecha
+                producto.fecha_modificacion = ahora
+                campos_actualizados.update(campos)
+                actualizados[producto.pk] = producto
+            entradas[producto.pk] = entrada
+            entrada['accion'] = 'actualizado'
+            entrada['campos'] = sorted(cambios)
+            self.resumen['actualizados'] += 1
+
+        with transaction.atomic():
+            if nuevos:
+                Producto.objects.bulk_create([producto for _, producto in nuevos])
+            if actualizados:
+                Producto.objects.bulk_update(
+                    list(actualizados.values()),
+                    sorted(campos_actualizados) + ['fecha_modificacion']
+                )
+            self._asignar_ids(nuevos)
+            registrar_movimientos(
+                [(producto.pk, stock, producto.stock) for producto, stock in cambios_stock if producto.pk],
+                motivo='importacion',
+                usuario=self.usuario
+            )
+            stocks, _ = aplicar_movimientos(deltas_stock, motivo='importacion', usuario=self.usuario, parcial=True)
+            for producto_id in deltas_stock.keys() - stocks.keys():
+                # Ventas concurrentes dejaron menos stock que el que se quiere descontar
+                entradas[producto_id]['errores'].append('El stock no se aplicó: quedaría negativo')
+                entradas[producto_id]['accion'] = 'error'
+                self.resumen['actualizados'] -= 1
+                self.resumen['errores'] += 1
+            modificados = list(actualizados) + [producto.pk for _, producto in nuevos if producto.pk]
+            transaction.on_commit(lambda: self._marcar(modificados))
+
+    def _marcar(self, ids):
+        for producto_id in ids:
+            marcar_producto(producto_id)
+
+    def _asignar_ids(self, nuevos):
+        """Completa los ids de los creados cuando la base no los devuelve (MySQL)"""
+        sin_id = [(entrada, producto) for entrada, producto in nuevos if producto.pk is None]
+        if sin_id:
+            claves = {}
+            for producto in Producto.objects.filter(
+                nombre__in={producto.nombre for _, producto in sin_id}
+            ).order_by('-id'):
+                claves.setdefault(_clave_natural(producto.nombre, producto.talla, producto.color), producto.pk)
+            for _, producto in sin_id:
+                producto.pk = claves.get(_clave_natural(producto.nombre, producto.talla, producto.color))
+        for entrada, producto in nuevos:
+            entrada['id'] = producto.pk
@@ -0,0 +1,160 @@
+import threading
+import time
+from django.conf import settings
+from django.db.models import Q
+from .models import Producto
+
+
+# Columnas que leen los índices en memoria (una sola consulta con values())
+CAMPOS_INDICE = (
+    'id',
+    'nombre',
+    'descripcion',
+    'precio',
+    'talla',
+    'color',
+    'material',
+    'activo',
+    'destacado',
+    'categoria_id',
+    'categoria__nombre',
+    'fecha_modificacion',
+)
+
+# Cada cuánto se buscan cambios hechos por otros procesos
+SYNC_SEGUNDOS = getattr(settings, 'CATALOGO_INDICES_SYNC_SEGUNDOS', 30)
+# Reconstrucción completa periódica (cubre borrados físicos en otros procesos)
+RECONSTRUIR_SEGUNDOS = getattr(settings, 'CATALOGO_INDICES_RECONSTRUIR_SEGUNDOS', 60 * 60)
+
+_indices = []
+
+
+def registrar(indice):
+    """Registra un índice para que reciba las marcas de las señales"""
+    _indices.append(indice)
+    return indice
+
+
+def marcar_producto(producto_id):
+    """Marca un producto como modificado en todos los índices del proceso"""
+    for indice in _indices:
+        indice.marcar(producto_id)
+
+
+def marcar_categoria(categoria_id):
+    """Marca todos los productos de una categoría como modificados"""
+    for indice in _indices:
+        indice.marcar_categoria(categoria_id)
+
+
+class IndiceCatalogo:
+    """
+    Base para índices en memoria (por proceso) construidos desde Producto.
+
+    - La primera consulta construye el índice con un solo SELECT.
+    - Las señales solo marcan ids pendientes (no hacen consultas al guardar);
+      la siguiente lectura los refresca con un SELECT ... WHERE id IN (...).
+    - Cada SYNC_SEGUNDOS se traen los productos con fecha_modificacion
+      posterior a la última vista, para tomar cambios de otros procesos.
+
+    Las subclases implementan _reiniciar, _agregar y _quitar. Durante
+    reconstruir() _reconstruyendo es True: _agregar puede acumular sin ordenar
+    y dejar el orden para _terminar_reconstruccion.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._cargado = False
+        self._ultima_sync = 0.0
+        self._ultima_reconstruccion = 0.0
+        self._reconstruyendo = False
+        self._desde = None
+        self._pendientes = set()
+        self._categorias_pendientes = set()
+
+    def marcar(self, producto_id):
+        with self._lock:
+            self._pendientes.add(producto_id)
+
+    def marcar_categoria(self, categoria_id):
+        with self._lock:
+            self._categorias_pendientes.add(categoria_id)
+
+    def asegurar_actualizado(self):
+        """Deja el índice al día; barato si no hay nada pendiente"""
+        ahora = time.monotonic()
+        if (
+            self._cargado
+            and not self._pendientes
+            and not self._categorias_pendientes
+            and ahora - self._ultima_sync < SYNC_SEGUNDOS
+        ):
+            return
+
+        with self._lock:
+            if not self._cargado or ahora - self._ultima_reconstruccion >= RECONSTRUIR_SEGUNDOS:
+                self.reconstruir()
+                return
+
+            pendientes = self._pendientes
+            categorias = self._categorias_pendientes
+            self._pendientes = set()
+            self._categorias_pendientes = set()
+
+            filtro = Q()
+            if pendientes:
+                filtro |= Q(id__in=pendientes)
+            if categorias:
+                filtro |= Q(categoria_id__in=categorias)
+            if ahora - self._ultima_sync >= SYNC_SEGUNDOS and self._desde is not None:
+                filtro |= Q(fecha_modificacion__gt=self._desde)
+                self._ultima_sync = ahora
+
+            if not filtro:
+                return
+
+            vistos = set()
+            for fila in Producto.objects.filter(filtro).values(*CAMPOS_INDICE):
+                vistos.add(fila['id'])
+                self._quitar(fila['id'])
+                self._agregar(fila)
+                self._registrar_fecha(fila)
+
+            # Los pendientes que ya no existen fueron borrados
+            for producto_id in pendientes - vistos:
+                self._quitar(producto_id)
+
+    def reconstruir(self):
+        """Reconstruye el índice completo con una sola consulta"""
+        with self._lock:
+            self._reiniciar()
+            self._desde = None
+            self._pendientes = set()
+            self._categorias_pendientes = set()
+            self._reconstruyendo = True
+            try:
+                for fila in Producto.objects.values(*CAMPOS_INDICE).iterator(chunk_size=2000):
+                    self._agregar(fila)
+                    self._registrar_fecha(fila)
+                self._terminar_reconstruccion()
+            finally:
+                self._reconstruyendo = False
+            self._cargado = True
+            self._ultima_sync = self._ultima_reconstruccion = time.monotonic()
+
+    def _registrar_fecha(self, fila):
+        fecha = fila['fecha_modificacion']
+        if fecha is not None and (self._desde is None or fecha > self._desde):
+            self._desde = fecha
+
+    def _terminar_reconstruccion(self):
+        pass
+
+    def _reiniciar(self):
+        raise NotImplementedError
+
+    def _agregar(self, fila):
+        raise NotImplementedError
+
+    def _quitar(self, producto_id):
+        raise NotImplementedError
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from apps.catalogo.models import Producto, ImagenProducto
+from apps.catalogo.imagenes import (
+    procesar_producto,
+    procesar_imagen_galeria,
+    variantes_desactualizadas,
+)
+
+
+class Command(BaseCommand):
+    help = 'Genera las miniaturas WebP/JPEG de las imágenes de productos que no las tengan'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Regenerar también las imágenes que ya tienen variantes'
+        )
+        parser.add_argument(
+            '--producto-id',
+            type=int,
+            help='ID de un producto específico'
+        )
+
+    def handle(self, *args, **options):
+        todas = options['todas']
+        producto_id = options.get('producto_id')
+
+        productos = Producto.objects.exclude(imagen_principal='').exclude(imagen_principal__isnull=True)
+        imagenes = ImagenProducto.objects.exclude(imagen='')
+        if producto_id:
+            productos = productos.filter(id=producto_id)
+            imagenes = imagenes.filter(producto_id=producto_id)
+
+        pendientes_productos = [
+            fila['id']
+            for fila in productos.values('id', 'imagen_principal', 'imagen_variantes')
+            if todas or variantes_desactualizadas(fila['imagen_principal'], fila['imagen_variantes'])
+        ]
+        pendientes_galeria = [
+            fila['id']
+            for fila in imagenes.values('id', 'imagen', 'variantes')
+            if todas or variantes_desactualizadas(fila['imagen'], fila['variantes'])
+        ]
+
+        total = len(pendientes_productos) + len(pendientes_galeria)
+        if not total:
+            self.stdout.write(self.style.SUCCESS('✅ Todas las imágenes tienen sus variantes'))
+            return
+
+        self.stdout.write(f'🖼️  Generando variantes para {total} imagen(es)...')
+        errores = 0
+        tareas = [(procesar_producto, pk) for pk in pendientes_productos]
+        tareas += [(procesar_imagen_galeria, pk) for pk in pendientes_galeria]
+        for idx, (funcion, pk) in enumerate(tareas, 1):
+            try:
+                funcion(pk)
+            except Exception as e:
+                errores += 1
+                self.stdout.write(self.style.ERROR(f'  ❌ [{idx}/{total}] {funcion.__name__}({pk}): {e}'))
+
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Variantes generadas: {total - errores}'))
+        if errores:
+            self.stdout.write(self.style.WARNING(f'⚠️  Con errores: {errores}'))
@@ -0,0 +1,63 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from apps.catalogo.importacion import ImportadorProductos, leer_filas, detectar_formato, TAMANIO_LOTE
+
+
+class Command(BaseCommand):
+    help = 'Importa o actualiza productos en forma masiva desde un archivo CSV/JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', type=str, help='Ruta al archivo .csv, .json o .jsonl')
+        parser.add_argument(
+            '--formato',
+            choices=['csv', 'json', 'jsonl'],
+            help='Formato del archivo (por defecto se deduce de la extensión)'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=TAMANIO_LOTE,
+            help=f'Filas por lote/transacción (default: {TAMANIO_LOTE})'
+        )
+        parser.add_argument(
+            '--crear-categorias',
+            action='store_true',
+            help='Crear las categorías que no existan'
+        )
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Validar y mostrar el resultado sin guardar cambios'
+        )
+
+    def handle(self, *args, **options):
+        ruta = options['archivo']
+        formato = options['formato'] or detectar_formato(ruta)
+        importador = ImportadorProductos(
+            tamanio_lote=options['lote'],
+            crear_categorias=options['crear_categorias'],
+            simular=options['simular']
+        )
+
+        inicio = time.monotonic()
+        try:
+            with open(ruta, 'rb') as archivo:
+                reporte = importador.importar(leer_filas(archivo, formato))
+        except FileNotFoundError:
+            raise CommandError(f'No existe el archivo {ruta}')
+        except (ValueError, UnicodeDecodeError) as e:
+            raise CommandError(f'No se pudo leer el archivo: {e}')
+        duracion = time.monotonic() - inicio
+
+        for fila in reporte['filas']:
+            if fila['accion'] == 'error':
+                self.stdout.write(self.style.ERROR(f"  ❌ Fila {fila['fila']}: {'; '.join(fila['errores'])}"))
+
+        resumen = reporte['resumen']
+        titulo = '🧪 Simulación' if options['simular'] else '✅ Importación'
+        self.stdout.write(self.style.SUCCESS(f'\n{titulo} finalizada en {duracion:.2f}s'))
+        self.stdout.write(f"  ➕ Creados: {resumen['creados']}")
+        self.stdout.write(f"  ✏️  Actualizados: {resumen['actualizados']}")
+        self.stdout.write(f"  ⏸️  Sin cambios: {resumen['sin_cambios']}")
+        if resumen['errores']:
+            self.stdout.write(self.style.WARNING(f"  ⚠️  Errores: {resumen['errores']}"))
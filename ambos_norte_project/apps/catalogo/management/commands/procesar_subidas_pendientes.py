@@ -0,0 +1,56 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.catalogo.models import SubidaImagen
+from apps.catalogo.subidas import procesar_subida
+
+
+class Command(BaseCommand):
+    help = 'Procesa las subidas de imágenes pendientes (o trabadas) en el área de staging'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutos',
+            type=int,
+            default=15,
+            help='Minutos tras los cuales una subida en "procesando" se considera trabada (default: 15)'
+        )
+        parser.add_argument(
+            '--reintentar-errores',
+            action='store_true',
+            help='Volver a procesar las subidas con error que conservan su archivo'
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(minutes=options['minutos'])
+
+        trabadas = SubidaImagen.objects.filter(
+            estado='procesando',
+            fecha_actualizacion__lt=limite
+        ).update(estado='pendiente', progreso=0)
+        if trabadas:
+            self.stdout.write(self.style.WARNING(f'⚠️  {trabadas} subida(s) trabada(s) vuelven a pendiente'))
+
+        if options['reintentar_errores']:
+            reintentos = SubidaImagen.objects.filter(estado='error').exclude(archivo='').update(
+                estado='pendiente', progreso=0, error=''
+            )
+            self.stdout.write(f'🔁 {reintentos} subida(s) con error para reintentar')
+
+        pendientes = list(
+            SubidaImagen.objects.filter(estado='pendiente').order_by('fecha_creacion').values_list('id', flat=True)
+        )
+        if not pendientes:
+            self.stdout.write(self.style.SUCCESS('✅ No hay subidas pendientes'))
+            return
+
+        self.stdout.write(f'📤 Procesando {len(pendientes)} subida(s)...')
+        for idx, subida_id in enumerate(pendientes, 1):
+            procesar_subida(subida_id)
+            estado = SubidaImagen.objects.filter(pk=subida_id).values_list('estado', flat=True).first()
+            self.stdout.write(f'  [{idx}/{len(pendientes)}] Subida {subida_id}: {estado}')
+
+        completadas = SubidaImagen.objects.filter(id__in=pendientes, estado='completada').count()
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Completadas: {completadas}'))
+        if completadas < len(pendientes):
+            self.stdout.write(self.style.WARNING(f'⚠️  Con error: {len(pendientes) - completadas}'))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0003_alter_categoria_nombre'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagenproducto',
+            name='variantes',
+            field=models.JSONField(blank=True, default=dict, help_text='Miniaturas generadas de la imagen (WebP/JPEG por tamaño)'),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='imagen_variantes',
+            field=models.JSONField(blank=True, default=dict, help_text='Miniaturas generadas de la imagen principal (WebP/JPEG por tamaño)'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0004_imagen_variantes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubidaImagen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destino', models.CharField(choices=[('principal', 'Imagen principal'), ('galeria', 'Galería')], default='principal', max_length=20)),
+                ('orden', models.IntegerField(default=0)),
+                ('archivo', models.FileField(blank=True, upload_to='subidas/%Y/%m/%d/')),
+                ('nombre_original', models.CharField(blank=True, max_length=255)),
+                ('tamanio', models.PositiveIntegerField(default=0)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completada', 'Completada'), ('error', 'Error')], db_index=True, default='pendiente', max_length=20)),
+                ('progreso', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('ruta_final', models.CharField(blank=True, max_length=255)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('imagen_galeria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='catalogo.imagenproducto')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subidas_imagen', to='catalogo.producto')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='subidas_imagen', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Subida de Imagen',
+                'verbose_name_plural': 'Subidas de Imágenes',
+                'db_table': 'subidas_imagen',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0005_subida_imagen'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.IntegerField(help_text='Delta aplicado (negativo = egreso)')),
+                ('stock_resultante', models.IntegerField()),
+                ('motivo', models.CharField(choices=[('venta', 'Venta'), ('devolucion', 'Devolución'), ('reposicion', 'Reposición'), ('ajuste', 'Ajuste manual'), ('sincronizacion', 'Sincronización de depósito'), ('importacion', 'Importación masiva')], default='ajuste', max_length=20)),
+                ('referencia', models.CharField(blank=True, help_text='Ej: número de pedido o de remito', max_length=100)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos_stock', to='catalogo.producto')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimientos_stock', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Stock',
+                'verbose_name_plural': 'Movimientos de Stock',
+                'db_table': 'movimientos_stock',
+                'ordering': ['-fecha', '-id'],
+                'indexes': [models.Index(fields=['producto', 'fecha'], name='movimientos_product_53c0f6_idx'), models.Index(fields=['fecha'], name='movimientos_fecha_e9bdff_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0006_movimiento_stock'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['activo', 'categoria'], name='productos_activo_622e2f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['activo', 'stock'], name='productos_activo_f3b2a6_idx'),
+        ),
+    ]
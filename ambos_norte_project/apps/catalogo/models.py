@@ -1,5 +1,5 @@
 from django.db import models
-from django.core.exceptions import ValidationError
+from django.conf import settings
 
 # Create your models here.
 class Categoria(models.Model):
@@ -31,6 +31,11 @@ class Producto(models.Model):
     color = models.CharField(max_length=50, blank=True, null=True)
     material = models.CharField(max_length=100, blank=True, null=True)
     imagen_principal = models.ImageField(upload_to='productos/', blank=True, null=True)
+    imagen_variantes = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Miniaturas generadas de la imagen principal (WebP/JPEG por tamaño)'
+    )
     activo = models.BooleanField(default=True)
     destacado = models.BooleanField(default=False)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
@@ -40,23 +45,28 @@ class Producto(models.Model):
         """Verifica si hay stock suficiente"""
         return self.stock >= cantidad
     
-    def reducir_stock(self, cantidad):
-        """Reduce el stock de forma segura"""
-        if not self.tiene_stock(cantidad):
-            raise ValidationError(f"Stock insuficiente. Disponible: {self.stock}")
-        self.stock -= cantidad
-        self.save()
+    def reducir_stock(self, cantidad, motivo='ajuste', referencia='', usuario=None):
+        """Reduce el stock de forma segura (UPDATE condicional, ver stock.py)"""
+        from .stock import aplicar_movimientos
+        stocks, _ = aplicar_movimientos({self.pk: -cantidad}, motivo, referencia, usuario)
+        self.stock = stocks.get(self.pk, self.stock)
     
-    def aumentar_stock(self, cantidad):
+    def aumentar_stock(self, cantidad, motivo='reposicion', referencia='', usuario=None):
         """Aumenta el stock"""
-        self.stock += cantidad
-        self.save()
+        from .stock import aplicar_movimientos
+        stocks, _ = aplicar_movimientos({self.pk: cantidad}, motivo, referencia, usuario)
+        self.stock = stocks.get(self.pk, self.stock)
 
     class Meta:
         db_table = 'productos'
         verbose_name = 'Producto'
         verbose_name_plural = 'Productos'
         ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['activo', 'categoria']),
+            # Stock bajo (panel e inventario)
+            models.Index(fields=['activo', 'stock']),
+        ]
     
     def __str__(self):
         return self.nombre
@@ -76,6 +86,11 @@ class ImagenProducto(models.Model):
         related_name='imagenes'
     )
     imagen = models.ImageField(upload_to='productos/galeria/')
+    variantes = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Miniaturas generadas de la imagen (WebP/JPEG por tamaño)'
+    )
     orden = models.IntegerField(default=0)
     
     class Meta:
@@ -86,3 +101,106 @@ class ImagenProducto(models.Model):
     
     def __str__(self):
         return f"Imagen {self.orden} - {self.producto.nombre}"
+
+
+class SubidaImagen(models.Model):
+    """
+    Imagen subida que espera ser procesada en segundo plano
+    (validación, limpieza de EXIF, optimización y movida a su destino)
+    """
+    DESTINO_CHOICES = [
+        ('principal', 'Imagen principal'),
+        ('galeria', 'Galería'),
+    ]
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completada', 'Completada'),
+        ('error', 'Error'),
+    ]
+
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='subidas_imagen'
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='subidas_imagen'
+    )
+    destino = models.CharField(max_length=20, choices=DESTINO_CHOICES, default='principal')
+    orden = models.IntegerField(default=0)
+    archivo = models.FileField(upload_to='subidas/%Y/%m/%d/', blank=True)
+    nombre_original = models.CharField(max_length=255, blank=True)
+    tamanio = models.PositiveIntegerField(default=0)
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente', db_index=True)
+    progreso = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    imagen_galeria = models.ForeignKey(
+        ImagenProducto,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    ruta_final = models.CharField(max_length=255, blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'subidas_imagen'
+        verbose_name = 'Subida de Imagen'
+        verbose_name_plural = 'Subidas de Imágenes'
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        return f"Subida {self.id} - {self.nombre_original} ({self.estado})"
+
+
+class MovimientoStock(models.Model):
+    """
+    Registro de solo escritura de cada cambio de stock (ledger).
+    Se crea desde apps/catalogo/stock.py; no se edita ni se borra.
+    """
+    MOTIVO_CHOICES = [
+        ('venta', 'Venta'),
+        ('devolucion', 'Devolución'),
+        ('reposicion', 'Reposición'),
+        ('ajuste', 'Ajuste manual'),
+        ('sincronizacion', 'Sincronización de depósito'),
+        ('importacion', 'Importación masiva'),
+    ]
+
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='movimientos_stock'
+    )
+    cantidad = models.IntegerField(help_text='Delta aplicado (negativo = egreso)')
+    stock_resultante = models.IntegerField()
+    motivo = models.CharField(max_length=20, choices=MOTIVO_CHOICES, default='ajuste')
+    referencia = models.CharField(max_length=100, blank=True, help_text='Ej: número de pedido o de remito')
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='movimientos_stock'
+    )
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'movimientos_stock'
+        verbose_name = 'Movimiento de Stock'
+        verbose_name_plural = 'Movimientos de Stock'
+        ordering = ['-fecha', '-id']
+        indexes = [
+            models.Index(fields=['producto', 'fecha']),
+            models.Index(fields=['fecha']),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_id}: {self.cantidad:+d} ({self.motivo})"
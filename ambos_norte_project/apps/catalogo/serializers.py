@@ -1,5 +1,8 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
-from .models import Categoria, Producto, ImagenProducto
+from ambos_norte import serializacion_rapida as rapida
+from .models import Categoria, Producto, ImagenProducto, SubidaImagen, MovimientoStock
+from .imagenes import srcset
 
 
 class CategoriaSerializer(serializers.ModelSerializer):
@@ -10,10 +13,11 @@ class CategoriaSerializer(serializers.ModelSerializer):
 
 class ImagenProductoSerializer(serializers.ModelSerializer):
     imagen_url = serializers.SerializerMethodField()
+    imagen_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = ImagenProducto
-        fields = ["id", "orden", "imagen", "imagen_url"]
+        fields = ["id", "orden", "imagen", "imagen_url", "imagen_srcset"]
 
     def get_imagen_url(self, obj):
         try:
@@ -25,10 +29,14 @@ class ImagenProductoSerializer(serializers.ModelSerializer):
             pass
         return None
 
+    def get_imagen_srcset(self, obj):
+        return srcset(obj.variantes, self.context.get("request"))
+
 
 class ProductoListSerializer(serializers.ModelSerializer):
     categoria_nombre = serializers.CharField(source='categoria.nombre', read_only=True)
     imagen_principal_url = serializers.SerializerMethodField()
+    imagen_principal_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Producto
@@ -41,6 +49,7 @@ class ProductoListSerializer(serializers.ModelSerializer):
             "destacado",
             "imagen_principal",
             "imagen_principal_url",
+            "imagen_principal_srcset",
             "categoria",
             "categoria_nombre",
         ]
@@ -55,10 +64,35 @@ class ProductoListSerializer(serializers.ModelSerializer):
             pass
         return None
 
+    def get_imagen_principal_srcset(self, obj):
+        return srcset(obj.imagen_variantes, self.context.get("request"))
+
+
+def _srcset_rapido(variantes, contexto):
+    return srcset(variantes, url_media=contexto.url_media)
+
+
+# Misma salida que ProductoListSerializer, armada desde values()
+# (ver ambos_norte/serializacion_rapida.py)
+PRODUCTO_LISTA_RAPIDO = rapida.Esquema(
+    ('id', 'id', None),
+    ('nombre', 'nombre', rapida.texto),
+    ('precio', 'precio', rapida.decimal(10, 2)),
+    ('stock', 'stock', None),
+    ('activo', 'activo', None),
+    ('destacado', 'destacado', None),
+    ('imagen_principal', 'imagen_principal', rapida.archivo),
+    ('imagen_principal_url', 'imagen_principal', rapida.archivo),
+    ('imagen_principal_srcset', 'imagen_variantes', _srcset_rapido),
+    ('categoria', 'categoria', None),
+    ('categoria_nombre', 'categoria__nombre', rapida.texto),
+)
+
 
 class ProductoDetailSerializer(serializers.ModelSerializer):
     categoria_nombre = serializers.CharField(source='categoria.nombre', read_only=True)
     imagen_principal_url = serializers.SerializerMethodField()
+    imagen_principal_srcset = serializers.SerializerMethodField()
     imagenes = ImagenProductoSerializer(many=True, read_only=True)
 
     class Meta:
@@ -76,6 +110,7 @@ class ProductoDetailSerializer(serializers.ModelSerializer):
             "destacado",
             "imagen_principal",
             "imagen_principal_url",
+            "imagen_principal_srcset",
             "categoria",
             "categoria_nombre",
             "imagenes",
@@ -92,6 +127,9 @@ class ProductoDetailSerializer(serializers.ModelSerializer):
             pass
         return None
 
+    def get_imagen_principal_srcset(self, obj):
+        return srcset(obj.imagen_variantes, self.context.get("request"))
+
 
 class ProductoSerializer(serializers.ModelSerializer):
     """Serializer para crear y actualizar productos"""
@@ -140,4 +178,72 @@ class ProductoSerializer(serializers.ModelSerializer):
                 data = dict(data)
             data['destacado'] = data.get('destacado', 'false').lower() == 'true'
         
-        return super().to_internal_value(data)
\ No newline at end of file
+        return super().to_internal_value(data)
+
+class SubidaImagenSerializer(serializers.ModelSerializer):
+    """Estado de una subida de imagen en procesamiento"""
+    imagen_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SubidaImagen
+        fields = [
+            "id",
+            "producto",
+            "destino",
+            "orden",
+            "nombre_original",
+            "tamanio",
+            "estado",
+            "progreso",
+            "error",
+            "imagen_galeria",
+            "imagen_url",
+            "fecha_creacion",
+            "fecha_actualizacion",
+        ]
+        read_only_fields = fields
+
+    def get_imagen_url(self, obj):
+        if obj.estado != 'completada' or not obj.ruta_final:
+            return None
+        request = self.context.get("request")
+        url = default_storage.url(obj.ruta_final)
+        return request.build_absolute_uri(url) if request else url
+
+
+
+class MovimientoStockSerializer(serializers.ModelSerializer):
+    producto_nombre = serializers.CharField(source='producto.nombre', read_only=True)
+
+    class Meta:
+        model = MovimientoStock
+        fields = [
+            "id",
+            "producto",
+            "producto_nombre",
+            "cantidad",
+            "stock_resultante",
+            "motivo",
+            "referencia",
+            "usuario",
+            "fecha",
+        ]
+        read_only_fields = fields
+
+
+class DeltaStockSerializer(serializers.Serializer):
+    producto_id = serializers.IntegerField()
+    cantidad = serializers.IntegerField()
+
+    def validate_cantidad(self, value):
+        if value == 0:
+            raise serializers.ValidationError("La cantidad no puede ser 0")
+        return value
+
+
+class AjusteStockSerializer(serializers.Serializer):
+    """Lote de deltas de stock (positivos = ingreso, negativos = egreso)"""
+    movimientos = DeltaStockSerializer(many=True, allow_empty=False)
+    motivo = serializers.ChoiceField(choices=MovimientoStock.MOTIVO_CHOICES, default='ajuste')
+    referencia = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    parcial = serializers.BooleanField(default=False)
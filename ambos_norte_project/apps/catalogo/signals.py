@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Categoria, Producto, ImagenProducto
+from .indices import marcar_producto, marcar_categoria
+from .imagenes import procesar_producto, procesar_imagen_galeria, variantes_desactualizadas
+from .tareas import encolar
+
+
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+def marcar_producto_en_indices(sender, instance, **kwargs):
+    """
+    Marcar el producto para que los índices en memoria lo refresquen
+    (búsqueda, autocompletado, facetas) una vez confirmada la transacción
+    """
+    producto_id = instance.pk
+    transaction.on_commit(lambda: marcar_producto(producto_id))
+
+
+@receiver(post_save, sender=Categoria)
+def marcar_categoria_en_indices(sender, instance, **kwargs):
+    """
+    El nombre de la categoría forma parte del índice de sus productos
+    """
+    categoria_id = instance.pk
+    transaction.on_commit(lambda: marcar_categoria(categoria_id))
+
+
+@receiver(post_save, sender=Producto)
+def generar_variantes_producto(sender, instance, **kwargs):
+    """
+    Encolar la generación de miniaturas cuando cambia la imagen principal
+    """
+    if variantes_desactualizadas(instance.imagen_principal.name, instance.imagen_variantes):
+        encolar(procesar_producto, instance.pk)
+    elif not instance.imagen_principal and instance.imagen_variantes:
+        Producto.objects.filter(pk=instance.pk).update(imagen_variantes={})
+
+
+@receiver(post_save, sender=ImagenProducto)
+def generar_variantes_galeria(sender, instance, **kwargs):
+    if variantes_desactualizadas(instance.imagen.name, instance.variantes):
+        encolar(procesar_imagen_galeria, instance.pk)
@@ -0,0 +1,161 @@
+from collections import defaultdict
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+from .models import Producto, MovimientoStock
+
+
+class _StockInsuficiente(Exception):
+    pass
+
+
+def _agrupar(movimientos):
+    """Suma los deltas por producto: [(id, delta)] o {id: delta} -> {id: delta}"""
+    items = movimientos.items() if isinstance(movimientos, dict) else movimientos
+    deltas = defaultdict(int)
+    for producto_id, cantidad in items:
+        deltas[int(producto_id)] += int(cantidad)
+    return {producto_id: delta for producto_id, delta in deltas.items() if delta}
+
+
+def _expresion_delta(deltas):
+    return Case(
+        *[When(id=producto_id, then=Value(delta)) for producto_id, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _errores_stock(deltas, stocks, nombres):
+    errores = []
+    for producto_id, delta in deltas.items():
+        if producto_id not in stocks:
+            errores.append(f"Producto con id {producto_id} no existe")
+        elif stocks[producto_id] + delta < 0:
+            errores.append(
+                f"Stock insuficiente para '{nombres[producto_id]}'. "
+                f"Disponible: {stocks[producto_id]}"
+            )
+    return errores
+
+
+def aplicar_movimientos(movimientos, motivo='ajuste', referencia='', usuario=None, parcial=False):
+    """
+    Aplica un lote de deltas de stock y los registra en MovimientoStock.
+
+    Todos los deltas se aplican con un único
+        UPDATE productos SET stock = stock + CASE id ... END
+        WHERE id IN (...) AND stock + CASE id ... END >= 0
+    así no hay lecturas previas ni actualizaciones perdidas con checkouts
+    concurrentes. Si algún producto quedaría en negativo no se aplica nada
+    y se lanza ValidationError (o, con parcial=True, se aplican los demás).
+
+    Devuelve (stocks, rechazados): {producto_id: stock_nuevo} y la lista de
+    errores de los deltas que no se aplicaron (solo con parcial=True).
+    """
+    deltas = _agrupar(movimientos)
+    if not deltas:
+        return {}, []
+
+    usuario = usuario if usuario is not None and usuario.is_authenticated else None
+    rechazados = []
+
+    try:
+        with transaction.atomic():
+            if parcial:
+                # Se bloquean las filas para saber de antemano cuáles entran
+                filas = list(Producto.objects.select_for_update().filter(
+                    id__in=deltas
+                ).values_list('id', 'stock', 'nombre'))
+                stocks = {producto_id: stock for producto_id, stock, _ in filas}
+                nombres = {producto_id: nombre for producto_id, _, nombre in filas}
+                rechazados = _errores_stock(deltas, stocks, nombres)
+                deltas = {
+                    producto_id: delta for producto_id, delta in deltas.items()
+                    if producto_id in stocks and stocks[producto_id] + delta >= 0
+                }
+                if not deltas:
+                    return {}, rechazados
+
+            delta = _expresion_delta(deltas)
+            actualizados = Producto.objects.filter(
+                GreaterThanOrEqual(F('stock') + delta, 0),
+                id__in=deltas,
+            ).update(stock=F('stock') + delta, fecha_modificacion=timezone.now())
+
+            if actualizados != len(deltas):
+                # Se deshace el UPDATE parcial antes de armar los errores
+                raise _StockInsuficiente
+
+            stocks = dict(Producto.objects.filter(id__in=deltas).values_list('id', 'stock'))
+            MovimientoStock.objects.bulk_create([
+                MovimientoStock(
+                    producto_id=producto_id,
+                    cantidad=cantidad,
+                    stock_resultante=stocks[producto_id],
+                    motivo=motivo,
+                    referencia=referencia[:100],
+                    usuario=usuario,
+                )
+                for producto_id, cantidad in deltas.items()
+            ])
+    except _StockInsuficiente:
+        # Otro proceso se llevó el stock o algún id no existe
+        filas = list(Producto.objects.filter(id__in=deltas).values_list('id', 'stock', 'nombre'))
+        errores = _errores_stock(
+            deltas,
+            {producto_id: stock for producto_id, stock, _ in filas},
+            {producto_id: nombre for producto_id, _, nombre in filas},
+        )
+        raise ValidationError(errores or ['El stock cambió durante la operación, intente de nuevo'])
+
+    return stocks, rechazados
+
+
+def registrar_movimientos(cambios, motivo='ajuste', referencia='', usuario=None):
+    """
+    Registra movimientos de cambios ya aplicados por otra vía
+    (p. ej. bulk_update de la importación): [(producto_id, delta, stock_nuevo)]
+    """
+    usuario = usuario if usuario is not None and usuario.is_authenticated else None
+    MovimientoStock.objects.bulk_create([
+        MovimientoStock(
+            producto_id=producto_id,
+            cantidad=cantidad,
+            stock_resultante=stock,
+            motivo=motivo,
+            referencia=referencia[:100],
+            usuario=usuario,
+        )
+        for producto_id, cantidad, stock in cambios
+        if cantidad
+    ])
+
+
+def guardar_sin_stock(producto):
+    """
+    Guarda un producto existente sin escribir la columna stock. El stock
+    solo cambia con deltas (aplicar_movimientos): un save() completo
+    volvería a escribir el valor leído antes y desharía las ventas
+    confirmadas en el medio.
+    """
+    producto.save(update_fields=[
+        campo.name for campo in producto._meta.concrete_fields
+        if not campo.primary_key and campo.name != 'stock'
+    ])
+
+
+def ajustar_stock(producto, stock_visto, stock_nuevo, motivo='ajuste', referencia='', usuario=None):
+    """
+    Lleva el stock de `stock_visto` (lo que vio quien edita) a `stock_nuevo`
+    aplicando la diferencia como delta; producto.stock queda con el valor
+    resultante en la base
+    """
+    delta = int(stock_nuevo) - int(stock_visto)
+    if delta:
+        stocks, _ = aplicar_movimientos({producto.pk: delta}, motivo, referencia, usuario)
+        producto.stock = stocks[producto.pk]
+    else:
+        producto.refresh_from_db(fields=['stock'])
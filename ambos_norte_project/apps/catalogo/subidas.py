@@ -0,0 +1,143 @@
+import os
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+from .models import ImagenProducto, SubidaImagen
+from .tareas import encolar
+
+
+FORMATOS_PERMITIDOS = {'JPEG', 'PNG', 'WEBP'}
+MAX_BYTES = getattr(settings, 'IMAGENES_MAX_BYTES', 20 * 1024 * 1024)
+MAX_PIXELES = getattr(settings, 'IMAGENES_MAX_PIXELES', 40_000_000)
+# Lado mayor con el que se guarda el original optimizado
+MAX_LADO = getattr(settings, 'IMAGENES_MAX_LADO', 2400)
+
+EXTENSIONES = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+
+class ImagenInvalida(Exception):
+    pass
+
+
+def validar_archivo(archivo):
+    """Chequeo barato antes de aceptar la subida (el resto lo hace el worker)"""
+    if archivo.size > MAX_BYTES:
+        raise ImagenInvalida(f"La imagen supera el máximo de {MAX_BYTES // (1024 * 1024)} MB")
+
+
+def crear_subida(producto, archivo, destino='principal', orden=0, usuario=None):
+    """
+    Guarda el archivo en el área de staging y encola su procesamiento.
+    El archivo ya viene en disco (TemporaryUploadedFile) o en memoria
+    si es chico, así que esto es solo una copia/movida.
+    """
+    validar_archivo(archivo)
+
+    subida = SubidaImagen(
+        producto=producto,
+        usuario=usuario if usuario and usuario.is_authenticated else None,
+        destino=destino,
+        orden=orden,
+        nombre_original=os.path.basename(archivo.name)[:255],
+        tamanio=archivo.size,
+    )
+    subida.archivo.save(archivo.name, archivo, save=False)
+    subida.save()
+    encolar(procesar_subida, subida.pk)
+    return subida
+
+
+def _actualizar(subida_id, **campos):
+    SubidaImagen.objects.filter(pk=subida_id).update(**campos)
+
+
+def _optimizar(archivo):
+    """
+    Valida la imagen y la vuelve a codificar: aplica la rotación EXIF,
+    descarta los metadatos (EXIF, GPS, perfiles) y limita el tamaño.
+    Devuelve (contenido, extension).
+    """
+    try:
+        imagen = Image.open(archivo)
+        imagen.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError) as e:
+        raise ImagenInvalida(f"El archivo no es una imagen válida: {e}")
+
+    if imagen.format not in FORMATOS_PERMITIDOS:
+        raise ImagenInvalida(f"Formato no permitido: {imagen.format}")
+    if imagen.width * imagen.height > MAX_PIXELES:
+        raise ImagenInvalida(f"Imagen demasiado grande: {imagen.width}x{imagen.height}")
+
+    # verify() deja la imagen inutilizable; hay que volver a abrirla
+    archivo.seek(0)
+    imagen = Image.open(archivo)
+    formato = imagen.format
+    imagen = ImageOps.exif_transpose(imagen)
+    imagen.thumbnail((MAX_LADO, MAX_LADO), Image.LANCZOS)
+
+    salida = BytesIO()
+    if formato == 'JPEG':
+        if imagen.mode != 'RGB':
+            imagen = imagen.convert('RGB')
+        imagen.save(salida, 'JPEG', quality=85, optimize=True, progressive=True)
+    elif formato == 'PNG':
+        imagen.save(salida, 'PNG', optimize=True)
+    else:
+        imagen.save(salida, 'WEBP', quality=85, method=4)
+    return salida.getvalue(), EXTENSIONES[formato]
+
+
+def procesar_subida(subida_id):
+    """
+    Procesa una subida pendiente: valida, limpia, optimiza y la mueve al
+    campo de imagen del producto (o a la galería). Las variantes se generan
+    después con las señales de imagenes.py.
+    """
+    tomadas = SubidaImagen.objects.filter(
+        pk=subida_id, estado='pendiente'
+    ).update(estado='procesando', progreso=10)
+    if not tomadas:
+        return  # ya la tomó otro worker
+    subida = SubidaImagen.objects.select_related('producto').get(pk=subida_id)
+
+    try:
+        with subida.archivo.open('rb') as archivo:
+            contenido, extension = _optimizar(archivo)
+        _actualizar(subida_id, progreso=60)
+
+        base = os.path.splitext(subida.nombre_original)[0] or f'producto_{subida.producto_id}'
+        nombre = f'{base}.{extension}'
+
+        with transaction.atomic():
+            producto = subida.producto
+            if subida.destino == 'principal':
+                producto.imagen_principal.save(nombre, ContentFile(contenido), save=False)
+                producto.save(update_fields=['imagen_principal', 'fecha_modificacion'])
+                ruta_final = producto.imagen_principal.name
+                imagen_galeria = None
+            else:
+                imagen_galeria = ImagenProducto(producto=producto, orden=subida.orden)
+                imagen_galeria.imagen.save(nombre, ContentFile(contenido), save=False)
+                imagen_galeria.save()
+                ruta_final = imagen_galeria.imagen.name
+
+            _actualizar(
+                subida_id,
+                estado='completada',
+                progreso=100,
+                error='',
+                ruta_final=ruta_final,
+                imagen_galeria=imagen_galeria,
+            )
+        subida.archivo.delete(save=False)
+        _actualizar(subida_id, archivo='')
+    except ImagenInvalida as e:
+        # Error definitivo: se descarta el archivo
+        subida.archivo.delete(save=False)
+        _actualizar(subida_id, estado='error', error=str(e), archivo='')
+    except Exception as e:
+        # Error inesperado: se conserva el archivo para reintentar
+        print(f"Error procesando subida {subida_id}: {e}")
+        _actualizar(subida_id, estado='error', error=str(e))
@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+
+# Trabajos de fondo en el mismo proceso (procesamiento de imágenes).
+# Con CATALOGO_TAREAS_EN_SEGUNDO_PLANO = False no se encola nada y los
+# pendientes quedan para los comandos de management.
+EN_SEGUNDO_PLANO = getattr(settings, 'CATALOGO_TAREAS_EN_SEGUNDO_PLANO', True)
+WORKERS = getattr(settings, 'CATALOGO_TAREAS_WORKERS', 2)
+
+_executor = None
+
+
+def _obtener_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='catalogo')
+    return _executor
+
+
+def _ejecutar(funcion, args):
+    close_old_connections()
+    try:
+        funcion(*args)
+    except Exception as e:
+        print(f"Error en tarea {funcion.__name__}{args}: {e}")
+    finally:
+        close_old_connections()
+
+
+def encolar(funcion, *args):
+    """
+    Ejecuta funcion(*args) en un hilo de fondo una vez confirmada la
+    transacción actual. Devuelve False si el procesamiento en segundo
+    plano está desactivado.
+    """
+    if not EN_SEGUNDO_PLANO:
+        return False
+    transaction.on_commit(lambda: _obtener_executor().submit(_ejecutar, funcion, args))
+    return True
@@ -1,3 +1,229 @@
-from django.test import TestCase
+import threading
+from decimal import Decimal
+from unittest import mock, skipIf
+from django.core.exceptions import ValidationError
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+from apps.usuarios.models import Usuario
+from .busqueda import IndiceBusqueda, indice_busqueda, raiz
+from .facetas import indice_facetas
+from .models import Categoria, Producto, MovimientoStock
+from .stock import aplicar_movimientos, ajustar_stock, guardar_sin_stock
 
-# Create your tests here.
+
+def crear_producto(nombre='Ambo', stock=10, categoria=None):
+    categoria = categoria or Categoria.objects.get_or_create(nombre='Ambos')[0]
+    return Producto.objects.create(categoria=categoria, nombre=nombre, precio=Decimal('1000.00'), stock=stock)
+
+
+class AplicarMovimientosTests(TestCase):
+
+    def setUp(self):
+        self.ambo = crear_producto('Ambo', stock=10)
+        self.chaqueta = crear_producto('Chaqueta', stock=3)
+
+    def test_descuenta_y_registra_movimientos(self):
+        stocks, rechazados = aplicar_movimientos(
+            [(self.ambo.id, -2), (self.chaqueta.id, -1), (self.ambo.id, -1)],
+            motivo='venta', referencia='PN1'
+        )
+
+        self.assertEqual(stocks, {self.ambo.id: 7, self.chaqueta.id: 2})
+        self.assertEqual(rechazados, [])
+        movimientos = {
+            movimiento.producto_id: movimiento
+            for movimiento in MovimientoStock.objects.filter(referencia='PN1')
+        }
+        self.assertEqual(len(movimientos), 2)
+        self.assertEqual(movimientos[self.ambo.id].cantidad, -3)
+        self.assertEqual(movimientos[self.ambo.id].stock_resultante, 7)
+        self.assertEqual(movimientos[self.ambo.id].motivo, 'venta')
+        self.assertEqual(movimientos[self.chaqueta.id].stock_resultante, 2)
+
+    def test_no_queda_negativo_y_no_aplica_nada(self):
+        with self.assertRaises(ValidationError) as contexto:
+            aplicar_movimientos({self.ambo.id: -1, self.chaqueta.id: -4}, motivo='venta')
+
+        self.assertIn('Chaqueta', contexto.exception.messages[0])
+        self.ambo.refresh_from_db()
+        self.chaqueta.refresh_from_db()
+        self.assertEqual((self.ambo.stock, self.chaqueta.stock), (10, 3))
+        self.assertFalse(MovimientoStock.objects.exists())
+
+    def test_parcial_aplica_los_que_entran(self):
+        stocks, rechazados = aplicar_movimientos(
+            {self.ambo.id: -1, self.chaqueta.id: -4}, motivo='importacion', parcial=True
+        )
+
+        self.assertEqual(stocks, {self.ambo.id: 9})
+        self.assertEqual(len(rechazados), 1)
+        self.chaqueta.refresh_from_db()
+        self.assertEqual(self.chaqueta.stock, 3)
+        self.assertEqual(MovimientoStock.objects.count(), 1)
+
+    def test_producto_inexistente(self):
+        with self.assertRaises(ValidationError):
+            aplicar_movimientos({self.ambo.id: -1, 999999: -1})
+        self.ambo.refresh_from_db()
+        self.assertEqual(self.ambo.stock, 10)
+
+    def test_decrementos_sobre_datos_viejos_no_se_pierden(self):
+        # Dos checkouts que leyeron stock=10 antes de que el otro confirmara
+        visto_a = Producto.objects.get(id=self.ambo.id)
+        visto_b = Producto.objects.get(id=self.ambo.id)
+        aplicar_movimientos({visto_a.id: -4}, motivo='venta')
+        aplicar_movimientos({visto_b.id: -5}, motivo='venta')
+
+        self.ambo.refresh_from_db()
+        self.assertEqual(self.ambo.stock, 1)
+        with self.assertRaises(ValidationError):
+            aplicar_movimientos({visto_a.id: -2}, motivo='venta')
+
+    def test_edicion_no_pisa_una_venta_concurrente(self):
+        editado = Producto.objects.get(id=self.ambo.id)
+        aplicar_movimientos({self.ambo.id: -3}, motivo='venta')
+
+        editado.nombre = 'Ambo clásico'
+        guardar_sin_stock(editado)
+        ajustar_stock(editado, stock_visto=10, stock_nuevo=15)
+
+        self.ambo.refresh_from_db()
+        self.assertEqual(self.ambo.nombre, 'Ambo clásico')
+        self.assertEqual(self.ambo.stock, 12)
+        self.assertEqual(editado.stock, 12)
+        self.assertEqual(
+            list(MovimientoStock.objects.order_by('id').values_list('cantidad', 'stock_resultante')),
+            [(-3, 7), (5, 12)]
+        )
+
+
+class EditarProductoTests(TestCase):
+
+    def setUp(self):
+        self.producto = crear_producto('Ambo', stock=10)
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(Usuario.objects.create_user(username='admin', is_staff=True))
+        self.url = f'/api/catalogo/producto/{self.producto.id}/'
+
+    def test_editar_sin_stock_conserva_ventas(self):
+        aplicar_movimientos({self.producto.id: -3}, motivo='venta')
+
+        # El formulario se cargó con stock=10 y lo reenvía sin cambios
+        respuesta = self.cliente.patch(
+            self.url, {'nombre': 'Ambo clásico', 'stock': 10, 'stock_anterior': 10}, format='json'
+        )
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.nombre, 'Ambo clásico')
+        self.assertEqual(self.producto.stock, 7)
+        self.assertFalse(MovimientoStock.objects.filter(motivo='ajuste').exists())
+
+    def test_stock_anterior_invalido(self):
+        respuesta = self.cliente.patch(self.url, {'stock': 12, 'stock_anterior': 'x'}, format='json')
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 10)
+
+    def test_stock_anterior_aplica_la_diferencia(self):
+        aplicar_movimientos({self.producto.id: -3}, motivo='venta')
+
+        respuesta = self.cliente.patch(self.url, {'stock': 12, 'stock_anterior': 10}, format='json')
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['stock'], 9)
+        self.assertEqual(MovimientoStock.objects.filter(motivo='ajuste').get().cantidad, 2)
+
+
+class BusquedaTests(TestCase):
+
+    PARES = [
+        ('remera', 'remeras'), ('ambo', 'ambos'), ('color', 'colores'), ('azul', 'azules'),
+        ('gris', 'grises'), ('verde', 'verdes'), ('grande', 'grandes'), ('talle', 'talles'),
+        ('broche', 'broches'), ('luz', 'luces'), ('lapiz', 'lapices'), ('dulce', 'dulces'),
+    ]
+
+    def test_singular_y_plural_tienen_la_misma_raiz(self):
+        for singular, plural in self.PARES:
+            with self.subTest(singular=singular):
+                self.assertEqual(raiz(singular), raiz(plural))
+
+    def test_busca_en_ambas_direcciones(self):
+        categoria = Categoria.objects.create(nombre='Chaquetas')
+        verdes = crear_producto('Ambos verdes', categoria=categoria)
+        grande = crear_producto('Chaqueta grande', categoria=categoria)
+        luces = crear_producto('Cofia con luces', categoria=categoria)
+        indice = IndiceBusqueda()
+        indice.reconstruir()
+
+        for consulta, producto in [
+            ('verde', verdes), ('verdes', verdes), ('ambo verde', verdes),
+            ('grande', grande), ('grandes', grande),
+            ('luz', luces), ('luces', luces),
+        ]:
+            with self.subTest(consulta=consulta):
+                self.assertEqual(indice.buscar(consulta), [producto.id])
+
+
+class ListadoBusquedaTests(TestCase):
+
+    def setUp(self):
+        self.productos = [crear_producto(f'Ambo {i}') for i in range(5)]
+        # El último rankea más abajo: 'ambo' solo aparece en la descripción
+        self.rojo = self.productos[-1]
+        Producto.objects.filter(id=self.rojo.id).update(nombre='Chaqueta', descripcion='ambo', color='Rojo')
+        indice_busqueda.reconstruir()
+        indice_facetas.reconstruir()
+        self.cliente = APIClient()
+
+    def ids(self, url):
+        respuesta = self.cliente.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return [producto['id'] for producto in respuesta.data]
+
+    def test_recorta_despues_de_filtrar_por_facetas(self):
+        with mock.patch('apps.catalogo.views.MAX_RESULTADOS', 2):
+            self.assertEqual(len(self.ids('/api/catalogo/producto/?search=ambo')), 2)
+            self.assertEqual(self.ids('/api/catalogo/producto/?search=ambo&color=Rojo'), [self.rojo.id])
+
+    def test_conteos_y_resultados_coinciden_con_espacios_guardados(self):
+        Producto.objects.filter(id=self.productos[0].id).update(color=' Azul ', talla='M ')
+        indice_facetas.reconstruir()
+
+        conteos = self.cliente.get('/api/catalogo/producto/facetas/?color=Azul').data
+        self.assertEqual(conteos['total'], 1)
+        self.assertIn({'valor': 'Azul', 'cantidad': 1, 'seleccionado': True}, conteos['facetas']['color'])
+        self.assertEqual(self.ids('/api/catalogo/producto/?color=Azul&talla=M'), [self.productos[0].id])
+        self.assertEqual(self.ids('/api/catalogo/producto/?search=ambo&color=Azul'), [self.productos[0].id])
+
+
+@skipIf(connection.vendor == 'sqlite', 'sqlite no admite escrituras concurrentes')
+class AplicarMovimientosConcurrenteTests(TransactionTestCase):
+
+    def test_checkouts_concurrentes_no_venden_de_mas(self):
+        producto = crear_producto('Ambo', stock=5)
+        resultados = []
+        barrera = threading.Barrier(8)
+
+        def comprar():
+            try:
+                barrera.wait()
+                aplicar_movimientos({producto.id: -1}, motivo='venta')
+                resultados.append(True)
+            except ValidationError:
+                resultados.append(False)
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=comprar) for _ in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        producto.refresh_from_db()
+        self.assertEqual(resultados.count(True), 5)
+        self.assertEqual(producto.stock, 0)
+        self.assertEqual(MovimientoStock.objects.filter(producto=producto).count(), 5)
@@ -1,10 +1,12 @@
 from rest_framework.routers import DefaultRouter
-from .views import CategoriaViewSet, ProductoViewSet, ImagenProductoViewSet
+from .views import CategoriaViewSet, ProductoViewSet, ImagenProductoViewSet, SubidaImagenViewSet, MovimientoStockViewSet
 
 router = DefaultRouter()
 
 router.register(r'categoria', CategoriaViewSet, basename='categoria')
 router.register(r'producto', ProductoViewSet, basename='producto')
 router.register(r'imagen-producto', ImagenProductoViewSet, basename='imagen_producto')
+router.register(r'subida-imagen', SubidaImagenViewSet, basename='subida_imagen')
+router.register(r'movimiento-stock', MovimientoStockViewSet, basename='movimiento_stock')
 
 urlpatterns = router.urls
\ No newline at end of file
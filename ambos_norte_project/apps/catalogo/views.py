@@ -1,19 +1,37 @@
 from django.shortcuts import render
-from rest_framework import viewsets, status
+from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
 from django.core.exceptions import ValidationError
-from .models import Categoria, Producto, ImagenProducto
+from django.db import transaction
+from django.db.models import Case, When
+from .models import Categoria, Producto, ImagenProducto, SubidaImagen, MovimientoStock
+from .busqueda import MAX_RESULTADOS, indice_busqueda
+from .autocompletado import indice_autocompletado
+from .facetas import indice_facetas, leer_filtros, aplicar_filtros
 from .serializers import (
     CategoriaSerializer, 
     ProductoListSerializer, 
     ProductoDetailSerializer, 
     ProductoSerializer,
-    ImagenProductoSerializer
+    ImagenProductoSerializer,
+    SubidaImagenSerializer,
+    MovimientoStockSerializer,
+    AjusteStockSerializer,
+    PRODUCTO_LISTA_RAPIDO
 )
+from .stock import aplicar_movimientos, registrar_movimientos, guardar_sin_stock, ajustar_stock
+from .subidas import crear_subida, validar_archivo, ImagenInvalida
+from .importacion import ImportadorProductos, leer_filas, detectar_formato
+from ambos_norte.renderers import ParserJSONRapido
+from ambos_norte.serializacion_rapida import Contexto
 from apps.analytics.utils import AnalyticsTracker
+from apps.analytics.visitante import visitante_id
+from apps.analytics.models import RecomendacionProducto
+from apps.analytics.actividad import productos_recientes, productos_para_ti
+from apps.analytics.tendencias import productos_en_tendencia
 
 
 class CategoriaViewSet(viewsets.ModelViewSet):
@@ -38,7 +56,7 @@ class ProductoViewSet(viewsets.ModelViewSet):
     ViewSet para gestionar productos con analytics
     """
     queryset = Producto.objects.all()
-    parser_classes = [MultiPartParser, FormParser, JSONParser]  # ⬅️ AGREGAR ESTA LÍNEA
+    parser_classes = [MultiPartParser, FormParser, ParserJSONRapido]
     
     def get_serializer_class(self):
         """Usar serializer apropiado según la acción"""
@@ -54,19 +72,30 @@ class ProductoViewSet(viewsets.ModelViewSet):
         """
         queryset = Producto.objects.all()
         
-        # Filtro por categoría
-        categoria = self.request.query_params.get('categoria', None)
-        if categoria:
-            queryset = queryset.filter(categoria_id=categoria)
+        # Filtros por facetas: categoría, talla, color, material (valores
+        # separados por coma) y rango de precio (precio_min / precio_max)
+        filtros, precio_min, precio_max = leer_filtros(self.request.query_params)
+        queryset = aplicar_filtros(queryset, filtros, precio_min, precio_max)
         
-        # Filtro por búsqueda en nombre
+        # Filtro por búsqueda (índice invertido en memoria, ordenado por relevancia)
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                nombre__icontains=search
-            ) | queryset.filter(
-                descripcion__icontains=search
-            )
+            # Todas las coincidencias pasan por los filtros de facetas en memoria
+            # y recién después se recortan: el CASE de relevancia y el IN
+            # quedan acotados sin perder las que estaban más abajo del ranking
+            solo_activos = not self.request.user.is_staff
+            ids = indice_busqueda.buscar(search, solo_activos=solo_activos, limite=None)
+            if filtros or precio_min is not None or precio_max is not None:
+                ids = indice_facetas.filtrar(ids, filtros, precio_min, precio_max, solo_activos=solo_activos)
+            ids = ids[:MAX_RESULTADOS]
+            if ids:
+                relevancia = Case(*[
+                    When(id=producto_id, then=posicion)
+                    for posicion, producto_id in enumerate(ids)
+                ])
+                queryset = queryset.filter(id__in=ids).order_by(relevancia)
+            else:
+                queryset = queryset.none()
         
         # Filtro por activos (solo para usuarios no admin)
         if not self.request.user.is_staff:
@@ -93,18 +122,20 @@ class ProductoViewSet(viewsets.ModelViewSet):
         GET: Cualquiera puede ver productos
         POST/PUT/DELETE: Solo administradores
         """
-        if self.action in ['list', 'retrieve', 'buscar']:
+        if self.action in ['list', 'retrieve', 'buscar', 'sugerencias', 'facetas', 'relacionados', 'recientes', 'para_ti', 'tendencias']:
             return [AllowAny()]
         return [IsAuthenticated(), IsAdminUser()]
 
     def create(self, request, *args, **kwargs):
         """Override para debugging y mejor manejo de errores"""
         try:
-            serializer = self.get_serializer(data=request.data)
+            datos, archivo = self._separar_imagen(request)
+            serializer = self.get_serializer(data=datos)
             serializer.is_valid(raise_exception=True)
             self.perform_create(serializer)
+            data = self._encolar_imagen(serializer, archivo)
             headers = self.get_success_headers(serializer.data)
-            return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+            return Response(data, status=status.HTTP_201_CREATED, headers=headers)
         except Exception as e:
             print(f"❌ Error en create: {str(e)}")
             print(f"📋 Request data: {request.data}")
@@ -119,14 +150,15 @@ class ProductoViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         
         try:
-            serializer = self.get_serializer(instance, data=request.data, partial=partial)
+            datos, archivo = self._separar_imagen(request)
+            serializer = self.get_serializer(instance, data=datos, partial=partial)
             serializer.is_valid(raise_exception=True)
             self.perform_update(serializer)
             
             if getattr(instance, '_prefetched_objects_cache', None):
                 instance._prefetched_objects_cache = {}
                 
-            return Response(serializer.data)
+            return Response(self._encolar_imagen(serializer, archivo))
         except Exception as e:
             print(f"❌ Error en update: {str(e)}")
             print(f"📋 Request data: {request.data}")
@@ -135,6 +167,67 @@ class ProductoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    def perform_create(self, serializer):
+        producto = serializer.save()
+        registrar_movimientos([(producto.pk, producto.stock, producto.stock)], usuario=self.request.user)
+
+    def perform_update(self, serializer):
+        """
+        Los campos se guardan sin la columna stock; un stock editado se aplica
+        como ajuste (delta desde el valor que vio el cliente) y queda en el
+        ledger. El cliente puede mandar `stock_anterior` con el stock que
+        mostraba; si no, se toma el leído al empezar la request.
+        """
+        producto = serializer.instance
+        stock_visto = producto.stock
+        try:
+            stock_visto = int(self.request.data.get('stock_anterior', stock_visto))
+        except (TypeError, ValueError):
+            raise ValidationError('stock_anterior debe ser un número entero')
+
+        datos = dict(serializer.validated_data)
+        stock_nuevo = datos.pop('stock', None)
+        with transaction.atomic():
+            for campo, valor in datos.items():
+                setattr(producto, campo, valor)
+            guardar_sin_stock(producto)
+            if stock_nuevo is not None:
+                ajustar_stock(producto, stock_visto, stock_nuevo, usuario=self.request.user)
+            else:
+                producto.refresh_from_db(fields=['stock'])
+
+    def _separar_imagen(self, request):
+        """
+        Saca la imagen principal del request: el producto se guarda sin ella
+        y la imagen se procesa en segundo plano (ver subidas.py)
+        """
+        archivo = request.FILES.get('imagen_principal')
+        if archivo is None:
+            return request.data, None
+        validar_archivo(archivo)
+        datos = {
+            clave: request.data.get(clave)
+            for clave in request.data
+            if clave != 'imagen_principal'
+        }
+        return datos, archivo
+
+    def _encolar_imagen(self, serializer, archivo):
+        data = serializer.data
+        if archivo is not None:
+            subida = crear_subida(serializer.instance, archivo, usuario=self.request.user)
+            data = {**data, 'subida_imagen': SubidaImagenSerializer(
+                subida, context=self.get_serializer_context()
+            ).data}
+        return data
+
+    def list(self, request, *args, **kwargs):
+        """Listado armado desde values(): misma salida que ProductoListSerializer"""
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(PRODUCTO_LISTA_RAPIDO.serializar(
+            PRODUCTO_LISTA_RAPIDO.valores(queryset), Contexto(request)
+        ))
+    
     def retrieve(self, request, *args, **kwargs):
         """Override para trackear vista de producto"""
         instance = self.get_object()
@@ -144,7 +237,7 @@ class ProductoViewSet(viewsets.ModelViewSet):
             AnalyticsTracker.track_vista_producto(
                 producto=instance,
                 usuario=request.user if request.user.is_authenticated else None,
-                session_id=request.session.session_key,
+                session_id=visitante_id(request),
                 request=request
             )
         except:
@@ -164,33 +257,182 @@ class ProductoViewSet(viewsets.ModelViewSet):
         if not query:
             return Response({'error': 'Parámetro "q" requerido'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Buscar productos
-        productos = Producto.objects.filter(
-            nombre__icontains=query,
-            activo=True
-        ) | Producto.objects.filter(
-            descripcion__icontains=query,
-            activo=True
-        )
+        # Buscar productos en el índice y traerlos con una sola consulta
+        productos = self._productos_ordenados(indice_busqueda.buscar(query, solo_activos=True))
         
         # Registrar búsqueda
         try:
             AnalyticsTracker.track_busqueda(
                 query=query,
                 usuario=request.user if request.user.is_authenticated else None,
-                session_id=request.session.session_key,
-                resultados_count=productos.count()
+                session_id=visitante_id(request),
+                resultados_count=len(productos),
+                request=request
             )
         except:
             pass
         
-        serializer = self.get_serializer(productos, many=True)
         return Response({
             'query': query,
-            'count': productos.count(),
+            'count': len(productos),
+            'resultados': productos
+        })
+
+    @action(detail=False, methods=['get'])
+    def sugerencias(self, request):
+        """
+        Autocompletado para la barra de búsqueda (índice de prefijos en memoria)
+        GET /api/catalogo/producto/sugerencias/?q=rem&limite=8
+        """
+        query = request.query_params.get('q', '')
+        try:
+            limite = min(int(request.query_params.get('limite', 8)), 20)
+        except (TypeError, ValueError):
+            limite = 8
+        
+        return Response({
+            'query': query,
+            'sugerencias': indice_autocompletado.sugerir(query, limite=limite)
+        })
+
+    @action(detail=False, methods=['get'])
+    def facetas(self, request):
+        """
+        Conteos por faceta para la barra de filtros del catálogo
+        GET /api/catalogo/producto/facetas/?categoria=1&color=Azul,Negro&precio_max=20000
+        Acepta los mismos filtros que el listado (incluido search).
+        """
+        filtros, precio_min, precio_max = leer_filtros(request.query_params)
+        solo_activos = not request.user.is_staff
+        
+        ids = None
+        search = request.query_params.get('search', None)
+        if search:
+            ids = indice_busqueda.buscar(search, solo_activos=solo_activos, limite=None)
+        
+        return Response(indice_facetas.contar(
+            filtros,
+            precio_min=precio_min,
+            precio_max=precio_max,
+            solo_activos=solo_activos,
+            ids=ids
+        ))
+
+    @action(detail=True, methods=['get'])
+    def relacionados(self, request, pk=None):
+        """
+        Productos que se suelen comprar o ver junto con este (precalculados
+        por calcular_recomendaciones, acá solo se leen)
+        GET /api/catalogo/producto/{id}/relacionados/?limite=8
+        """
+        if not str(pk).isdigit():
+            return Response({'error': 'Producto no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        limite = self._limite(defecto=8)
+        
+        recomendaciones = RecomendacionProducto.objects.filter(
+            producto_id=pk,
+            recomendado__activo=True
+        ).select_related('recomendado__categoria').order_by('posicion')[:limite]
+        productos = [recomendacion.recomendado for recomendacion in recomendaciones]
+        
+        serializer = ProductoListSerializer(productos, many=True, context=self.get_serializer_context())
+        return Response({
+            'producto': int(pk),
+            'count': len(productos),
             'resultados': serializer.data
         })
 
+    def _limite(self, defecto=12, maximo=20):
+        try:
+            return max(1, min(int(self.request.query_params.get('limite', defecto)), maximo))
+        except (TypeError, ValueError):
+            return defecto
+
+    def _productos_ordenados(self, ids):
+        """
+        Productos activos en el orden de `ids`, con una sola consulta y ya
+        serializados (formato de ProductoListSerializer)
+        """
+        posiciones = {producto_id: posicion for posicion, producto_id in enumerate(ids)}
+        filas = PRODUCTO_LISTA_RAPIDO.valores(Producto.objects.filter(id__in=ids, activo=True))
+        return PRODUCTO_LISTA_RAPIDO.serializar(
+            sorted(filas, key=lambda fila: posiciones[fila['id']]),
+            Contexto(self.request)
+        )
+
+    @action(detail=False, methods=['get'])
+    def recientes(self, request):
+        """
+        Últimos productos vistos o agregados al carrito por el usuario/sesión
+        GET /api/catalogo/producto/recientes/?limite=12
+        """
+        ids = productos_recientes(request.user, visitante_id(request), limite=self._limite())
+        productos = self._productos_ordenados(ids)
+        return Response({'count': len(productos), 'resultados': productos})
+
+    @action(detail=False, methods=['get'])
+    def para_ti(self, request):
+        """
+        Productos sugeridos según la actividad reciente del usuario/sesión
+        GET /api/catalogo/producto/para_ti/?limite=12
+        """
+        ids = productos_para_ti(request.user, visitante_id(request), limite=self._limite())
+        productos = self._productos_ordenados(ids)
+        return Response({'count': len(productos), 'resultados': productos})
+
+    @action(detail=False, methods=['get'])
+    def tendencias(self, request):
+        """
+        Productos en tendencia: popularidad con decaimiento exponencial
+        (vistas, carrito y compras), actualizada con cada evento
+        GET /api/catalogo/producto/tendencias/?limite=12
+        """
+        puntajes = dict(productos_en_tendencia(limite=self._limite()))
+        productos = self._productos_ordenados(list(puntajes))
+        for producto in productos:
+            producto['puntaje_tendencia'] = puntajes[producto['id']]
+        return Response({'count': len(productos), 'resultados': productos})
+
+    @action(detail=False, methods=['post'])
+    def importar(self, request):
+        """
+        Alta/actualización masiva de productos desde un archivo
+        POST /api/catalogo/producto/importar/
+        multipart: archivo (.csv, .json o .jsonl), simular, crear_categorias
+        o JSON: { "productos": [...], "simular": true }
+        Columnas: id, nombre, descripcion, precio, stock, talla, color,
+        material, categoria (nombre), activo, destacado
+        """
+        def bandera(nombre):
+            valor = request.data.get(nombre, False)
+            return valor if isinstance(valor, bool) else str(valor).lower() in ('1', 'true', 'si')
+
+        archivo = request.FILES.get('archivo')
+        if archivo is not None:
+            formato = request.data.get('formato') or detectar_formato(archivo.name)
+            filas = leer_filas(archivo, formato)
+        elif isinstance(request.data.get('productos'), list):
+            filas = request.data['productos']
+        else:
+            return Response(
+                {'error': 'Debe enviar un archivo o una lista "productos"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        importador = ImportadorProductos(
+            crear_categorias=bandera('crear_categorias'),
+            simular=bandera('simular'),
+            usuario=request.user
+        )
+        try:
+            reporte = importador.importar(filas)
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response(
+                {'error': f'No se pudo leer el archivo: {e}', **importador.resumen},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(reporte)
+
     @action(detail=True, methods=['post'])
     def reducir_stock(self, request, pk=None):
         """
@@ -208,7 +450,12 @@ class ProductoViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            producto.reducir_stock(cantidad)
+            producto.reducir_stock(
+                cantidad,
+                motivo=request.data.get('motivo', 'ajuste'),
+                referencia=request.data.get('referencia', ''),
+                usuario=request.user
+            )
             return Response({
                 'mensaje': 'Stock reducido correctamente',
                 'stock_actual': producto.stock
@@ -236,7 +483,12 @@ class ProductoViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            producto.aumentar_stock(cantidad)
+            producto.aumentar_stock(
+                cantidad,
+                motivo=request.data.get('motivo', 'reposicion'),
+                referencia=request.data.get('referencia', ''),
+                usuario=request.user
+            )
             return Response({
                 'mensaje': 'Stock aumentado correctamente',
                 'stock_actual': producto.stock
@@ -247,6 +499,40 @@ class ProductoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    @action(detail=False, methods=['post'])
+    def ajustar_stock(self, request):
+        """
+        Aplica un lote de deltas de stock en una sola sentencia
+        POST /api/catalogo/producto/ajustar_stock/
+        Body: {
+            "movimientos": [{"producto_id": 1, "cantidad": -2}, {"producto_id": 7, "cantidad": 10}],
+            "motivo": "sincronizacion",
+            "referencia": "REM-0042",
+            "parcial": false
+        }
+        Sin "parcial" el lote es todo o nada.
+        """
+        serializer = AjusteStockSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+
+        try:
+            stocks, rechazados = aplicar_movimientos(
+                [(mov['producto_id'], mov['cantidad']) for mov in datos['movimientos']],
+                motivo=datos['motivo'],
+                referencia=datos['referencia'],
+                usuario=request.user,
+                parcial=datos['parcial']
+            )
+        except ValidationError as e:
+            return Response({'error': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'mensaje': f'Stock actualizado en {len(stocks)} producto(s)',
+            'stock_actual': stocks,
+            'rechazados': rechazados
+        })
+
     @action(detail=True, methods=['post'])
     def toggle_destacado(self, request, pk=None):
         """
@@ -319,4 +605,107 @@ class ImagenProductoViewSet(viewsets.ModelViewSet):
         if producto_id:
             queryset = queryset.filter(producto_id=producto_id)
         
-        return queryset.order_by('orden')
\ No newline at end of file
+        return queryset.order_by('orden')
+
+
+class SubidaImagenViewSet(mixins.CreateModelMixin,
+                          mixins.ListModelMixin,
+                          mixins.RetrieveModelMixin,
+                          viewsets.GenericViewSet):
+    """
+    Subidas de imágenes procesadas en segundo plano.
+    POST devuelve 202 con las subidas en estado pendiente; el progreso
+    se consulta con GET.
+    """
+    serializer_class = SubidaImagenSerializer
+    parser_classes = [MultiPartParser, FormParser]
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get_queryset(self):
+        """
+        Filtros: ?ids=1,2,3  ?producto=5  ?estado=pendiente
+        """
+        queryset = SubidaImagen.objects.all()
+        params = self.request.query_params
+
+        ids = params.get('ids')
+        if ids:
+            queryset = queryset.filter(id__in=[i for i in ids.split(',') if i.strip().isdigit()])
+        producto_id = params.get('producto')
+        if producto_id:
+            queryset = queryset.filter(producto_id=producto_id)
+        estado = params.get('estado')
+        if estado:
+            queryset = queryset.filter(estado=estado)
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        """
+        POST /api/catalogo/subida-imagen/
+        multipart: producto, destino (principal|galeria), orden (opcional),
+        imagenes (uno o más archivos)
+        """
+        archivos = request.FILES.getlist('imagenes') or request.FILES.getlist('imagen')
+        if not archivos:
+            return Response({'error': 'Debe enviar al menos una imagen'}, status=status.HTTP_400_BAD_REQUEST)
+
+        destino = request.data.get('destino', 'galeria')
+        if destino not in dict(SubidaImagen.DESTINO_CHOICES):
+            return Response({'error': 'Destino inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        if destino == 'principal' and len(archivos) > 1:
+            return Response(
+                {'error': 'Solo se puede subir una imagen principal'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            producto = Producto.objects.get(pk=request.data.get('producto'))
+        except (Producto.DoesNotExist, ValueError, TypeError):
+            return Response({'error': 'Producto no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            orden = int(request.data.get('orden', 0))
+        except (TypeError, ValueError):
+            orden = 0
+
+        subidas = []
+        errores = []
+        for posicion, archivo in enumerate(archivos):
+            try:
+                subidas.append(crear_subida(
+                    producto, archivo, destino=destino, orden=orden + posicion, usuario=request.user
+                ))
+            except ImagenInvalida as e:
+                errores.append({'archivo': archivo.name, 'error': str(e)})
+
+        return Response({
+            'subidas': self.get_serializer(subidas, many=True).data,
+            'errores': errores,
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class MovimientoStockViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Historial de movimientos de stock (solo lectura)
+    Filtros: ?producto=1  ?motivo=venta  ?desde=2025-01-01  ?hasta=2025-01-31
+    """
+    serializer_class = MovimientoStockSerializer
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get_queryset(self):
+        queryset = MovimientoStock.objects.select_related('producto')
+        params = self.request.query_params
+
+        producto_id = params.get('producto')
+        if producto_id:
+            queryset = queryset.filter(producto_id=producto_id)
+        motivo = params.get('motivo')
+        if motivo:
+            queryset = queryset.filter(motivo=motivo)
+        desde = params.get('desde')
+        if desde:
+            queryset = queryset.filter(fecha__date__gte=desde)
+        hasta = params.get('hasta')
+        if hasta:
+            queryset = queryset.filter(fecha__date__lte=hasta)
+        return queryset
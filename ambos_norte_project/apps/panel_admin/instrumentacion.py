@@ -0,0 +1,246 @@
+"""
+Instrumentación de requests: cantidad de consultas, tiempo en la base,
+tiempo de serialización (render de la respuesta) y tiempo total por vista.
+
+Las muestras se guardan en memoria del proceso (últimas MUESTRAS_POR_VISTA
+por vista) y se consultan en /dashboard/rendimiento/.
+Si una vista supera su presupuesto de consultas (PRESUPUESTO_CONSULTAS) se
+avisa por consola; con INSTRUMENTACION_ESTRICTA (tests) se lanza
+PresupuestoExcedido para que el test falle.
+
+Con INSTRUMENTACION_CAPTURA_SQL = <ruta> cada sentencia distinta se agrega
+a ese archivo (JSON por línea) para revisarla con `analizar_indices`.
+"""
+import json
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+
+
+MUESTRAS_POR_VISTA = getattr(settings, 'INSTRUMENTACION_MUESTRAS', 500)
+# Límites (ms) de los buckets del histograma de tiempo total
+BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500)
+CAMPOS = ('consultas', 'repetidas', 'db_ms', 'serializacion_ms', 'total_ms')
+CAPTURA_SQL = getattr(settings, 'INSTRUMENTACION_CAPTURA_SQL', '')
+
+
+class PresupuestoExcedido(AssertionError):
+    pass
+
+
+class _Medicion:
+    """Acumula las consultas de una request (se engancha con execute_wrapper)"""
+
+    def __init__(self, capturar=False):
+        self.consultas = 0
+        self.db_segundos = 0.0
+        self.sentencias = Counter()
+        # sql -> (alias de la conexión, parámetros de la primera ejecución)
+        self.ejemplos = {} if capturar else None
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_segundos += time.perf_counter() - inicio
+            self.consultas += 1
+            self.sentencias[sql] += 1
+            if self.ejemplos is not None and not many and sql not in self.ejemplos:
+                self.ejemplos[sql] = (context['connection'].alias, params)
+
+    @property
+    def repetidas(self):
+        """Ejecuciones de la misma sentencia más allá de la primera (síntoma de N+1)"""
+        return sum(cantidad - 1 for cantidad in self.sentencias.values())
+
+
+class _Registro:
+    """Muestras recientes por vista, compartidas entre hilos del proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._muestras = defaultdict(lambda: deque(maxlen=MUESTRAS_POR_VISTA))
+        self._totales = Counter()
+        self._excedidas = Counter()
+
+    def agregar(self, vista, muestra, excedida=False):
+        with self._lock:
+            self._muestras[vista].append(muestra)
+            self._totales[vista] += 1
+            if excedida:
+                self._excedidas[vista] += 1
+
+    def reiniciar(self):
+        with self._lock:
+            self._muestras.clear()
+            self._totales.clear()
+            self._excedidas.clear()
+
+    def resumen(self):
+        with self._lock:
+            copia = {vista: list(muestras) for vista, muestras in self._muestras.items()}
+            totales = dict(self._totales)
+            excedidas = dict(self._excedidas)
+
+        resumen = {}
+        for vista, muestras in copia.items():
+            datos = {
+                'requests': totales[vista],
+                'muestras': len(muestras),
+                'presupuesto_consultas': presupuesto_consultas(vista),
+                'presupuesto_excedido': excedidas.get(vista, 0),
+            }
+            for posicion, campo in enumerate(CAMPOS):
+                datos[campo] = _percentiles([muestra[posicion] for muestra in muestras])
+            datos['histograma_total_ms'] = _histograma([muestra[-1] for muestra in muestras])
+            resumen[vista] = datos
+        return dict(sorted(resumen.items(), key=lambda item: -item[1]['total_ms']['p95']))
+
+
+registro = _Registro()
+
+
+class _CapturaSQL:
+    """Sentencias distintas por vista, agregadas una sola vez al archivo de captura"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._vistas = set()
+
+    def agregar(self, vista, ejemplos):
+        with self._lock:
+            nuevas = [
+                (sql, alias, params) for sql, (alias, params) in ejemplos.items() if (vista, sql) not in self._vistas
+            ]
+            if not nuevas:
+                return
+            self._vistas.update((vista, sql) for sql, _, _ in nuevas)
+            with open(self.ruta, 'a', encoding='utf-8') as archivo:
+                for sql, alias, params in nuevas:
+                    archivo.write(json.dumps(
+                        {'vista': vista, 'db': alias, 'sql': sql, 'params': list(params or ())},
+                        default=str
+                    ) + '\n')
+
+
+captura_sql = _CapturaSQL(CAPTURA_SQL) if CAPTURA_SQL else None
+
+
+def _percentiles(valores):
+    valores = sorted(valores)
+    if not valores:
+        return {}
+
+    def percentil(p):
+        return round(valores[min(len(valores) - 1, int(len(valores) * p))], 2)
+
+    return {
+        'p50': percentil(0.50),
+        'p95': percentil(0.95),
+        'p99': percentil(0.99),
+        'max': round(valores[-1], 2),
+        'promedio': round(sum(valores) / len(valores), 2),
+    }
+
+
+def _histograma(valores):
+    conteo = Counter()
+    for valor in valores:
+        limite = next((limite for limite in BUCKETS_MS if valor <= limite), None)
+        conteo[f'<={limite}' if limite else f'>{BUCKETS_MS[-1]}'] += 1
+    etiquetas = [f'<={limite}' for limite in BUCKETS_MS] + [f'>{BUCKETS_MS[-1]}']
+    return {etiqueta: conteo[etiqueta] for etiqueta in etiquetas}
+
+
+def presupuesto_consultas(vista):
+    """Consultas permitidas para una vista (None = sin presupuesto)"""
+    presupuestos = getattr(settings, 'PRESUPUESTO_CONSULTAS', {})
+    return presupuestos.get(vista, getattr(settings, 'PRESUPUESTO_CONSULTAS_DEFECTO', None))
+
+
+def _nombre_vista(request):
+    """
+    Vista + acción: 'pedido.list' y 'pedido.create' comparten la URL
+    pedido-list pero no el costo. Para los ViewSets se usa el basename y la
+    acción de DRF; para el resto, el nombre de la URL y el método HTTP.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'sin_resolver'
+    metodo = request.method.lower()
+    acciones = getattr(match.func, 'actions', None)
+    basename = getattr(match.func, 'initkwargs', {}).get('basename')
+    if acciones and basename:
+        return f'{basename}.{acciones.get(metodo, metodo)}'
+    return f'{match.view_name or match.route or match._func_path}.{metodo}'
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide cada request y la registra bajo la vista y acción resueltas
+    (p. ej. 'pedido.list'). Va primero en MIDDLEWARE para incluir las
+    consultas de sesión y autenticación.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'INSTRUMENTACION_ACTIVA', True):
+            return self.get_response(request)
+
+        medicion = _Medicion(capturar=captura_sql is not None)
+        request._instrumentacion = {'serializacion': 0.0}
+        inicio = time.perf_counter()
+        with ExitStack() as stack:
+            for conexion in connections.all():
+                stack.enter_context(conexion.execute_wrapper(medicion))
+            response = self.get_response(request)
+        total = time.perf_counter() - inicio
+
+        vista = _nombre_vista(request)
+        serializacion = request._instrumentacion['serializacion']
+        muestra = (
+            medicion.consultas,
+            medicion.repetidas,
+            medicion.db_segundos * 1000,
+            serializacion * 1000,
+            total * 1000,
+        )
+        presupuesto = presupuesto_consultas(vista)
+        excedida = presupuesto is not None and medicion.consultas > presupuesto
+        registro.agregar(vista, muestra, excedida)
+        if captura_sql is not None:
+            captura_sql.agregar(vista, medicion.ejemplos)
+
+        if settings.DEBUG:
+            response['Server-Timing'] = (
+                f'db;dur={muestra[2]:.1f}, ser;dur={muestra[3]:.1f}, total;dur={muestra[4]:.1f}'
+            )
+
+        if excedida:
+            mensaje = (
+                f"{vista}: {medicion.consultas} consultas (presupuesto: {presupuesto}, "
+                f"repetidas: {medicion.repetidas}) en {request.method} {request.path}"
+            )
+            if getattr(settings, 'INSTRUMENTACION_ESTRICTA', False):
+                raise PresupuestoExcedido(mensaje)
+            print(f"⚠️ Presupuesto de consultas excedido - {mensaje}")
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF (Response) y TemplateView se renderizan después de la vista:
+        # ese render es el tiempo de serialización
+        if hasattr(request, '_instrumentacion'):
+            inicio = time.perf_counter()
+
+            def fin_render(response):
+                request._instrumentacion['serializacion'] += time.perf_counter() - inicio
+
+            response.add_post_render_callback(fin_render)
+        return response
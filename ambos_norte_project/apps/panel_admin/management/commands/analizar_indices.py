@@ -0,0 +1,244 @@
+import json
+import re
+from collections import defaultdict
+from contextlib import ExitStack
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test.utils import override_settings
+from django.urls import Resolver404, resolve
+from rest_framework.test import APIClient
+
+
+# Recorrido por defecto: listados y acciones con más tráfico (cliente) y el panel (staff)
+URLS_CLIENTE = [
+    '/api/catalogo/producto/',
+    '/api/catalogo/producto/?categoria=1',
+    '/api/catalogo/producto/buscar/?q=ambo',
+    '/api/catalogo/producto/recientes/',
+    '/api/catalogo/producto/para_ti/',
+    '/api/catalogo/producto/tendencias/',
+    '/api/catalogo/categoria/',
+    '/api/pedidos/pedido/',
+    '/api/carrito/carrito/',
+]
+URLS_STAFF = [
+    '/api/pedidos/pedido/',
+    '/api/pedidos/pedido/?estado=pendiente',
+    '/api/usuarios/usuarios/',
+    '/api/analytics/eventos/',
+    '/api/analytics/reportes/embudo_conversion/',
+    '/dashboard/ventas/',
+    '/dashboard/inventario/',
+    '/dashboard/rendimiento/',
+]
+
+_EXPLICABLE = re.compile(r'^\s*(SELECT|UPDATE|DELETE)\b', re.IGNORECASE)
+_SCAN_SQLITE = re.compile(r'^SCAN (\S+)')
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta EXPLAIN sobre las consultas del ORM (capturadas con INSTRUMENTACION_CAPTURA_SQL '
+        'o recorriendo las URLs principales) e informa recorridos completos y ordenamientos sin índice'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archivo', help='Captura JSON por línea de INSTRUMENTACION_CAPTURA_SQL')
+        parser.add_argument('--urls', nargs='+', help='URLs a recorrer como staff (default: recorrido de cliente y staff)')
+        parser.add_argument(
+            '--min-filas', type=int, default=1000,
+            help='Ignora recorridos completos de tablas con menos filas (default: 1000)'
+        )
+        parser.add_argument('--todas', action='store_true', help='Muestra también las consultas sin problemas')
+
+    def handle(self, *args, **options):
+        if options['archivo']:
+            sentencias = self._leer_captura(options['archivo'])
+        else:
+            sentencias = self._recorrer(options['urls'])
+
+        explicables = {clave: datos for clave, datos in sentencias.items() if _EXPLICABLE.match(clave[1])}
+        self.stdout.write(
+            f'🔍 {len(explicables)} consultas distintas para analizar '
+            f'({len(sentencias) - len(explicables)} sentencias de escritura omitidas)\n'
+        )
+
+        self._filas_tabla = {}
+        problemas_por_tabla = defaultdict(set)
+        con_problemas = 0
+        for (alias, sql), datos in sorted(explicables.items(), key=lambda item: -item[1]['veces']):
+            try:
+                problemas = self._explicar(alias, sql, datos['params'], options['min_filas'])
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f'⚠️  No se pudo explicar: {e}\n    {self._recortar(sql)}'))
+                continue
+
+            if problemas:
+                con_problemas += 1
+                for problema, tabla in problemas:
+                    problemas_por_tabla[tabla].add(problema)
+                self.stdout.write(self.style.ERROR(
+                    '❌ ' + '; '.join(f'{problema} en {tabla}' for problema, tabla in problemas)
+                ))
+            elif options['todas']:
+                self.stdout.write(self.style.SUCCESS('✅ Usa índices'))
+            else:
+                continue
+            self.stdout.write(f'    vistas: {", ".join(sorted(datos["vistas"]))} | {datos["veces"]} veces')
+            self.stdout.write(f'    {self._recortar(sql)}\n')
+
+        if not problemas_por_tabla:
+            self.stdout.write(self.style.SUCCESS('✅ Ninguna consulta recorre tablas completas ni ordena sin índice'))
+            return
+
+        self.stdout.write(f'📊 {con_problemas} consultas con problemas, por tabla:')
+        for tabla, problemas in sorted(problemas_por_tabla.items()):
+            self.stdout.write(f'  {tabla:<35} {", ".join(sorted(problemas))}')
+
+    def _leer_captura(self, ruta):
+        sentencias = {}
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                for linea in archivo:
+                    if not linea.strip():
+                        continue
+                    fila = json.loads(linea)
+                    datos = sentencias.setdefault(
+                        (fila['db'], fila['sql']), {'params': fila['params'], 'vistas': set(), 'veces': 0}
+                    )
+                    datos['vistas'].add(fila['vista'])
+                    datos['veces'] += 1
+        except OSError as e:
+            raise CommandError(f'No se pudo leer {ruta}: {e}')
+        return sentencias
+
+    def _recorrer(self, urls):
+        """Recorre las URLs con el cliente de pruebas dentro de una transacción que se descarta"""
+        if urls:
+            recorrido = [('staff', url) for url in urls]
+        else:
+            recorrido = [('cliente', url) for url in URLS_CLIENTE] + [('staff', url) for url in URLS_STAFF]
+
+        sentencias = {}
+        vista_actual = ['']
+
+        def capturar(alias):
+            def wrapper(execute, sql, params, many, context):
+                datos = sentencias.setdefault(
+                    (alias, sql), {'params': None if many else params, 'vistas': set(), 'veces': 0}
+                )
+                datos['vistas'].add(vista_actual[0])
+                datos['veces'] += 1
+                return execute(sql, params, many, context)
+            return wrapper
+
+        with ExitStack() as pila:
+            pila.enter_context(override_settings(ALLOWED_HOSTS=['testserver']))
+            for conexion in connections.all():
+                pila.enter_context(transaction.atomic(using=conexion.alias))
+            clientes = self._clientes()
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(capturar(conexion.alias)))
+
+            for rol, url in recorrido:
+                try:
+                    vista_actual[0] = resolve(url.split('?')[0]).view_name
+                except Resolver404:
+                    vista_actual[0] = url
+                respuesta = clientes[rol].get(url)
+                marca = '✅' if respuesta.status_code < 400 else '⚠️ '
+                self.stdout.write(f'{marca} {rol:<8} {respuesta.status_code} {url}')
+            self.stdout.write('')
+
+            # Nada de lo que hicieron las vistas (eventos, carritos) queda guardado
+            for conexion in connections.all():
+                transaction.set_rollback(True, using=conexion.alias)
+        return {clave: datos for clave, datos in sentencias.items() if datos['params'] is not None}
+
+    def _clientes(self):
+        Usuario = get_user_model()
+        staff = Usuario.objects.filter(is_staff=True, is_active=True).first() or Usuario.objects.create_user(
+            username='analizar_indices_staff', password=None, is_staff=True, tipo_usuario='administrador'
+        )
+        # Preferir un cliente con pedidos para que los listados tengan datos
+        cliente = (
+            Usuario.objects.filter(is_staff=False, is_active=True, pedidos__isnull=False).first()
+            or Usuario.objects.create_user(username='analizar_indices_cliente', password=None)
+        )
+
+        clientes = {}
+        for rol, usuario in (('cliente', cliente), ('staff', staff)):
+            # Una vista que falla se informa con su código y el recorrido sigue
+            cliente_api = APIClient(
+                raise_request_exception=False, HTTP_USER_AGENT='Mozilla/5.0 (X11; Linux x86_64) Firefox/128.0'
+            )
+            cliente_api.force_authenticate(usuario)
+            cliente_api.force_login(usuario)
+            clientes[rol] = cliente_api
+        return clientes
+
+    def _explicar(self, alias, sql, params, min_filas):
+        """[(problema, tabla), ...] según el plan de la base de `alias`"""
+        conexion = connections[alias]
+        vendor = conexion.vendor
+        with conexion.cursor() as cursor:
+            if vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = [fila[-1] for fila in cursor.fetchall()]
+            else:
+                cursor.execute(f'EXPLAIN {sql}', params)
+                columnas = [col[0] for col in cursor.description]
+                plan = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+        problemas = []
+        if vendor == 'mysql':
+            for fila in plan:
+                tabla = fila.get('table') or '?'
+                extra = fila.get('Extra') or ''
+                if fila.get('type') == 'ALL' and (fila.get('rows') or 0) >= min_filas:
+                    problemas.append((f'recorrido completo (~{fila["rows"]} filas)', tabla))
+                if 'Using filesort' in extra:
+                    problemas.append(('ordenamiento sin índice (filesort)', tabla))
+                if 'Using temporary' in extra:
+                    problemas.append(('tabla temporal', tabla))
+        elif vendor == 'sqlite':
+            # Los B-TREE temporales son de la consulta entera: se atribuyen a la tabla del FROM
+            principal = None
+            for detalle in plan:
+                coincidencia = _SCAN_SQLITE.match(detalle)
+                if coincidencia or detalle.startswith('SEARCH '):
+                    tabla = detalle.split()[1]
+                    principal = principal or tabla
+                    if coincidencia and 'INDEX' not in detalle:
+                        filas = self._contar_filas(conexion, tabla)
+                        if filas >= min_filas:
+                            problemas.append((f'recorrido completo ({filas} filas)', tabla))
+                if 'TEMP B-TREE FOR ORDER BY' in detalle:
+                    problemas.append(('ordenamiento sin índice (filesort)', principal or '?'))
+                elif 'TEMP B-TREE' in detalle:
+                    problemas.append(('tabla temporal', principal or '?'))
+        elif vendor == 'postgresql':
+            for (linea,) in plan:
+                if 'Seq Scan on' in linea:
+                    tabla = linea.split('Seq Scan on')[1].split()[0]
+                    filas = int(re.search(r'rows=(\d+)', linea).group(1))
+                    if filas >= min_filas:
+                        problemas.append((f'recorrido completo (~{filas} filas)', tabla))
+                elif re.search(r'->\s+Sort\b|^Sort\b', linea.strip()):
+                    problemas.append(('ordenamiento sin índice (sort)', '?'))
+        return problemas
+
+    def _contar_filas(self, conexion, tabla):
+        if tabla not in self._filas_tabla:
+            try:
+                with conexion.cursor() as cursor:
+                    cursor.execute(f'SELECT COUNT(*) FROM {conexion.ops.quote_name(tabla)}')
+                    self._filas_tabla[tabla] = cursor.fetchone()[0]
+            except Exception:
+                # Alias de la consulta (U0, T3...): no se puede contar
+                self._filas_tabla[tabla] = 0
+        return self._filas_tabla[tabla]
+
+    def _recortar(self, sql, largo=300):
+        return sql if len(sql) <= largo else sql[:largo] + '…'
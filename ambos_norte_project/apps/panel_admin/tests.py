@@ -1,3 +1,44 @@
-from django.test import TestCase
+import io
+from contextlib import redirect_stdout
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from apps.usuarios.models import Usuario
+from .instrumentacion import PresupuestoExcedido, registro
 
-# Create your tests here.
+
+@override_settings(INSTRUMENTACION_ACTIVA=True, PRESUPUESTO_CONSULTAS_DEFECTO=None)
+class PresupuestoConsultasTests(TestCase):
+
+    def setUp(self):
+        registro.reiniciar()
+        self.cliente = APIClient()
+
+    @override_settings(INSTRUMENTACION_ESTRICTA=True, PRESUPUESTO_CONSULTAS={'categoria.list': 0})
+    def test_estricto_lanza_presupuesto_excedido(self):
+        with self.assertRaisesMessage(PresupuestoExcedido, 'categoria.list: 1 consultas (presupuesto: 0'):
+            self.cliente.get('/api/catalogo/categoria/')
+
+    @override_settings(INSTRUMENTACION_ESTRICTA=False, PRESUPUESTO_CONSULTAS={'categoria.list': 0})
+    def test_no_estricto_avisa_y_registra(self):
+        salida = io.StringIO()
+        with redirect_stdout(salida):
+            respuesta = self.cliente.get('/api/catalogo/categoria/')
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('Presupuesto de consultas excedido - categoria.list', salida.getvalue())
+        datos = registro.resumen()['categoria.list']
+        self.assertEqual(datos['presupuesto_consultas'], 0)
+        self.assertEqual(datos['presupuesto_excedido'], 1)
+        self.assertEqual(datos['consultas']['max'], 1)
+
+    @override_settings(INSTRUMENTACION_ESTRICTA=True, PRESUPUESTO_CONSULTAS={'categoria.list': 1, 'categoria.create': 0})
+    def test_presupuesto_por_vista_y_accion(self):
+        # Mismo nombre de URL (categoria-list), distinta acción y presupuesto
+        self.assertEqual(self.cliente.get('/api/catalogo/categoria/').status_code, 200)
+        self.cliente.force_authenticate(Usuario.objects.create_user(username='admin', is_staff=True))
+        with self.assertRaises(PresupuestoExcedido):
+            self.cliente.post('/api/catalogo/categoria/', {'nombre': 'Chaquetas'}, format='json')
+
+        resumen = registro.resumen()
+        self.assertEqual(resumen['categoria.list']['presupuesto_excedido'], 0)
+        self.assertEqual(resumen['categoria.create']['presupuesto_excedido'], 1)
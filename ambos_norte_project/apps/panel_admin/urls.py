@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import DashboardView, VentasAnalysisView, InventarioView
+from .views import DashboardView, VentasAnalysisView, InventarioView, RendimientoView
 
 urlpatterns = [
     path('', DashboardView.as_view(), name='dashboard'),
     path('ventas/', VentasAnalysisView.as_view(), name='ventas_analysis'),
     path('inventario/', InventarioView.as_view(), name='inventario'),
+    path('rendimiento/', RendimientoView.as_view(), name='rendimiento'),
 ]
\ No newline at end of file
@@ -1,17 +1,22 @@
 from django.shortcuts import render
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils.decorators import method_decorator
-from django.views.generic import TemplateView
+from django.http import JsonResponse
+from django.views.generic import TemplateView, View
 from django.db.models import Sum, Count, Avg, F, Q
 from django.utils import timezone
 from datetime import timedelta, date
 from decimal import Decimal
 
-from apps.analytics.models import MetricaDiaria, MetricaProducto, EventoUsuario, DatosGoogleAnalytics
+from apps.analytics.models import MetricaDiaria, MetricaProducto, EventoUsuario, DatosGoogleAnalytics, PronosticoProducto
+from apps.analytics.inventario import analizar_inventario
+from apps.analytics.captura import contar_por_tipo
 from apps.pedidos.models import Pedido, ItemPedido
 from apps.usuarios.models import Usuario
 from apps.catalogo.models import Producto, Categoria
 from apps.carrito.models import Carrito
+from ambos_norte.db.mysql_pool.pool import estadisticas_pools, reciclar_pools
+from .instrumentacion import registro
 
 
 @method_decorator(staff_member_required, name='dispatch')
@@ -192,6 +197,19 @@ class DashboardView(TemplateView):
                 'url': '/admin/catalogo/producto/?stock__lte=5'
             })
         
+        # Bajo el punto de reorden según el pronóstico de demanda
+        para_reponer = PronosticoProducto.objects.filter(
+            producto__activo=True,
+            producto__stock__lte=F('punto_reorden')
+        ).exclude(metodo='sin_ventas').count()
+        if para_reponer > 0:
+            alertas.append({
+                'tipo': 'warning',
+                'icono': '🔄',
+                'mensaje': f'{para_reponer} producto(s) bajo su punto de reorden',
+                'url': '/dashboard/inventario/'
+            })
+        
         # Pagos pendientes
         pagos_pendientes = Pedido.objects.filter(estado_pedido='pendiente').count()
         if pagos_pendientes > 0:
@@ -312,12 +330,15 @@ class VentasAnalysisView(TemplateView):
         inicio_datetime = timezone.datetime.combine(fecha_inicio, timezone.datetime.min.time())
         inicio_datetime = timezone.make_aware(inicio_datetime)
         
-        eventos = EventoUsuario.objects.filter(timestamp__gte=inicio_datetime)
-        
-        vistas = eventos.filter(tipo_evento='vista_producto').count()
-        agregados = eventos.filter(tipo_evento='agregar_carrito').count()
-        checkouts = eventos.filter(tipo_evento='inicio_checkout').count()
-        compras = eventos.filter(tipo_evento='compra_completada').count()
+        # Eventos representados (suma de pesos de muestreo) en una sola consulta
+        conteo = contar_por_tipo(
+            EventoUsuario.objects.filter(timestamp__gte=inicio_datetime),
+            ['vista_producto', 'agregar_carrito', 'inicio_checkout', 'compra_completada']
+        )
+        vistas = conteo['vista_producto']
+        agregados = conteo['agregar_carrito']
+        checkouts = conteo['inicio_checkout']
+        compras = conteo['compra_completada']
         
         def calcular_tasa(actual, anterior):
             return (actual / anterior * 100) if anterior > 0 else 0
@@ -387,8 +408,49 @@ class InventarioView(TemplateView):
         # Top productos por rotación (últimos 30 días)
         context['top_rotacion'] = self.productos_mas_vendidos()
         
+        # Cobertura e historial de stock (snapshots diarios)
+        context.update(self.analisis_inventario())
+        
+        # Reposición sugerida según el pronóstico de demanda
+        context['reposicion_sugerida'] = self.reposicion_sugerida()
+        
         return context
     
+    def analisis_inventario(self, dias=30, limite=10):
+        """Productos con menos días de cobertura y quiebres de stock del período"""
+        analisis = analizar_inventario(dias=dias)
+        
+        con_cobertura = sorted(
+            (datos['dias_cobertura'], producto_id)
+            for producto_id, datos in analisis.items()
+            if datos['dias_cobertura'] is not None
+        )
+        ids = [producto_id for _, producto_id in con_cobertura[:limite]]
+        productos = Producto.objects.select_related('categoria').in_bulk(ids)
+        
+        coberturas = [cobertura for cobertura, _ in con_cobertura]
+        return {
+            'dias_analisis': dias,
+            'cobertura_inventario': [
+                {'producto': productos[producto_id], **analisis[producto_id]}
+                for producto_id in ids
+                if producto_id in productos
+            ],
+            'productos_con_quiebre': sum(1 for datos in analisis.values() if datos['dias_sin_stock'] > 0),
+            'cobertura_mediana': coberturas[len(coberturas) // 2] if coberturas else None,
+        }
+    
+    def reposicion_sugerida(self, limite=20):
+        """Productos bajo su punto de reorden, primero los que se quedan sin stock antes"""
+        return PronosticoProducto.objects.filter(
+            producto__activo=True,
+            producto__stock__lte=F('punto_reorden')
+        ).exclude(
+            metodo='sin_ventas'
+        ).select_related('producto__categoria').order_by(
+            F('fecha_quiebre').asc(nulls_last=True), '-demanda_diaria'
+        )[:limite]
+    
     def productos_mas_vendidos(self, dias=30):
         """Productos más vendidos en el período"""
         fecha_inicio = timezone.now() - timedelta(days=dias)
@@ -398,7 +460,7 @@ class InventarioView(TemplateView):
                 'itempedido__cantidad',
                 filter=Q(
                     itempedido__pedido__fecha_pedido__gte=fecha_inicio,
-                    itempedido__pedido__estado_pedido__in=['pagado', 'entregado']
+                    itempedido__pedido__estado__in=['pagado', 'entregado']
                 )
             )
         ).filter(
@@ -406,3 +468,23 @@ class InventarioView(TemplateView):
         ).order_by('-unidades_vendidas')[:10]
         
         return productos
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class RendimientoView(View):
+    """
+    Métricas de rendimiento del proceso actual (JSON):
+    consultas y tiempos por vista, y estado de los pools de conexiones.
+    POST reinicia las métricas (y con reciclar_pools=1 recicla las conexiones).
+    """
+
+    def get(self, request):
+        return JsonResponse({
+            'vistas': registro.resumen(),
+            'pools': estadisticas_pools(),
+        }, json_dumps_params={'ensure_ascii': False})
+
+    def post(self, request):
+        registro.reiniciar()
+        recicladas = reciclar_pools() if request.POST.get('reciclar_pools') == '1' else {}
+        return JsonResponse({'reiniciado': True, 'conexiones_recicladas': recicladas})
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0008_historialestadopedido_comentario_pedido_direccion'),
+        ('usuarios', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pedido',
+            name='numero_pedido',
+            field=models.CharField(db_index=True, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='historialestadopedido',
+            index=models.Index(fields=['pedido', '-fecha_cambio'], name='historial_e_pedido__db1dab_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['activo', 'usuario', '-fecha_pedido'], name='pedidos_activo_a2bec4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['estado', '-fecha_pedido'], name='pedidos_estado_42b128_idx'),
+        ),
+    ]
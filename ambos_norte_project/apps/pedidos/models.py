@@ -17,7 +17,7 @@ class Pedido(models.Model):
         ('cancelado', 'Cancelado'),
     ]
     
-    numero_pedido = models.CharField(max_length=50)
+    numero_pedido = models.CharField(max_length=50, db_index=True)
     usuario = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.SET_NULL, 
@@ -57,6 +57,12 @@ class Pedido(models.Model):
         verbose_name = 'Pedido'
         verbose_name_plural = 'Pedidos'
         ordering = ['-fecha_pedido']
+        indexes = [
+            # Listado de un cliente: activo=True, usuario=X, orden por fecha
+            models.Index(fields=['activo', 'usuario', '-fecha_pedido']),
+            # Filtro por estado del listado y reportes de ventas
+            models.Index(fields=['estado', '-fecha_pedido']),
+        ]
     
     def __str__(self):
         return f"Pedido {self.numero_pedido}"
@@ -114,6 +120,9 @@ class HistorialEstadoPedido(models.Model):
         verbose_name = 'Historial de Estado'
         verbose_name_plural = 'Historial de Estados'
         ordering = ['-fecha_cambio']
+        indexes = [
+            models.Index(fields=['pedido', '-fecha_cambio']),
+        ]
     
     def __str__(self):
         return f"{self.pedido.numero_pedido} - {self.estado_nuevo}"
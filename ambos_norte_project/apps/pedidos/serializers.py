@@ -2,8 +2,33 @@ from rest_framework import serializers
 from decimal import Decimal
 from django.db import transaction
 from .models import Pedido, ItemPedido, HistorialEstadoPedido
+from django.core.exceptions import ValidationError as DjangoValidationError
 from apps.catalogo.models import Producto
+from apps.catalogo.stock import aplicar_movimientos
 from apps.usuarios.models import Direccion
+from ambos_norte import serializacion_rapida as rapida
+
+
+def url_absoluta(url, context):
+    """
+    URL absoluta de un archivo. El prefijo (esquema + host) se calcula una
+    vez por request y se guarda en el context compartido por los serializers.
+    """
+    request = context.get('request')
+    if request is None or not url.startswith('/'):
+        return url
+    if '_prefijo_absoluto' not in context:
+        context['_prefijo_absoluto'] = request.build_absolute_uri('/')[:-1]
+    return context['_prefijo_absoluto'] + url
+
+
+def imagen_principal_absoluta(producto, context):
+    try:
+        if producto.imagen_principal:
+            return url_absoluta(producto.imagen_principal.url, context)
+    except:
+        pass
+    return None
 
 
 class ProductoInfoSerializer(serializers.Serializer):
@@ -13,14 +38,7 @@ class ProductoInfoSerializer(serializers.Serializer):
     imagen_principal = serializers.SerializerMethodField()
     
     def get_imagen_principal(self, obj):
-        try:
-            request = self.context.get('request')
-            if hasattr(obj, 'imagen_principal') and obj.imagen_principal:
-                url = obj.imagen_principal.url
-                return request.build_absolute_uri(url) if request else url
-        except:
-            pass
-        return None
+        return imagen_principal_absoluta(obj, self.context)
 
 
 class ItemPedidoSerializer(serializers.ModelSerializer):
@@ -35,8 +53,15 @@ class ItemPedidoSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'nombre_producto', 'subtotal']
     
     def get_producto_info(self, obj):
-        if obj.producto:
-            return ProductoInfoSerializer(obj.producto, context=self.context).data
+        # Mismo resultado que ProductoInfoSerializer, sin instanciar un
+        # serializer por item
+        producto = obj.producto
+        if producto:
+            return {
+                'id': producto.id,
+                'nombre': producto.nombre,
+                'imagen_principal': imagen_principal_absoluta(producto, self.context),
+            }
         return None
 
 
@@ -69,7 +94,7 @@ class PedidoSerializer(serializers.ModelSerializer):
     
     def get_usuario_nombre(self, obj):
         if obj.usuario:
-            return f"{obj.usuario.first_name} {obj.usuario.last_name}".strip() or obj.usuario.username
+            return nombre_usuario(obj.usuario.first_name, obj.usuario.last_name, obj.usuario.username)
         return None
     
     def get_direccion_info(self, obj):
@@ -78,13 +103,79 @@ class PedidoSerializer(serializers.ModelSerializer):
         return None
     
     def get_total_items(self, obj):
-        return obj.items.count()
+        # Anotado en el listado; en el detalle sale de los items ya cargados
+        if hasattr(obj, 'total_items'):
+            return obj.total_items
+        return len(obj.items.all())
     
     def get_costo_envio(self, obj):
         # Calcular costo de envío como la diferencia entre total y subtotal
         return float(obj.total - obj.subtotal)
 
 
+def nombre_usuario(first_name, last_name, username):
+    return f"{first_name} {last_name}".strip() or username
+
+
+class PedidoListaSerializer(serializers.ModelSerializer):
+    """
+    Pedido para listados: sin items ni dirección anidados. Espera el
+    queryset de PedidoViewSet (usuario con select_related y total_items /
+    costo_envio anotados), así el listado completo es una sola consulta.
+    """
+    usuario_nombre = serializers.SerializerMethodField()
+    total_items = serializers.IntegerField(read_only=True)
+    estado_pedido = serializers.CharField(source='estado', read_only=True)
+    costo_envio = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Pedido
+        fields = [
+            'id', 'numero_pedido', 'usuario', 'usuario_nombre', 'email_contacto',
+            'telefono_contacto', 'subtotal', 'total', 'costo_envio', 'estado', 'estado_pedido',
+            'notas', 'fecha_pedido', 'activo', 'total_items'
+        ]
+        read_only_fields = fields
+
+    def get_usuario_nombre(self, obj):
+        if obj.usuario:
+            return nombre_usuario(obj.usuario.first_name, obj.usuario.last_name, obj.usuario.username)
+        return None
+
+
+def _usuario_nombre_rapido(usuario_id, first_name, last_name, username):
+    return nombre_usuario(first_name, last_name, username) if usuario_id else None
+
+
+# Misma salida que PedidoListaSerializer, armada desde values()
+PEDIDO_LISTA_RAPIDO = rapida.Esquema(
+    ('id', 'id', None),
+    ('numero_pedido', 'numero_pedido', rapida.texto),
+    ('usuario', 'usuario', None),
+    ('usuario_nombre', None, rapida.Calculado(
+        ['usuario', 'usuario__first_name', 'usuario__last_name', 'usuario__username'],
+        _usuario_nombre_rapido
+    )),
+    ('email_contacto', 'email_contacto', rapida.texto),
+    ('telefono_contacto', 'telefono_contacto', rapida.texto),
+    ('subtotal', 'subtotal', rapida.decimal(10, 2)),
+    ('total', 'total', rapida.decimal(10, 2)),
+    ('costo_envio', 'costo_envio', rapida.flotante),
+    ('estado', 'estado', None),
+    ('estado_pedido', 'estado', rapida.texto),
+    ('notas', 'notas', rapida.texto),
+    ('fecha_pedido', 'fecha_pedido', rapida.fecha_hora),
+    ('activo', 'activo', None),
+    ('total_items', 'total_items', None),
+)
+
+# Columnas de la tabla de pedidos del admin (?compacto=1)
+PEDIDO_COMPACTO_RAPIDO = PEDIDO_LISTA_RAPIDO.subconjunto([
+    'id', 'numero_pedido', 'total_items', 'usuario_nombre', 'email_contacto',
+    'telefono_contacto', 'fecha_pedido', 'total', 'estado_pedido', 'activo'
+])
+
+
 class CrearItemInputSerializer(serializers.Serializer):
     producto_id = serializers.IntegerField()
     cantidad = serializers.IntegerField(min_value=1)
@@ -114,10 +205,10 @@ class CrearPedidoSerializer(serializers.Serializer):
         with transaction.atomic():
             detalles_items = [] 
             subtotal = Decimal('0.00')
+            productos = Producto.objects.in_bulk({it['producto_id'] for it in items_data})
             for it in items_data:
-                try:
-                    producto = Producto.objects.select_for_update().get(id=it['producto_id'])
-                except Producto.DoesNotExist:
+                producto = productos.get(it['producto_id'])
+                if producto is None:
                     raise serializers.ValidationError({'items': [f"Producto con id {it['producto_id']} no existe"]})
                 cantidad = int(it['cantidad'])
                 if cantidad <= 0:
@@ -146,8 +237,8 @@ class CrearPedidoSerializer(serializers.Serializer):
                 notas=notas,
             )
 
-            for producto, cantidad, precio_unitario, sub in detalles_items:
-                ItemPedido.objects.create(
+            ItemPedido.objects.bulk_create([
+                ItemPedido(
                     pedido=pedido,
                     producto=producto,
                     nombre_producto=producto.nombre,
@@ -155,8 +246,19 @@ class CrearPedidoSerializer(serializers.Serializer):
                     precio_unitario=precio_unitario,
                     subtotal=sub,
                 )
-                producto.stock = producto.stock - cantidad
-                producto.save(update_fields=['stock'])
+                for producto, cantidad, precio_unitario, sub in detalles_items
+            ])
+
+            # Descuento atómico de stock (UPDATE condicional) + ledger
+            try:
+                aplicar_movimientos(
+                    [(producto.id, -cantidad) for producto, cantidad, _, _ in detalles_items],
+                    motivo='venta',
+                    referencia=pedido.numero_pedido,
+                    usuario=user
+                )
+            except DjangoValidationError as e:
+                raise serializers.ValidationError({'items': e.messages})
 
             return pedido
 
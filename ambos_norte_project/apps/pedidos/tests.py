@@ -1,3 +1,77 @@
+from decimal import Decimal
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from apps.catalogo.models import Categoria, Producto
+from apps.usuarios.models import Usuario
+from .models import Pedido, ItemPedido
 
-# Create your tests here.
+
+class ListadoPedidosTests(TestCase):
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='cliente', first_name='Ana', last_name='Gómez')
+        categoria = Categoria.objects.create(nombre='Ambos')
+        self.productos = [
+            Producto.objects.create(categoria=categoria, nombre=f'Ambo {i}', precio=Decimal('1000.00'))
+            for i in range(3)
+        ]
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.usuario)
+
+    def crear_pedidos(self, cantidad):
+        for i in range(cantidad):
+            pedido = Pedido.objects.create(
+                numero_pedido=f'PN{Pedido.objects.count() + 1}', usuario=self.usuario,
+                email_contacto='ana@example.com', telefono_contacto='3794000000',
+                subtotal=Decimal('3000.00'), total=Decimal('3500.00')
+            )
+            ItemPedido.objects.bulk_create([
+                ItemPedido(
+                    pedido=pedido, producto=producto, nombre_producto=producto.nombre,
+                    cantidad=1, precio_unitario=producto.precio, subtotal=producto.precio
+                )
+                for producto in self.productos
+            ])
+
+    def listar(self, url='/api/pedidos/pedido/'):
+        respuesta = self.cliente.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.data
+
+    def test_consultas_fijas_y_columnas(self):
+        self.crear_pedidos(2)
+        with CaptureQueriesContext(connection) as consultas:
+            self.listar()
+
+        self.crear_pedidos(8)
+        with self.assertNumQueries(len(consultas)):
+            pedidos = self.listar()
+
+        self.assertEqual(len(pedidos), 10)
+        pedido = pedidos[0]
+        self.assertNotIn('items', pedido)
+        self.assertNotIn('direccion_info', pedido)
+        self.assertEqual(pedido['total_items'], 3)
+        self.assertEqual(pedido['costo_envio'], 500.0)
+        self.assertEqual(pedido['usuario_nombre'], 'Ana Gómez')
+
+        with self.assertNumQueries(len(consultas)):
+            compactos = self.listar('/api/pedidos/pedido/?compacto=1')
+        self.assertEqual(len(compactos), 10)
+        self.assertEqual(set(compactos[0]), {
+            'id', 'numero_pedido', 'total_items', 'usuario_nombre', 'email_contacto',
+            'telefono_contacto', 'fecha_pedido', 'total', 'estado_pedido', 'activo'
+        })
+
+    def test_cliente_solo_ve_sus_pedidos_activos(self):
+        self.crear_pedidos(2)
+        Pedido.objects.filter(numero_pedido='PN1').update(activo=False)
+        Pedido.objects.create(
+            numero_pedido='OTRO', usuario=Usuario.objects.create_user(username='otro'),
+            email_contacto='otro@example.com', telefono_contacto='0',
+            subtotal=Decimal('1.00'), total=Decimal('1.00')
+        )
+
+        self.assertEqual([pedido['numero_pedido'] for pedido in self.listar()], ['PN2'])
@@ -3,9 +3,13 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
-from django.db.models import Q, Sum, Count
+from django.db.models import Q, Sum, Count, F, DecimalField, ExpressionWrapper
 from .models import Pedido, ItemPedido, HistorialEstadoPedido
-from .serializers import PedidoSerializer, ItemPedidoSerializer, HistorialEstadoPedidoSerializer
+from .serializers import (
+    PedidoSerializer, PedidoListaSerializer, ItemPedidoSerializer, HistorialEstadoPedidoSerializer,
+    PEDIDO_LISTA_RAPIDO, PEDIDO_COMPACTO_RAPIDO
+)
+from ambos_norte.serializacion_rapida import Contexto
 import traceback
 
 
@@ -20,13 +24,21 @@ class PedidoViewSet(viewsets.ModelViewSet):
         """
         Filtra pedidos según permisos y parámetros
         """
-        queryset = Pedido.objects.select_related(
-            'usuario', 
-            'direccion'
-        ).prefetch_related(
-            'items__producto',
-            'historial'
-        )
+        if self.action == 'list':
+            # Modelo de lectura del listado: conteo de items y costo de envío
+            # calculados en la misma consulta, sin cargar los items
+            queryset = Pedido.objects.select_related('usuario').annotate(
+                total_items=Count('items'),
+                costo_envio=ExpressionWrapper(F('total') - F('subtotal'), output_field=DecimalField())
+            )
+        else:
+            queryset = Pedido.objects.select_related(
+                'usuario', 
+                'direccion'
+            ).prefetch_related(
+                'items__producto',
+                'historial'
+            )
         
         # Filtrar pedidos activos (solo admin puede ver inactivos)
         if not self.request.user.is_staff:
@@ -64,6 +76,20 @@ class PedidoViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('-fecha_pedido')
     
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return PedidoListaSerializer
+        return PedidoSerializer
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Listado plano de pedidos (el detalle con items está en retrieve).
+        Con ?compacto=1 devuelve solo las columnas de la tabla del admin.
+        """
+        esquema = PEDIDO_COMPACTO_RAPIDO if request.query_params.get('compacto') == '1' else PEDIDO_LISTA_RAPIDO
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(esquema.serializar(esquema.valores(queryset), Contexto(request)))
+    
     def get_permissions(self):
         """
         Permisos por acción:
@@ -84,6 +110,10 @@ class PedidoViewSet(viewsets.ModelViewSet):
             input_serializer = CrearPedidoSerializer(data=request.data, context={'request': request})
             input_serializer.is_valid(raise_exception=True)
             pedido = input_serializer.save()
+            # Releer como el detalle: items y productos en consultas fijas
+            pedido = Pedido.objects.select_related('usuario', 'direccion').prefetch_related(
+                'items__producto'
+            ).get(pk=pedido.pk)
             output = PedidoSerializer(pedido, context={'request': request}).data
             return Response(output, status=status.HTTP_201_CREATED)
         except Exception as e:
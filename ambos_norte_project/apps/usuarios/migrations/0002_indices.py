@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('usuarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['tipo_usuario', 'is_active'], name='usuarios_tipo_us_5aad77_idx'),
+        ),
+    ]
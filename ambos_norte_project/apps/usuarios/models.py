@@ -17,6 +17,9 @@ class Usuario(AbstractUser):
         db_table = 'usuarios'
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
+        indexes = [
+            models.Index(fields=['tipo_usuario', 'is_active']),
+        ]
     
     def __str__(self):
         return self.email or self.username
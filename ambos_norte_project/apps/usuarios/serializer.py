@@ -1,4 +1,6 @@
+from collections import defaultdict
 from rest_framework import serializers
+from ambos_norte import serializacion_rapida as rapida
 from django.contrib.auth import authenticate
 from .models import Usuario, Direccion
 
@@ -51,6 +53,47 @@ class UsuarioSerializer(serializers.ModelSerializer):
         return instance
 
 
+# Misma salida que UsuarioSerializer (lectura), armada desde values().
+# Los grupos y permisos salen de datos_usuarios_rapido()
+USUARIO_RAPIDO = rapida.Esquema(
+    ('id', 'id', None),
+    ('last_login', 'last_login', rapida.fecha_hora),
+    ('is_superuser', 'is_superuser', None),
+    ('username', 'username', rapida.texto),
+    ('first_name', 'first_name', rapida.texto),
+    ('last_name', 'last_name', rapida.texto),
+    ('email', 'email', rapida.texto),
+    ('is_staff', 'is_staff', None),
+    ('is_active', 'is_active', None),
+    ('date_joined', 'date_joined', rapida.fecha_hora),
+    ('telefono', 'telefono', rapida.texto),
+    ('tipo_usuario', 'tipo_usuario', None),
+    ('fecha_registro', 'fecha_registro', rapida.fecha_hora),
+    ('groups', 'id', lambda usuario_id, contexto: contexto.datos.get('grupos', {}).get(usuario_id, [])),
+    ('user_permissions', 'id', lambda usuario_id, contexto: contexto.datos.get('permisos', {}).get(usuario_id, [])),
+)
+
+
+def datos_usuarios_rapido(usuario_ids):
+    """Grupos y permisos de varios usuarios con dos consultas (para USUARIO_RAPIDO)"""
+    grupos, permisos = defaultdict(list), defaultdict(list)
+    if usuario_ids:
+        filas = Usuario.groups.through.objects.filter(
+            usuario_id__in=usuario_ids
+        ).order_by('id').values_list('usuario_id', 'group_id')
+        for usuario_id, grupo_id in filas:
+            grupos[usuario_id].append(grupo_id)
+        # Mismo orden que Permission.Meta.ordering
+        filas = Usuario.user_permissions.through.objects.filter(
+            usuario_id__in=usuario_ids
+        ).order_by(
+            'permission__content_type__app_label', 'permission__content_type__model', 'permission__codename'
+        ).values_list('usuario_id', 'permission_id')
+        for usuario_id, permiso_id in filas:
+            permisos[usuario_id].append(permiso_id)
+    return {'grupos': grupos, 'permisos': permisos}
+
+
 class DireccionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Direccion
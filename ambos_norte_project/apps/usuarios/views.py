@@ -6,6 +6,7 @@ from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.db.models import Q, Count
 
+from apps.carrito.sesion import promover_carrito_sesion
 from .models import Usuario, Direccion
 from .serializer import (
     UsuarioSerializer, 
@@ -64,7 +65,8 @@ class UsuarioViewSet(viewsets.ModelViewSet):
                 Q(telefono__icontains=search)
             )
         
-        return queryset.order_by('-fecha_registro')
+        # El serializer incluye groups y user_permissions: sin prefetch son 2 consultas por usuario
+        return queryset.prefetch_related('groups', 'user_permissions').order_by('-fecha_registro')
     
     def get_permissions(self):
         """
@@ -248,7 +250,7 @@ class UsuarioViewSet(viewsets.ModelViewSet):
             user = serializer.validated_data['user']
             tokens = get_tokens_for_user(user)
             
-            return Response({
+            response = Response({
                 'access': tokens['access'],
                 'refresh': tokens['refresh'],
                 'user': {
@@ -262,6 +264,10 @@ class UsuarioViewSet(viewsets.ModelViewSet):
                     'telefono': user.telefono,
                 }
             }, status=status.HTTP_200_OK)
+            
+            # Pasar el carrito anónimo (cookie) al carrito del usuario
+            promover_carrito_sesion(request, user, response)
+            return response
         
         return Response(
             {'detail': serializer.errors.get('non_field_errors', ['Credenciales incorrectas'])[0]},
@@ -280,12 +286,15 @@ class UsuarioViewSet(viewsets.ModelViewSet):
             user = serializer.save()
             tokens = get_tokens_for_user(user)
             
-            return Response({
+            response = Response({
                 'access': tokens['access'],
                 'refresh': tokens['refresh'],
                 'user': UsuarioSerializer(user).data,
                 'message': 'Usuario registrado exitosamente'
             }, status=status.HTTP_201_CREATED)
+            
+            promover_carrito_sesion(request, user, response)
+            return response
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
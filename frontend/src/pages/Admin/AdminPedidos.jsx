@@ -23,7 +23,8 @@ export default function AdminPedidos() {
   const cargarPedidos = async () => {
     try {
       setLoading(true);
-      const filters = {};
+      // Solo las columnas de la tabla; el detalle se pide al abrir el pedido
+      const filters = { compacto: 1 };
       if (filterEstado) filters.estado = filterEstado;
       
       const data = await ordersService.getAll(filters);